@@ -19,6 +19,7 @@ from ggrc import db
 from ggrc.access_control.list import AccessControlList
 from ggrc.access_control import role
 from ggrc.fulltext.attributes import CustomRoleAttr
+from ggrc.models import log_json_cache
 from ggrc.models import reflection
 from ggrc import utils
 from ggrc.utils import errors
@@ -172,6 +173,7 @@ class Roleable(object):
     acl_json = []
     for person, acl in self.access_control_list:
       person_entry = acl.log_json()
+      log_json_cache.depend_on(person)
       person_entry["person"] = utils.create_stub(person)
       person_entry["person_email"] = person.email
       person_entry["person_id"] = person.id
@@ -37,15 +37,26 @@ def insert_select_acls(select_statement):
       base_id,
   """
 
-  acl_table = all_models.AccessControlList.__table__
-  inserter = acl_table.insert().prefix_with("IGNORE")
-
   to_insert = db.session.execute(select_statement).fetchall()
 
   if to_insert:
     # TODO: investigate whether the select above sets locks on any tables
     db.session.plain_commit()
 
+  insert_acl_records(to_insert, select_statement)
+
+
+def insert_acl_records(to_insert, statement=None):
+  """Insert acl records with INSERT IGNORE in chunks.
+
+  Args:
+    to_insert: list of tuples with values of the columns listed in
+      insert_select_acls.
+    statement: statement that produced the records, used for logging.
+  """
+  acl_table = all_models.AccessControlList.__table__
+  inserter = acl_table.insert().prefix_with("IGNORE")
+
   def to_dict(record):
     """Match selected and inserted columns."""
     return dict(
@@ -83,7 +94,7 @@ def insert_select_acls(select_statement):
           logger.critical(
               "ACL propagation failed with %d retries on statement: \n %s",
               failures,
-              select_statement,
+              statement,
           )
           raise
         logger.exception(error)
@@ -130,6 +130,14 @@ def init_services(app_):
   ggrc.services.init_all_services(app_)
 
 
+def init_json_builders():
+  """Compile JSON publish plans for all models."""
+  from ggrc.builder.json import init_publish_plans
+  from ggrc.models import all_models
+  with benchmark("Compile JSON publish plans"):
+    init_publish_plans(all_models.all_models)
+
+
 def init_views(app_):
   import ggrc.views
   ggrc.views.init_all_views(app_)
@@ -258,6 +266,122 @@ def _display_request_time():
     return response
 
 
+def _enable_response_compression():
+  """Compress responses for clients that accept gzip or brotli encoding."""
+  if not getattr(settings, "COMPRESSION_ENABLED", False):
+    return
+
+  from ggrc.utils import compression
+
+  # pylint: disable=unused-variable
+  @app.after_request
+  def compress_response(response):
+    """Compress response body"""
+    with benchmark("Compress response"):
+      return compression.compress_response(request, response)
+
+
+def _enable_sql_profiler():
+  """Profile SQL queries of sampled requests and requests of admins."""
+  from ggrc.utils import sql_profiler
+  sql_profiler.register_listeners()
+
+  # pylint: disable=unused-variable
+  @app.before_request
+  def start_sql_profile():
+    """Start SQL profile for the request"""
+    sql_profiler.start_profile(request)
+
+  @app.after_request
+  def finish_sql_profile(response):
+    """Add SQL profile summary to the response"""
+    return sql_profiler.finish_profile(response)
+
+
+def _enable_sampling_profiler():
+  """Sample stacks of requests selected by profiler settings."""
+  from ggrc.utils import sampling_profiler
+
+  # pylint: disable=unused-variable
+  @app.before_request
+  def start_sampling():
+    """Start sampling the request thread"""
+    sampling_profiler.start_profile(request)
+
+  @app.teardown_request
+  def finish_sampling(_):
+    """Stop sampling the request thread"""
+    sampling_profiler.finish_profile()
+
+
+def _enable_benchmark_traces():
+  """Record benchmarks of each request as a trace."""
+  if not settings.BENCHMARK_TRACE_DIR or settings.DEBUG_BENCHMARK:
+    return
+  from ggrc.utils import benchmarks
+
+  # pylint: disable=unused-variable
+  @app.before_request
+  def start_trace():
+    """Start a trace of the request"""
+    attributes = {"method": request.method, "path": request.path}
+    task_name = request.headers.get("X-Appengine-Taskname")
+    if task_name:
+      attributes["task_name"] = task_name
+    benchmarks.start_trace(
+        "{} {}".format(request.method, request.endpoint or request.path),
+        **attributes
+    )
+
+  @app.teardown_request
+  def finish_trace(_):
+    """Write the trace of the request"""
+    benchmarks.finish_trace()
+
+
+def _enable_metrics():
+  """Collect request and SQL query metrics."""
+  if not getattr(settings, "METRICS_ENABLED", False):
+    return
+  from sqlalchemy.engine import Engine
+  from ggrc.utils import metrics
+
+  def count_query(*_):
+    """Count executed SQL query"""
+    metrics.SQL_QUERIES.inc()
+    if flask.has_request_context() and "metrics_start" in flask.g:
+      flask.g.metrics_sql_queries += 1
+
+  sqlalchemy.event.listen(Engine, "after_cursor_execute", count_query)
+
+  # pylint: disable=unused-variable
+  @app.before_request
+  def start_request_metrics():
+    """Remember when the request started"""
+    flask.g.metrics_start = time.time()
+    flask.g.metrics_sql_queries = 0
+
+  @app.after_request
+  def record_request_metrics(response):
+    """Record request duration and number of SQL queries"""
+    if "metrics_start" not in flask.g:
+      return response
+    endpoint = request.endpoint or "<unknown>"
+    metrics.REQUEST_DURATION.observe(
+        time.time() - flask.g.metrics_start,
+        method=request.method,
+        endpoint=endpoint,
+        status=response.status_code,
+    )
+    metrics.REQUEST_SQL_QUERIES.observe(
+        flask.g.metrics_sql_queries,
+        method=request.method,
+        endpoint=endpoint,
+    )
+    metrics.flush()
+    return response
+
+
 def register_indexing():
   """Register indexing after request hook"""
   from ggrc.models import background_task
@@ -288,11 +412,33 @@ def register_indexing():
     return response
 
 
+def register_deferred_automapping():
+  """Register after request hook for automappings deferred to background"""
+  from ggrc.automapper import create_deferred_automapping_task
+
+  # pylint: disable=unused-variable
+  @app.after_request
+  def create_automapping_bg_task(response):
+    """Create background task for deferred automappings
+    Adds header 'X-GGRC-Automapping-Task-Id' with BG task id
+    """
+    if 200 <= response.status_code < 300:
+      with benchmark("Create automapping bg task"):
+        bg_task = create_deferred_automapping_task()
+        if bg_task:
+          response.headers.add("X-GGRC-Automapping-Task-Id", bg_task.id)
+    return response
+
+
+# Response compression must be the last after request handler, so it is
+# registered first.
+_enable_response_compression()
 setup_error_handlers(app)
 init_models(app)
 configure_flask_login(app)
 configure_jinja(app)
 init_services(app)
+init_json_builders()
 init_views(app)
 init_extension_blueprints(app)
 init_gdrive_routes(app)
@@ -300,7 +446,12 @@ init_permissions_provider()
 init_extra_listeners()
 notifications.register_notification_listeners()
 register_indexing()
+register_deferred_automapping()
 
 _enable_debug_toolbar()
 _display_sql_queries()
 _display_request_time()
+_enable_sql_profiler()
+_enable_sampling_profiler()
+_enable_benchmark_traces()
+_enable_metrics()
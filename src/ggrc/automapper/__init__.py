@@ -3,6 +3,7 @@
 
 """Automapper generator."""
 
+import collections
 from datetime import datetime
 import logging
 
@@ -10,12 +11,15 @@ import sqlalchemy as sa
 import flask
 
 from ggrc import db
+from ggrc import settings
+from ggrc import utils
 from ggrc.automapper import rules
 from ggrc import login
 from ggrc.models.audit import Audit
 from ggrc.models.automapping import Automapping
-from ggrc.models.relationship import Relationship, RelationshipsCache, Stub
+from ggrc.models.relationship import Relationship, Stub
 from ggrc.models.issue import Issue
+from ggrc.models import background_task
 from ggrc.models import exceptions
 from ggrc.rbac import permissions
 from ggrc.models.cache import Cache
@@ -31,11 +35,15 @@ class AutomapperGenerator(object):
   Consumes automapping rules and newly created Relationships, creates
   autogenerated Relationships registering them in Automappings table.
 
-  Note: we can rely on the order of src/dst pairs of queued and
-  inserted mappings since we only queue ordered pairs (see `order`).
-  """
+  The closure of a relationship is computed level by level. Every level
+  takes the edges created on the previous level, fetches neighbors needed by
+  the matching rules with one query per rule group and creates all implied
+  mappings that do not exist yet. New mappings are the edges of the next
+  level.
 
-  COUNT_LIMIT = 10000
+  Note: we can rely on the order of src/dst pairs of generated and
+  inserted mappings since we only generate ordered pairs (see `order`).
+  """
 
   _AUTOMAP_WITHOUT_PERMISSION = [
       {"Audit", "Issue"},
@@ -43,24 +51,11 @@ class AutomapperGenerator(object):
   ]
 
   def __init__(self):
-    self.processed = set()
-    self.queue = set()
     self.auto_mappings = set()
+    # mappings generated for all relationships handled by this generator
+    self.generated = set()
     self.automapping_ids = set()
-    self.related_cache = RelationshipsCache()
-
-  def related(self, obj):
-    """Return obj's relationship stubs"""
-    if obj in self.related_cache.cache:
-      return self.related_cache.cache[obj]
-
-    # Pre-fetch neighborhood for enqueued objects since we're gonna need these
-    # results in a few steps. This drastically reduces number of queries.
-    stubs = {s for rel in self.queue for s in rel}
-    stubs.add(obj)
-    self.related_cache.populate_cache(stubs)
-
-    return self.related_cache.cache[obj]
+    self._update_permissions = {}
 
   @staticmethod
   def order(src, dst):
@@ -70,40 +65,123 @@ class AutomapperGenerator(object):
     """Generate Automappings for a given relationship"""
     self.auto_mappings = set()
 
-    # initial relationship is special since it is already created and
-    # processing it would abort the loop so we manually enqueue the
-    # neighborhood
     src = Stub.from_source(relationship)
     dst = Stub.from_destination(relationship)
-    self._step(src, dst)
-    self._step(dst, src)
-    while self.queue:
-      if len(self.auto_mappings) > self.COUNT_LIMIT:
-        break
-      src, dst = entry = self.queue.pop()
-
-      if {src.type, dst.type} not in self._AUTOMAP_WITHOUT_PERMISSION:
-        # Mapping between some objects should be created even if there is no
-        # permission to edit (+map) this objects. Thus permissions check for
-        # them should be skipped.
-        if not (permissions.is_allowed_update(src.type, src.id, None) and
-                permissions.is_allowed_update(dst.type, dst.id, None)):
-          continue
-
-      created = self._ensure_relationship(src, dst)
-      self.processed.add(entry)
-      if not created:
-        # If the edge already exists it means that auto mappings for it have
-        # already been processed and it is safe to cut here.
-        continue
-      self._step(src, dst)
-      self._step(dst, src)
-
-    if len(self.auto_mappings) <= self.COUNT_LIMIT:
-      self._flush(relationship)
-    else:
-      logger.error("Automapping limit exceeded: limit=%s, count=%s",
-                   self.COUNT_LIMIT, len(self.auto_mappings))
+    original = self.order(src, dst)
+    level = 0
+    # directed edges (src, dst) to which rules of (src.type, dst.type) apply
+    edges = {(src, dst), (dst, src)}
+    while edges:
+      with benchmark("Automapping level {}".format(level)) as span:
+        candidates = self._get_candidates(edges)
+        candidates -= self.generated
+        candidates.discard(original)
+        candidates = self._filter_allowed(candidates)
+        candidates = self._filter_existing(candidates)
+        self._check_single_audit_restriction(candidates)
+        span.set_attribute("mapping_count", len(candidates))
+      self.auto_mappings |= candidates
+      self.generated |= candidates
+      edges = {edge for pair in candidates for edge in (pair, pair[::-1])}
+      level += 1
+
+    self._flush(relationship)
+
+  def _get_candidates(self, edges):
+    """Get ordered pairs implied by rules for the given directed edges."""
+    groups = collections.defaultdict(list)
+    for src, dst in edges:
+      mappings = rules.rules[src.type, dst.type]
+      if mappings:
+        groups[dst.type, mappings].append((src, dst))
+
+    candidates = set()
+    for (dst_type, mappings), group in groups.iteritems():
+      neighbors = self._get_neighbors(
+          dst_type, {dst.id for _, dst in group}, mappings)
+      for src, dst in group:
+        for related in neighbors[dst.id]:
+          if related != src:
+            candidates.add(self.order(related, src))
+    return candidates
+
+  @staticmethod
+  def _get_neighbors(obj_type, obj_ids, neighbor_types):
+    """Get neighbors of the given types for objects of obj_type.
+
+    Returns:
+      dict of obj_id -> set of neighbor Stubs.
+    """
+    rel = Relationship.__table__
+    neighbors = collections.defaultdict(set)
+    for ids_chunk in utils.list_chunks(sorted(obj_ids)):
+      # Union is here so that mysql uses separate indices for source and
+      # destination columns.
+      query = sa.union_all(
+          sa.select([
+              rel.c.source_id,
+              rel.c.destination_type,
+              rel.c.destination_id,
+          ]).where(sa.and_(
+              rel.c.source_type == obj_type,
+              rel.c.source_id.in_(ids_chunk),
+              rel.c.destination_type.in_(neighbor_types),
+          )),
+          sa.select([
+              rel.c.destination_id,
+              rel.c.source_type,
+              rel.c.source_id,
+          ]).where(sa.and_(
+              rel.c.destination_type == obj_type,
+              rel.c.destination_id.in_(ids_chunk),
+              rel.c.source_type.in_(neighbor_types),
+          )),
+      )
+      for obj_id, neighbor_type, neighbor_id in db.session.execute(query):
+        neighbors[obj_id].add(Stub(neighbor_type, neighbor_id))
+    return neighbors
+
+  def _is_allowed_update(self, stub):
+    """Check update permission once per object."""
+    if stub not in self._update_permissions:
+      self._update_permissions[stub] = permissions.is_allowed_update(
+          stub.type, stub.id, None)
+    return self._update_permissions[stub]
+
+  def _filter_allowed(self, pairs):
+    """Get pairs where both objects may be updated by the current user.
+
+    Mapping between some objects should be created even if there is no
+    permission to edit (+map) these objects. Thus permissions check for them
+    is skipped.
+    """
+    if permissions.is_admin():
+      return pairs
+    return {
+        (src, dst) for src, dst in pairs
+        if {src.type, dst.type} in self._AUTOMAP_WITHOUT_PERMISSION or (
+            self._is_allowed_update(src) and self._is_allowed_update(dst))
+    }
+
+  @staticmethod
+  def _filter_existing(pairs):
+    """Get pairs which are not mapped in any direction yet."""
+    if not pairs:
+      return pairs
+    rel = Relationship.__table__
+    columns = (rel.c.source_type, rel.c.source_id,
+               rel.c.destination_type, rel.c.destination_id)
+    existing = set()
+    for pairs_chunk in utils.list_chunks(sorted(pairs)):
+      keys = [(src.type, src.id, dst.type, dst.id)
+              for src, dst in pairs_chunk]
+      keys.extend((dst_type, dst_id, src_type, src_id)
+                  for src_type, src_id, dst_type, dst_id in keys[:])
+      query = sa.select(columns).where(sa.tuple_(*columns).in_(keys))
+      for src_type, src_id, dst_type, dst_id in db.session.execute(query):
+        existing.add(AutomapperGenerator.order(Stub(src_type, src_id),
+                                               Stub(dst_type, dst_id)))
+    return pairs - existing
 
   def _flush(self, parent_relationship):
     """Manually INSERT generated automappings."""
@@ -197,52 +275,147 @@ class AutomapperGenerator(object):
         )
     )
 
-  def _step(self, src, dst):
-    """Step through the automapping rules tree."""
-    mappings = rules.rules[src.type, dst.type]
-    if mappings:
-      dst_related = (o for o in self.related(dst)
-                     if o.type in mappings and o != src)
-      for related in dst_related:
-        entry = self.order(related, src)
-        if entry not in self.processed:
-          self.queue.add(entry)
-
-  def _ensure_relationship(self, src, dst):
-    """Create the relationship if not exists already.
+  def _check_single_audit_restriction(self, pairs):
+    """Fail if an Issue would be mapped to multiple Audits.
 
-    Returns:
-      True if a relationship was created;
-      False otherwise.
+    Mappings of the previous levels are not flushed yet, so they are checked
+    together with the database and the given pairs.
     """
-    # even though self.cache is defaultdict, self.cache[key] adds key
-    # to self.cache if it is not present, and we should avoid it
-    if dst in self.related(src):
-      return False
-    if src in self.related(dst):
-      return False
-
-    self._check_single_audit_restriction(src, dst)
-
-    self.auto_mappings.add((src, dst))
-
-    if src in self.related_cache.cache:
-      self.related_cache.cache[src].add(dst)
-    if dst in self.related_cache.cache:
-      self.related_cache.cache[dst].add(src)
-
-    return True
-
-  def _check_single_audit_restriction(self, src, dst):
-    """Fail if dst (Issue) is already mapped to an Audit."""
-    # src, dst are ordered since they come from self.queue
-    if (src.type, dst.type) == ("Audit", "Issue"):
-      if "Audit" in (related.type for related in self.related(dst)):
-        raise exceptions.ValidationError(
-            "This request will result in automapping that will map "
-            "Issue#{issue.id} to multiple Audits."
-            .format(issue=dst)
-        )
+    # pairs are ordered, so the Audit is always the first stub
+    issue_audits = collections.defaultdict(set)
+    for src, dst in pairs:
+      if (src.type, dst.type) == ("Audit", "Issue"):
+        issue_audits[dst.id].add(src.id)
+    if not issue_audits:
+      return
+    for src, dst in self.auto_mappings:
+      if (src.type, dst.type) == ("Audit", "Issue") and dst.id in issue_audits:
+        issue_audits[dst.id].add(src.id)
+    rel = Relationship.__table__
+    mapped_issue_ids = db.session.execute(sa.union(
+        sa.select([rel.c.destination_id]).where(sa.and_(
+            rel.c.source_type == "Audit",
+            rel.c.destination_type == "Issue",
+            rel.c.destination_id.in_(list(issue_audits)),
+        )),
+        sa.select([rel.c.source_id]).where(sa.and_(
+            rel.c.destination_type == "Audit",
+            rel.c.source_type == "Issue",
+            rel.c.source_id.in_(list(issue_audits)),
+        )),
+    ))
+    invalid_ids = {issue_id for issue_id, in mapped_issue_ids}
+    invalid_ids.update(issue_id for issue_id, audit_ids
+                       in issue_audits.iteritems() if len(audit_ids) > 1)
+    if invalid_ids:
+      raise exceptions.ValidationError(
+          "This request will result in automapping that will map "
+          "Issue#{} to multiple Audits."
+          .format(min(invalid_ids))
+      )
+
+
+def estimate_automapping_count(relationship):
+  """Estimate number of automappings generated for a relationship.
+
+  Only mappings of the first rule level are counted, with the current rules
+  they are all automappings of the relationship.
+  """
+  src = Stub.from_source(relationship)
+  dst = Stub.from_destination(relationship)
+  rel = Relationship.__table__
+  count = 0
+  for other, obj in ((src, dst), (dst, src)):
+    mappings = rules.rules[other.type, obj.type]
+    if not mappings:
+      continue
+    neighbors = sa.union_all(
+        sa.select([rel.c.id]).where(sa.and_(
+            rel.c.source_type == obj.type,
+            rel.c.source_id == obj.id,
+            rel.c.destination_type.in_(mappings),
+        )),
+        sa.select([rel.c.id]).where(sa.and_(
+            rel.c.destination_type == obj.type,
+            rel.c.destination_id == obj.id,
+            rel.c.source_type.in_(mappings),
+        )),
+    ).alias("neighbors")
+    count += db.session.execute(
+        sa.select([sa.func.count()]).select_from(neighbors)
+    ).scalar()
+  return count
+
+
+def _should_defer(relationship):
+  """Check if automappings of the relationship should run in background."""
+  threshold = settings.AUTOMAPPING_BACKGROUND_THRESHOLD
+  if not threshold or background_task.running_in_background():
+    return False
+  return estimate_automapping_count(relationship) > threshold
+
+
+def generate_deferred_automappings(task):
+  """Generate automappings for relationships deferred to a background task.
+
+  Relationships are processed in chunks, each chunk is committed and the
+  progress is stored in the BackgroundOperation of the task.
+  """
+  from ggrc.utils import log_event
+  relationship_ids = task.parameters.get("relationship_ids", [])
+  chunk_size = settings.AUTOMAPPING_BACKGROUND_CHUNK_SIZE
+  processed = 0
+  if task.bg_operation:
+    task.bg_operation.set_progress(processed, len(relationship_ids))
+    db.session.commit()
+  for ids_chunk in utils.list_chunks(relationship_ids, chunk_size):
+    with benchmark("Automapping generate deferred automappings"):
+      automapper = AutomapperGenerator()
+      relationships = Relationship.query.filter(
+          Relationship.id.in_(ids_chunk))
+      for relationship in relationships:
+        automapper.generate_automappings(relationship)
+      automapper.propagate_acl()
+      log_event.log_event(db.session, bulk=True)
+    processed += len(ids_chunk)
+    if task.bg_operation:
+      task.bg_operation.set_progress(processed, len(relationship_ids))
+    db.session.commit()
+  return "success"
+
+
+def create_deferred_automapping_task():
+  """Create background task for automappings deferred in this request.
+
+  Returns:
+    BackgroundTask or None if no automappings were deferred.
+  """
+  relationship_ids = getattr(flask.g, "deferred_automappings", None)
+  if not relationship_ids:
+    return None
+  del flask.g.deferred_automappings
+  from ggrc.views import run_deferred_automappings
+  first = Relationship.query.get(min(relationship_ids))
+  if first is None:
+    return None
+  operation_type = "automapping"
+  is_running = background_task.bg_operation_running(
+      operation_type, first.source_type, first.source_id)
+  if is_running:
+    # progress is reported only for the first running task of an object
+    operation_type = None
+  bg_task = background_task.create_task(
+      name="automapping",
+      url=flask.url_for(run_deferred_automappings.__name__),
+      parameters={
+          "relationship_ids": sorted(relationship_ids),
+          "parent": {"type": first.source_type, "id": first.source_id},
+      },
+      operation_type=operation_type,
+      queued_callback=run_deferred_automappings,
+  )
+  db.session.commit()
+  return bg_task
 
 
 def register_automapping_listeners():
@@ -257,7 +430,13 @@ def register_automapping_listeners():
     if not relationships:
       return
 
-    with benchmark("automap"):
+    with benchmark("automap", metric_name="automap"):
+      deferred = {rel for rel in relationships if _should_defer(rel)}
+      if deferred:
+        if not hasattr(flask.g, "deferred_automappings"):
+          flask.g.deferred_automappings = set()
+        flask.g.deferred_automappings.update(rel.id for rel in deferred)
+        relationships = [rel for rel in relationships if rel not in deferred]
       automapper = AutomapperGenerator()
       referenced_objects = getattr(flask.g, "referenced_object_stubs", None)
       if referenced_objects:
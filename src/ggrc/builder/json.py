@@ -6,6 +6,7 @@
 # pylint: disable=no-name-in-module
 # false positive for RelationshipProperty
 
+from datetime import date
 from datetime import datetime
 from logging import getLogger
 import dateutil
@@ -13,6 +14,7 @@ import dateutil
 import sqlalchemy
 from sqlalchemy.ext.associationproxy import AssociationProxy
 from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.orm.properties import ColumnProperty
 from sqlalchemy.orm.properties import RelationshipProperty
 from werkzeug.exceptions import BadRequest
 
@@ -24,6 +26,7 @@ from ggrc.login import get_current_user_id
 from ggrc.models.reflection import AttributeInfo
 from ggrc.models.types import JsonType
 from ggrc.models.utils import PolymorphicRelationship
+from ggrc.utils import json_default
 from ggrc.utils import referenced_objects
 from ggrc.utils import url_for
 from ggrc.utils import view_url_for
@@ -48,6 +51,16 @@ def get_json_builder(obj):
   return builder
 
 
+def init_publish_plans(models):
+  """Create JSON builders and compile publish plans for given models.
+
+  This should be called once on app startup, after all models are mapped, so
+  that requests do not pay for the class inspection on the first publish.
+  """
+  for model in models:
+    get_json_builder(model).compile_publish_plan()
+
+
 def publish_base_properties(obj):
   """Return a dict with selfLink and viewLink for obj."""
   ret = {}
@@ -516,7 +529,26 @@ def publish_representation(resource):
 
 
 class Builder(AttributeInfo):
-  """JSON Dictionary builder for ggrc.models.* objects and their mixins."""
+  """JSON Dictionary builder for ggrc.models.* objects and their mixins.
+
+  Every builder holds a publish plan for its target class: the list of
+  published attribute names, compiled publisher callables for them and the
+  default inclusion map. Publishers are compiled on first use or upfront with
+  ``compile_publish_plan``.
+  """
+
+  def __init__(self, tgt_class):
+    super(Builder, self).__init__(tgt_class)
+    self._tgt_class = tgt_class
+    self._attr_publishers = {}
+    self._default_inclusions = tuple(
+        (attr,) for attr in self._include_links)
+    self._default_inclusion_map = self._get_inclusion_map(
+        self._default_inclusions)
+    self._publish_plan = [
+        attr.attr_name if hasattr(attr, '__call__') else attr
+        for attr in self._publish_attrs
+    ]
 
   def generate_link_object_for(
           self, obj, inclusions, include, inclusion_filter):
@@ -628,77 +660,141 @@ class Builder(AttributeInfo):
     if attr_value is not None:
       return LazyStubRepresentation(target_type, attr_value)
 
-  def _process_custom_publish(self, obj, attr_name):
-    """Processes _custom_publish logic and returns value if any or None."""
-    if attr_name in getattr(obj.__class__, '_custom_publish', {}):
+  @staticmethod
+  def _get_custom_publish(cls, attr_name):
+    """Return _custom_publish handler for the attribute if there is one."""
+    if attr_name in getattr(cls, '_custom_publish', {}):
       # The attribute has a custom publish logic.
-      return True, obj.__class__._custom_publish[attr_name](obj)
+      return cls._custom_publish[attr_name]
 
-    for base in obj.__class__.__bases__:
+    for base in cls.__bases__:
       # Inspect all mixins for custom publish logic.
       if attr_name in getattr(base, '_custom_publish', {}):
-        return True, base._custom_publish[attr_name](obj)
+        return base._custom_publish[attr_name]
 
-    return False, None
+    return None
 
-  def publish_attr(
-          self, obj, attr_name, inclusions, include, inclusion_filter):
-    """Publish obj attr."""
-    value_exists, value = self._process_custom_publish(obj, attr_name)
-    if value_exists:
-      return value
+  def _compile_attr_publisher(self, attr_name):
+    """Build publisher callable for ``attr_name`` of the target class.
+
+    All class level inspection (custom publish handlers, attribute type
+    dispatch) is done here once so the returned callable only performs the
+    work that depends on the published object. The callable accepts
+    ``(obj, inclusions, include, inclusion_filter)`` arguments.
+    """
+    tgt_class = self._tgt_class
+    custom_publish = self._get_custom_publish(tgt_class, attr_name)
+    if custom_publish is not None:
+      return lambda obj, *_: custom_publish(obj)
 
-    class_attr = getattr(obj.__class__, attr_name)
-    result = None
+    class_attr = getattr(tgt_class, attr_name)
 
     if isinstance(class_attr, AssociationProxy):
       if getattr(class_attr, 'publish_raw', False):
-        published_attr = getattr(obj, attr_name)
-        if hasattr(published_attr, "copy"):
-          result = published_attr.copy()
-        else:
-          result = published_attr
-      else:
-        result = self.publish_association_proxy(
+        def publish_raw(obj, *_):
+          published_attr = getattr(obj, attr_name)
+          if hasattr(published_attr, "copy"):
+            return published_attr.copy()
+          return published_attr
+        return publish_raw
+
+      def publish_proxy(obj, inclusions, include, inclusion_filter):
+        return self.publish_association_proxy(
             obj, class_attr, inclusions, include, inclusion_filter)
-    elif (isinstance(class_attr, InstrumentedAttribute) and
-          isinstance(class_attr.property, RelationshipProperty)):
-      result = self.publish_relationship(
-          obj, attr_name, class_attr, inclusions, include, inclusion_filter)
-    elif class_attr.__class__.__name__ == 'property':
-      if not inclusions or include:
-        if getattr(obj, '{0}_id'.format(attr_name)):
-          result = LazyStubRepresentation(
-              getattr(obj, '{0}_type'.format(attr_name)),
-              getattr(obj, '{0}_id'.format(attr_name)))
-      else:
-        result = self.publish_link(
+      return publish_proxy
+
+    if (isinstance(class_attr, InstrumentedAttribute) and
+            isinstance(class_attr.property, RelationshipProperty)):
+      def publish_relationship(obj, inclusions, include, inclusion_filter):
+        return self.publish_relationship(
+            obj, attr_name, class_attr, inclusions, include, inclusion_filter)
+      return publish_relationship
+
+    if class_attr.__class__.__name__ == 'property':
+      id_attr = '{0}_id'.format(attr_name)
+      type_attr = '{0}_type'.format(attr_name)
+
+      def publish_property(obj, inclusions, include, inclusion_filter):
+        if not inclusions or include:
+          if getattr(obj, id_attr):
+            return LazyStubRepresentation(
+                getattr(obj, type_attr), getattr(obj, id_attr))
+          return None
+        return self.publish_link(
             obj, attr_name, inclusions, include, inclusion_filter)
-    else:
-      result = getattr(obj, attr_name)
+      return publish_property
+
+    if self._is_date_column(class_attr):
+      def publish_date(obj, *_):
+        # Dates are converted here so that JSON encoders do not have to fall
+        # back to the slow default handler for every date value.
+        value = getattr(obj, attr_name)
+        if isinstance(value, date):
+          return json_default(value)
+        return value
+      return publish_date
+
+    return lambda obj, *_: getattr(obj, attr_name)
+
+  @staticmethod
+  def _is_date_column(class_attr):
+    """Check if class_attr is a Date or DateTime column."""
+    if not (isinstance(class_attr, InstrumentedAttribute) and
+            isinstance(class_attr.property, ColumnProperty)):
+      return False
+    column_type = class_attr.property.columns[0].type
+    return isinstance(column_type, (sqlalchemy.Date, sqlalchemy.DateTime))
+
+  def _get_attr_publisher(self, attr_name):
+    """Get compiled publisher for ``attr_name``, compile it if needed."""
+    publisher = self._attr_publishers.get(attr_name)
+    if publisher is None:
+      publisher = self._compile_attr_publisher(attr_name)
+      self._attr_publishers[attr_name] = publisher
+    return publisher
+
+  def compile_publish_plan(self):
+    """Compile publishers for all published attributes of the target class.
+
+    Attributes that can not be compiled are left to be compiled on first
+    publish, which will raise the same error as it did before compilation.
+    """
+    for attr_name in self._publish_plan:
+      try:
+        self._get_attr_publisher(attr_name)
+      except Exception:  # pylint: disable=broad-except
+        logger.warning("Unable to compile publisher for %s.%s",
+                       self._tgt_class.__name__, attr_name, exc_info=True)
 
-    return result
+  def publish_attr(
+          self, obj, attr_name, inclusions, include, inclusion_filter):
+    """Publish obj attr."""
+    if obj.__class__ is not self._tgt_class:
+      # Link objects of other types are published with their own plans.
+      return get_json_builder(obj).publish_attr(
+          obj, attr_name, inclusions, include, inclusion_filter)
+    return self._get_attr_publisher(attr_name)(
+        obj, inclusions, include, inclusion_filter)
+
+  @staticmethod
+  def _get_inclusion_map(inclusions):
+    """Map attr names to the first inclusion path starting with them."""
+    inclusion_map = {}
+    for inclusion in inclusions:
+      inclusion_map.setdefault(inclusion[0], inclusion)
+    return inclusion_map
 
   def _publish_attrs_for(
-          self, obj, attrs, json_obj, inclusions=None, inclusion_filter=None,
+          self, obj, json_obj, inclusion_map, inclusion_filter=None,
           attribute_whitelist=None):
-    """Publis attrs for obj."""
-    if inclusions is None:
-      inclusions = []
-    for attr in attrs:
-      if hasattr(attr, '__call__'):
-        attr_name = attr.attr_name
-      else:
-        attr_name = attr
-      local_inclusion = ()
-      for inclusion in inclusions:
-        if inclusion[0] == attr_name:
-          local_inclusion = inclusion
-          break
+    """Publish attrs for obj using the compiled publish plan."""
+    for attr_name in self._publish_plan:
       if attribute_whitelist and attr_name not in attribute_whitelist:
         continue
-      json_obj[attr_name] = self.publish_attr(
-          obj, attr_name, local_inclusion[1:], len(local_inclusion) > 0,
+      local_inclusion = inclusion_map.get(attr_name, ())
+      publisher = self._get_attr_publisher(attr_name)
+      json_obj[attr_name] = publisher(
+          obj, local_inclusion[1:], len(local_inclusion) > 0,
           inclusion_filter)
 
   def publish_attrs(self, obj, json_obj, extra_inclusions, inclusion_filter,
@@ -718,11 +814,13 @@ class Builder(AttributeInfo):
       [('directives'),('cycles')]
       [('directives', ('audit_frequency','organization')),('cycles')]
     """
-    inclusions = tuple((attr,) for attr in self._include_links)
-    inclusions = tuple(set(inclusions).union(set(extra_inclusions)))
+    if extra_inclusions:
+      inclusions = set(self._default_inclusions).union(set(extra_inclusions))
+      inclusion_map = self._get_inclusion_map(inclusions)
+    else:
+      inclusion_map = self._default_inclusion_map
     return self._publish_attrs_for(
-        obj, self._publish_attrs, json_obj, inclusions, inclusion_filter,
-        attribute_whitelist)
+        obj, json_obj, inclusion_map, inclusion_filter, attribute_whitelist)
 
   @classmethod
   def do_update_attrs(cls, obj, json_obj, attrs):
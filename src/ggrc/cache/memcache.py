@@ -10,6 +10,7 @@ from google.appengine.api import memcache
 
 from ggrc.cache import cache
 from ggrc import settings
+from ggrc.utils import metrics
 
 
 logger = logging.getLogger(__name__)
@@ -294,6 +295,7 @@ class _Decorated(object):
       return self.function(*args, **kwargs)
     key = self.get_key(*args, **kwargs)
     value = self.memcache_client.get(key)
+    metrics.count_memcache(self.function.__name__, value is not None)
     if value is not None:
       return value
     result = self.function(*args, **kwargs)
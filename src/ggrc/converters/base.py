@@ -11,6 +11,7 @@ from google.appengine.ext import deferred
 from ggrc import login
 from ggrc import settings
 from ggrc.utils import benchmark
+from ggrc.utils import list_chunks
 from ggrc.utils import structures
 from ggrc.cache.utils import clear_memcache
 from ggrc.converters import get_exportables
@@ -20,6 +21,7 @@ from ggrc.converters.snapshot_block import SnapshotBlockConverter
 from ggrc.converters.import_helper import extract_relevant_data
 from ggrc.converters.import_helper import split_blocks
 from ggrc.converters.import_helper import CsvStringBuilder
+from ggrc.converters.import_helper import CsvWriter
 from ggrc.fulltext import get_indexer
 
 
@@ -136,12 +138,29 @@ class ExportConverter(BaseConverter):
   blocks and columns are handled in the correct order.
   """
 
-  def __init__(self, ids_by_type, exportable_queries=None):
+  def __init__(self, ids_by_type, exportable_queries=None, table_width=None,
+               header=True, footer=True):
+    """Initialize the export converter.
+
+    Args:
+      ids_by_type: list of object queries with ids of exported objects.
+      exportable_queries: indexes of queries to export, all by default.
+      table_width: width of the CSV table, the widest block by default.
+      header: write header lines of blocks.
+      footer: write empty lines closing blocks.
+
+    The last three arguments are set by get_export_parts for converters
+    exporting a part of a block.
+    """
+    # pylint: disable=too-many-arguments
     super(ExportConverter, self).__init__()
     self.dry_run = True  # TODO: fix ColumnHandler to not use it for exports
     self.block_converters = []
     self.ids_by_type = ids_by_type
     self.exportable_queries = exportable_queries or []
+    self.table_width = table_width
+    self.header = header
+    self.footer = footer
 
   def get_object_names(self):
     return [c.name for c in self.block_converters]
@@ -178,39 +197,98 @@ class ExportConverter(BaseConverter):
         )
         self.block_converters.append(block_converter)
 
-  def export_csv_data(self):
-    """Export csv data."""
+  def export_csv_data(self, output=None):
+    """Export csv data.
+
+    Args:
+      output: optional object with a write method. If it is set, the CSV is
+        written into it row by row and None is returned.
+
+    Returns:
+      CSV string if output is not set.
+    """
     with benchmark("Initialize block converters."):
       self.initialize_block_converters()
     with benchmark("Build csv data."):
       try:
+        if output is not None:
+          return self.write_csv_from_row_data(output)
         return self.build_csv_from_row_data()
       except ValueError:
         return ""
 
   def build_csv_from_row_data(self):
     """Export each block separated by empty lines."""
+    table_width = self._get_table_width()
+    csv_string_builder = CsvStringBuilder(table_width)
+    self._write_blocks(csv_string_builder)
+    return csv_string_builder.get_csv_string()
+
+  def write_csv_from_row_data(self, output):
+    """Write each block separated by empty lines into the output."""
+    self._write_blocks(CsvWriter(self._get_table_width(), output))
+
+  def get_export_parts(self, parts_count):
+    """Split the export into parts that can be exported separately.
+
+    Ids of all exported objects are split into ranges of about the same
+    size, so that the export has about parts_count parts. A range never
+    crosses a block. Snapshot block columns depend on all exported
+    snapshots, so snapshot blocks are never split.
+
+    Returns:
+      list of ExportConverter keyword arguments of parts in the order of
+      their CSV content.
+    """
+    self.initialize_block_converters()
+    if not self.block_converters:
+      return []
+    table_width = self._get_table_width()
+    queries = self._get_exportable_queries()
+    ids_count = sum(len(query.get("ids", [])) for query in queries)
+    part_size = max((ids_count + parts_count - 1) // parts_count, 1)
+    parts = []
+    for query in queries:
+      ids = query.get("ids", [])
+      if query["object_name"] == "Snapshot" or not ids:
+        ranges = [ids]
+      else:
+        ranges = list(list_chunks(ids, part_size))
+      for index, ids_range in enumerate(ranges):
+        part_query = dict(query, ids=ids_range)
+        parts.append({
+            "ids_by_type": [part_query],
+            "table_width": table_width,
+            "header": index == 0,
+            "footer": index == len(ranges) - 1,
+        })
+    return parts
+
+  def _get_table_width(self):
+    if self.table_width:
+      return self.table_width
     table_width = max([converter.block_width
                        for converter in self.block_converters])
-    table_width += 1  # One line for 'Object line' column
+    return table_width + 1  # One line for 'Object line' column
 
-    csv_string_builder = CsvStringBuilder(table_width)
+  def _write_blocks(self, csv_string_builder):
+    """Append headers and rows of all blocks to the CSV writer."""
     for block_converter in self.block_converters:
-      csv_header = block_converter.generate_csv_header()
-      csv_header[0].insert(0, "Object type")
-      csv_header[1].insert(0, block_converter.name)
+      if self.header:
+        csv_header = block_converter.generate_csv_header()
+        csv_header[0].insert(0, "Object type")
+        csv_header[1].insert(0, block_converter.name)
 
-      csv_string_builder.append_line(csv_header[0])
-      csv_string_builder.append_line(csv_header[1])
+        csv_string_builder.append_line(csv_header[0])
+        csv_string_builder.append_line(csv_header[1])
 
       for line in block_converter.generate_row_data():
         line.insert(0, "")
         csv_string_builder.append_line(line)
 
-      csv_string_builder.append_line([])
-      csv_string_builder.append_line([])
-
-    return csv_string_builder.get_csv_string()
+      if self.footer:
+        csv_string_builder.append_line([])
+        csv_string_builder.append_line([])
 
   def _get_exportable_queries(self):
     """Get a list of filtered object queries regarding exportable items.
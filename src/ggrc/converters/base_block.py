@@ -7,6 +7,7 @@ Each import block should contain data for one Object type. The blocks are
 separated in the csv file with empty lines.
 """
 
+import re
 from logging import getLogger
 from collections import defaultdict
 from collections import OrderedDict
@@ -14,25 +15,35 @@ from collections import Counter
 
 from cached_property import cached_property
 import sqlalchemy as sa
+from sqlalchemy import exc
+from sqlalchemy import orm
 from sqlalchemy import or_
 from sqlalchemy import and_
 from flask import _app_ctx_stack
 
 from ggrc import db
 from ggrc import models
+from ggrc import settings
+from ggrc.models import cache
 from ggrc.models import reflection
 from ggrc.rbac import permissions
 from ggrc.utils import benchmark
 from ggrc.utils import structures
 from ggrc.utils import list_chunks
 from ggrc.converters import errors
+from ggrc.converters import get_exportables
 from ggrc.converters import get_shared_unique_rules
 from ggrc.converters import base_row
 from ggrc.converters.import_helper import get_column_order
 from ggrc.converters.import_helper import get_object_column_definitions
+from ggrc.converters.handlers import handlers
 from ggrc.models.mixins import issue_tracker as issue_tracker_mixins
 from ggrc.models.exceptions import ReservedNameError
 from ggrc.services import signals
+from ggrc.services.common import get_modified_objects
+from ggrc.services.common import update_snapshot_index
+from ggrc.cache import utils as cache_utils
+from ggrc.utils.log_event import log_event
 from ggrc_workflows.models.cycle_task_group_object_task import \
     CycleTaskGroupObjectTask
 
@@ -40,6 +51,18 @@ from ggrc_workflows.models.cycle_task_group_object_task import \
 logger = getLogger(__name__)
 
 
+def _split_single(cell):
+  return [cell]
+
+
+def _split_lines(cell):
+  return cell.splitlines()
+
+
+def _split_emails(cell):
+  return re.split("[, ;\n]+", cell)
+
+
 class BlockConverter(object):
   # pylint: disable=too-many-public-methods
   # pylint: disable=too-many-instance-attributes
@@ -83,6 +106,7 @@ class BlockConverter(object):
     self._ticket_tracker_cache = None
     self._owners_cache = None
     self._ca_definitions_cache = None
+    self._objects_cache = None
     self.converter = converter
     self.offset = offset
     self.object_class = object_class
@@ -144,6 +168,42 @@ class BlockConverter(object):
       self._ca_definitions_cache = self._create_ca_definitions_cache()
     return self._ca_definitions_cache
 
+  def _create_objects_cache(self):
+    """Create cache of objects referenced by cells of the block.
+
+    Returns:
+      dict mapping (model, key) to a dict of lower case key values and the
+      objects they match or None.
+    """
+    # pylint: disable=no-self-use
+    return {}
+
+  def get_objects_cache(self):
+    """Return objects cache attribute."""
+    if self._objects_cache is None:
+      self._objects_cache = self._create_objects_cache()
+    return self._objects_cache
+
+  def find_object(self, model, key, value, find=None):
+    """Find object by its key value, using the objects cache if possible.
+
+    Args:
+      model: model of the object.
+      key: name of the unique key attribute, like slug or email.
+      value: value of the key.
+      find: function finding an object by the value if it is not cached,
+        query by the key by default.
+
+    Returns:
+      found object or None.
+    """
+    values = self.get_objects_cache().get((model, key), {})
+    if isinstance(value, basestring) and value.lower() in values:
+      return values[value.lower()]
+    if find is not None:
+      return find(value)
+    return model.query.filter_by(**{key: value}).first()
+
   def _get_relationships(self):
     """Get all relationships for any of the object in the current block."""
     relationship = models.Relationship
@@ -401,14 +461,84 @@ class ImportBlockConverter(BlockConverter):
                       line=self.offset + 2,
                       s="")
 
+  def _get_lookup_target(self, attr_name, header):
+    """Get objects referenced by a column and a parser of its cells.
+
+    Returns:
+      tuple of model, key attribute name and a function splitting a cell
+      into key values, or None for columns that are not looked up by keys.
+    """
+    handler = header["handler"]
+    is_key = attr_name in ("slug", "email")
+    if is_key and hasattr(self.object_class, attr_name):
+      return self.object_class, attr_name, _split_single
+    if issubclass(handler, handlers.MappingColumnHandler):
+      model = get_exportables().get(header.get("attr_name", ""))
+      if hasattr(model, "slug"):
+        return model, "slug", _split_lines
+    if issubclass(handler, handlers.ParentColumnHandler) and handler.parent:
+      return handler.parent, "slug", _split_single
+    if issubclass(handler, handlers.UserColumnHandler) and \
+       not settings.INTEGRATION_SERVICE_URL:
+      # with the integration service people are verified one by one
+      return models.Person, "email", _split_emails
+    return None
+
+  def _collect_lookup_values(self):
+    """Collect key values referenced by all rows for every target model."""
+    from ggrc.utils import user_generator
+    lookup_values = defaultdict(set)
+    for idx, (attr_name, header) in enumerate(self.headers.iteritems()):
+      target = self._get_lookup_target(attr_name, header)
+      if target is None:
+        continue
+      model, key, split = target
+      for row in self.rows:
+        if idx >= len(row):
+          continue
+        for value in split(row[idx]):
+          value = value.strip().lower()
+          if not value:
+            continue
+          if model is models.Person and \
+             user_generator.is_external_app_user_email(value):
+            continue
+          lookup_values[(model, key)].add(value)
+    return lookup_values
+
+  def _create_objects_cache(self):
+    """Find objects referenced by cells of all rows with bulk queries.
+
+    Column handlers and row converters look up slugs of the block objects,
+    mapped and parent objects and people emails in this cache instead of
+    running a query per cell. Values that match no object are cached as
+    None.
+    """
+    cache = {}
+    with benchmark("Create objects cache for import block"):
+      lookup_values = self._collect_lookup_values()
+      for (model, key), values in lookup_values.iteritems():
+        column = getattr(model, key)
+        found = {}
+        for chunk in list_chunks(list(values)):
+          for obj in model.query.filter(column.in_(chunk)):
+            found[getattr(obj, key).lower()] = obj
+        cache[(model, key)] = {value: found.get(value) for value in values}
+    return cache
+
+  def _make_row_converter(self, index):
+    """Make a row converter for the csv row with the given index."""
+    return base_row.ImportRowConverter(self, self.object_class,
+                                       row=self.rows[index],
+                                       headers=self.headers,
+                                       line=self.csv_lines[index])
+
   def row_converters_from_csv(self):
     """ Generate a row converter object for every csv row """
     if self.ignore:
       return
-    for i, row in enumerate(self.rows):
-      line = self.csv_lines[i]
-      yield base_row.ImportRowConverter(self, self.object_class, row=row,
-                                        headers=self.headers, line=line)
+    for i in xrange(len(self.rows)):
+      yield self._make_row_converter(i)
 
   @property
   def handle_fields(self):
@@ -424,21 +554,19 @@ class ImportBlockConverter(BlockConverter):
     ]
 
   def import_csv_data(self):
-    """Perform import sequence for the block."""
+    """Perform import sequence for the block.
+
+    Rows are committed one by one unless IMPORT_BATCH_SIZE is greater than
+    one, see _import_batches.
+    """
+    batch_size = settings.IMPORT_BATCH_SIZE
     try:
-      for row in self.row_converters_from_csv():
-        try:
-          row.process_row()
-        except ReservedNameError:
-          db.session.rollback()
-          row.add_error(errors.DUPLICATE_CAD_NAME)
-          logger.exception(errors.DUPLICATE_CAD_NAME)
-        except Exception:  # pylint: disable=broad-except
-          db.session.rollback()
-          row.add_error(errors.UNKNOWN_ERROR)
-          logger.exception("Unexpected error on import")
-        self._update_info(row)
-        _app_ctx_stack.top.sqlalchemy_queries = []
+      if batch_size > 1 and not self.converter.dry_run and not self.ignore:
+        self._import_batches(batch_size)
+      else:
+        for row in self.row_converters_from_csv():
+          self._process_row(row)
+          self._update_info(row)
     except Exception:  # pylint: disable=broad-except
       logger.exception("Unexpected error on import")
     finally:
@@ -447,6 +575,116 @@ class ImportBlockConverter(BlockConverter):
       if is_final_commit_required:
         db.session.commit()
 
+  @staticmethod
+  def _process_row(row, commit=True):
+    """Process a single row and handle its unexpected failures."""
+    try:
+      row.process_row(commit=commit)
+    except ReservedNameError:
+      db.session.rollback()
+      row.add_error(errors.DUPLICATE_CAD_NAME)
+      logger.exception(errors.DUPLICATE_CAD_NAME)
+    except Exception:  # pylint: disable=broad-except
+      db.session.rollback()
+      row.add_error(errors.UNKNOWN_ERROR)
+      logger.exception("Unexpected error on import")
+    _app_ctx_stack.top.sqlalchemy_queries = []
+
+  def _import_batches(self, batch_size):
+    """Import rows committing batch_size rows at a time.
+
+    Rows of a batch are flushed one by one and committed together with a
+    single revision event, memcache and snapshot index update. Rows are
+    validated by the dry run of the import beforehand, so a batch with a
+    failed row is exceptional. Such a batch is rolled back and imported
+    again row by row, which reports errors of the failed rows and commits
+    the other ones.
+    """
+    for indexes in list_chunks(range(len(self.rows)), batch_size):
+      state = self._get_batch_state()
+      rows = [self._make_row_converter(i) for i in indexes]
+      for row in rows:
+        self._process_row(row, commit=False)
+      if any(row.ignore for row in rows) or not self.commit_rows(rows):
+        db.session.rollback()
+        self._restore_batch_state(state)
+        rows = [self._make_row_converter(i) for i in indexes]
+        for row in rows:
+          self._process_row(row)
+      for row in rows:
+        self._update_info(row)
+
+  def _get_batch_state(self):
+    """Get block and converter state that processing of a batch changes."""
+    return {
+        "row_errors": len(self.row_errors),
+        "row_warnings": len(self.row_warnings),
+        "block_errors": len(self.block_errors),
+        "block_warnings": len(self.block_warnings),
+        "unique_values": {
+            key: structures.CaseInsensitiveDict(values)
+            for key, values in self.unique_values.iteritems()
+        },
+        "new_objects": {
+            model: structures.CaseInsensitiveDict(objects)
+            for model, objects in self.converter.new_objects.iteritems()
+        },
+    }
+
+  def _restore_batch_state(self, state):
+    """Forget messages and new objects of a rolled back batch."""
+    del self.row_errors[state["row_errors"]:]
+    del self.row_warnings[state["row_warnings"]:]
+    del self.block_errors[state["block_errors"]:]
+    del self.block_warnings[state["block_warnings"]:]
+    # both dicts can be shared with other blocks and must be kept in place
+    self.unique_values.clear()
+    self.unique_values.update(state["unique_values"])
+    self.converter.new_objects.clear()
+    self.converter.new_objects.update(state["new_objects"])
+
+  def commit_rows(self, rows):
+    """Commit processed rows with a single revision event.
+
+    Returns:
+      False if changes of the rows could not be committed and were rolled
+      back, True otherwise.
+    """
+    rows = [row for row in rows if not row.ignore]
+    if not rows:
+      return True
+    committed = False
+    try:
+      for row in rows:
+        if not row.is_new:
+          cache.Cache.add_to_cache(row.obj)
+      modified_objects = get_modified_objects(db.session)
+      import_event = log_event(db.session, None, bulk=True)
+      cache_utils.update_memcache_before_commit(
+          self,
+          modified_objects,
+          self.CACHE_EXPIRY_IMPORT,
+      )
+      for row in rows:
+        row.prepare_commit(import_event)
+      db.session.commit_hooks_enable_flag.disable()
+      db.session.commit()
+      committed = True
+      self.store_revision_ids(import_event)
+      cache_utils.update_memcache_after_commit(self)
+      update_snapshot_index(modified_objects)
+    except exc.SQLAlchemyError as err:
+      db.session.rollback()
+      logger.exception("Import failed with: %s", err.message)
+      if not committed:
+        return False
+      for row in rows:
+        row.add_error(errors.UNKNOWN_ERROR)
+      return True
+    for row in rows:
+      row.send_post_commit_signals(event=import_event)
+    return True
+
   def get_unique_values_dict(self, object_class):
     """Get the varible to storing row numbers for unique values.
 
@@ -463,7 +701,7 @@ class ImportBlockConverter(BlockConverter):
   def store_revision_ids(self, event):
     """Store revision ids from the current event."""
     if event:
-      self.revision_ids.extend(revision.id for revision in event.revisions)
+      self.revision_ids.extend(event.revision_ids)
 
   @staticmethod
   def send_collection_post_signals(new_objects):
@@ -528,6 +766,24 @@ class ExportBlockConverter(BlockConverter):
 
   ROW_CHUNK_SIZE = 50
 
+  # Relationships loaded by eager queries that export reads only for
+  # columns with these key prefixes. Other exports do not load them.
+  EXPORT_RELATIONSHIP_PREFIXES = {
+      "_access_control_list": (
+          reflection.AttributeInfo.ALIASES_PREFIX,
+      ),
+      "_custom_attribute_values": (
+          reflection.AttributeInfo.CUSTOM_ATTR_PREFIX,
+          reflection.AttributeInfo.OBJECT_CUSTOM_ATTR_PREFIX,
+      ),
+      "custom_attribute_definitions": (
+          reflection.AttributeInfo.CUSTOM_ATTR_PREFIX,
+          reflection.AttributeInfo.OBJECT_CUSTOM_ATTR_PREFIX,
+      ),
+      # the comments column is import only
+      "comments": (),
+  }
+
   def __init__(self, converter, object_class, object_ids, fields, class_name):
     # pylint: disable=too-many-arguments
     super(ExportBlockConverter, self).__init__(
@@ -561,6 +817,37 @@ class ExportBlockConverter(BlockConverter):
       headers.append([description, display_name])
     return [list(header) for header in zip(*headers)]
 
+  @cached_property
+  def export_headers(self):
+    """Headers of exported fields, the only ones rows need handlers for."""
+    return OrderedDict(
+        (field, self.headers[field])
+        for field in self.fields
+        if field in self.headers
+    )
+
+  def _get_unused_relationships(self):
+    """Get relationships eagerly loaded but not used by exported fields."""
+    relationships = sa.inspect(self.object_class).relationships.keys()
+    unused = []
+    for key, prefixes in self.EXPORT_RELATIONSHIP_PREFIXES.items():
+      if key not in relationships:
+        continue
+      if not any(field.startswith(prefix)
+                 for field in self.fields for prefix in prefixes):
+        unused.append(key)
+    return unused
+
+  def _get_export_query(self):
+    """Get query of exported objects loading what exported fields use.
+
+    Relationships the fields need are loaded once per chunk of objects by
+    the eager query, the unused ones are not loaded at all.
+    """
+    return self.object_class.eager_query().options(*[
+        orm.lazyload(key) for key in self._get_unused_relationships()
+    ])
+
   def row_converters_from_ids(self):
     """ Generate a row converter object for every csv row """
     if self.ignore or not self.object_ids:
@@ -572,13 +859,13 @@ class ExportBlockConverter(BlockConverter):
       # This line clears query cache.
       _app_ctx_stack.top.sqlalchemy_queries = []
 
-      objects = self.object_class.eager_query().filter(
+      objects = self._get_export_query().filter(
           self.object_class.id.in_(ids_pool)
       ).execution_options(stream_results=True)
 
       for obj in objects:
         yield base_row.ExportRowConverter(self, self.object_class, obj=obj,
-                                          headers=self.headers)
+                                          headers=self.export_headers)
 
       # Clear all objects from session (it helps to avoid memory leak)
       for obj in db.session:
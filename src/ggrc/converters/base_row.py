@@ -17,7 +17,6 @@ from ggrc.converters import get_importables
 from ggrc.converters import pre_commit_checks
 from ggrc.login import get_current_user_id
 from ggrc.models import all_models
-from ggrc.models import cache
 from ggrc.models.exceptions import StatusValidationError
 from ggrc.models.mixins import issue_tracker
 from ggrc.rbac import permissions
@@ -26,9 +25,6 @@ from ggrc.snapshotter import create_snapshots
 from ggrc.utils import dump_attrs
 
 from ggrc.models.reflection import AttributeInfo
-from ggrc.services.common import get_modified_objects
-from ggrc.services.common import update_snapshot_index
-from ggrc.cache import utils as cache_utils
 from ggrc.utils.log_event import log_event
 
 logger = getLogger(__name__)
@@ -169,7 +165,7 @@ class ImportRowConverter(RowConverter):
                      column_names=", ".join(missing))
 
   def find_by_key(self, key, value):
-    return self.object_class.query.filter_by(**{key: value}).first()
+    return self.block_converter.find_object(self.object_class, key, value)
 
   def get_value(self, key):
     """Get the value for the row object key."""
@@ -246,8 +242,13 @@ class ImportRowConverter(RowConverter):
       logger.exception("Import failed with: %s", err.message)
       self.add_error(errors.UNKNOWN_ERROR)
 
-  def process_row(self):
-    """Parse, set, validate and commit data specified in self.row."""
+  def process_row(self, commit=True):
+    """Parse, set, validate and commit data specified in self.row.
+
+    Args:
+      commit: commit the row right away. Rows imported in batches are flushed
+        only and committed together by the block converter.
+    """
     self._handle_raw_data()
     self._check_mandatory_fields()
     if self.ignore:
@@ -265,7 +266,8 @@ class ImportRowConverter(RowConverter):
       return
     self.flush_object()
     self.setup_secondary_objects()
-    self.commit_object()
+    if commit:
+      self.commit_object()
 
   def _check_object(self):
     """Check object if it has any pre commit checks.
@@ -327,35 +329,18 @@ class ImportRowConverter(RowConverter):
     """
     if self.block_converter.converter.dry_run or self.ignore:
       return
+    if not self.block_converter.commit_rows([self]):
+      self.add_error(errors.UNKNOWN_ERROR)
+
+  def prepare_commit(self, import_event):
+    """Send before commit signals of the row and handle validation errors."""
     try:
-      if not self.is_new:
-        cache.Cache.add_to_cache(self.obj)
-      modified_objects = get_modified_objects(db.session)
-      import_event = log_event(db.session, None)
-      cache_utils.update_memcache_before_commit(
-          self.block_converter,
-          modified_objects,
-          self.block_converter.CACHE_EXPIRY_IMPORT,
-      )
-      try:
-        self.send_before_commit_signals(import_event)
-      except StatusValidationError as exp:
-        status_alias = self.headers.get("status", {}).get("display_name")
-        self.add_error(errors.VALIDATION_ERROR,
-                       column_name=status_alias,
-                       message=exp.message)
-      db.session.commit_hooks_enable_flag.disable()
-      db.session.commit()
-      self.block_converter.store_revision_ids(import_event)
-      cache_utils.update_memcache_after_commit(self.block_converter)
-      update_snapshot_index(modified_objects)
-    except exc.SQLAlchemyError as err:
-      db.session.rollback()
-      logger.exception("Import failed with: %s", err.message)
-      self.block_converter.add_errors(errors.UNKNOWN_ERROR,
-                                      line=self.offset + 2)
-    else:
-      self.send_post_commit_signals(event=import_event)
+      self.send_before_commit_signals(import_event)
+    except StatusValidationError as exp:
+      status_alias = self.headers.get("status", {}).get("display_name")
+      self.add_error(errors.VALIDATION_ERROR,
+                     column_name=status_alias,
+                     message=exp.message)
 
   def _setup_object(self):
     """ Set the object values or relate object values
@@ -246,8 +246,10 @@ class UserColumnHandler(ColumnHandler):
     from ggrc.utils import user_generator
     new_objects = self.row_converter.block_converter.converter.new_objects
     if email not in new_objects[all_models.Person]:
+      block_converter = self.row_converter.block_converter
       try:
-        new_objects[all_models.Person][email] = user_generator.find_user(email)
+        new_objects[all_models.Person][email] = block_converter.find_object(
+            all_models.Person, "email", email, find=user_generator.find_user)
       except ValueError as ex:
         self.add_error(
             errors.VALIDATION_ERROR,
@@ -506,7 +508,8 @@ class MappingColumnHandler(ColumnHandler):
     objects = []
 
     for slug in slugs:
-      obj = class_.query.filter_by(slug=slug).first()
+      obj = self.row_converter.block_converter.find_object(class_, "slug",
+                                                           slug)
 
       if obj:
         is_allowed_by_type = self._is_allowed_mapping_by_type(
@@ -685,7 +688,8 @@ class ParentColumnHandler(ColumnHandler):
     slug = self.raw_value
     obj = self.new_objects.get(self.parent, {}).get(slug)
     if obj is None:
-      obj = self.parent.query.filter(self.parent.slug == slug).first()
+      obj = self.row_converter.block_converter.find_object(self.parent,
+                                                           "slug", slug)
     if obj is None:
       self.add_error(
           errors.UNKNOWN_OBJECT,
@@ -248,15 +248,17 @@ def calculate_computed_attributes(revision_ids, user_id):
       )
 
 
-class CsvStringBuilder(object):
-  """CSV string builder."""
+class CsvWriter(object):
+  """CSV writer of lines of equal width.
 
-  def __init__(self, table_width):
+  Lines are written to the output right away, so the output can be any
+  object with a write method, such as a file or a chunked content sink.
+  """
+
+  def __init__(self, table_width, output):
     """Basic initialization."""
     self.table_width = table_width
-
-    self.output_buffer = StringIO()
-    self.csv_writer = csv.writer(self.output_buffer)
+    self.csv_writer = csv.writer(output)
 
   @staticmethod
   def _utf_8_encode_line(line):
@@ -275,6 +277,15 @@ class CsvStringBuilder(object):
     line.extend([""] * diff)
     self.csv_writer.writerow(line)
 
+
+class CsvStringBuilder(CsvWriter):
+  """CSV string builder."""
+
+  def __init__(self, table_width):
+    """Basic initialization."""
+    self.output_buffer = StringIO()
+    super(CsvStringBuilder, self).__init__(table_width, self.output_buffer)
+
   def get_csv_string(self):
     """Returns CSV string from buffer."""
     return self.output_buffer.getvalue()
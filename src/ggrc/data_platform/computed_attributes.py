@@ -637,7 +637,7 @@ def compute_attributes(revision_ids):
     objects: array of object stubs of modified objects.
   """
 
-  with benchmark("Compute attributes"):
+  with benchmark("Compute attributes", metric_name="compute_attributes"):
 
     if revision_ids == "all_latest":
       with benchmark("Get all latest revisions ids"):
@@ -24,6 +24,7 @@ from ggrc import utils
 from ggrc.notifications import common
 from ggrc.notifications.data_handlers import get_object_url
 from ggrc.utils import benchmark
+from ggrc.utils import latest_revisions
 
 logger = logging.getLogger(__name__)
 
@@ -408,6 +409,7 @@ class IssueTrackerBulkCreator(object):
             "event_id": event_id,
             "action": action,
             "content": obj.log_json(),
+            "content_version": all_models.Revision.CONTENT_VERSION,
             "resource_slug": None,
             "source_type": None,
             "source_id": None,
@@ -422,6 +424,10 @@ class IssueTrackerBulkCreator(object):
     ]
     inserter = all_models.Revision.__table__.insert()
     db.session.execute(inserter.values(revision_data))
+    latest_revisions.refresh(
+        (data["resource_type"], data["resource_id"])
+        for data in revision_data
+    )
 
   @staticmethod
   def make_response(errors):
@@ -20,6 +20,7 @@ from ggrc.models.relationship import Relationship
 from ggrc.models.revision import Revision
 from ggrc.models.snapshot import Snapshot
 from ggrc.migrations.utils.migrator import get_migration_user_id
+from ggrc.utils import latest_revisions
 
 
 relationships_table = Relationship.__table__  # pylint: disable=invalid-name
@@ -191,6 +192,24 @@ def _check_modified_by_id_column_exists(connection):
   return True if result.scalar() else False
 
 
+def latest_revisions_exist(connection):
+  """Return True if table latest_revisions exists.
+
+  Migrations older than the table create revisions without pointers, the
+  backfill task points resources to them later.
+  """
+  schema_name = inspect(connection).default_schema_name
+
+  sql = """
+          SELECT 1 FROM information_schema.tables
+          WHERE table_name = 'latest_revisions' AND
+                table_schema = :current_schema
+  """
+
+  result = connection.execute(text(sql), current_schema=schema_name)
+  return True if result.scalar() else False
+
+
 # pylint: disable=invalid-name
 def add_to_objects_without_revisions(connection, obj_id,
                                      obj_type, action='created',
@@ -296,3 +315,8 @@ def create_revision(connection, slug, doc_id, content, event_id,
       modified_by_id=migrator_id,
       resource_slug=slug
   )
+  if latest_revisions_exist(connection):
+    latest_revisions.upsert(
+        [(resource_type, doc_id, last_insert_id(connection))],
+        connection=connection,
+    )
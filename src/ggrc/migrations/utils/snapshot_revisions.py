@@ -16,7 +16,9 @@ from sqlalchemy.sql import text
 
 from alembic import op
 
+from ggrc.migrations import utils
 from ggrc.models import all_models
+from ggrc.utils import latest_revisions
 
 
 DIRECTIVES = {
@@ -215,6 +217,9 @@ def _insert_missing_objects(objects):
           )),
       )
 
+  if utils.latest_revisions_exist(connection):
+    latest_revisions.refresh_event(connection, event_id)
+
 
 def _create_bulk_event():
   """Create a dummy event to map the missing revisions to.
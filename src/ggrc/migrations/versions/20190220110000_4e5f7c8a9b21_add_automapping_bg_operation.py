@@ -0,0 +1,47 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add automapping bg operation type and progress of bg operations
+
+Create Date: 2019-02-20 11:00:00.000000
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+from ggrc.migrations.utils import migrator
+
+revision = '4e5f7c8a9b21'
+down_revision = '57b14cb4a7b4'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.add_column(
+      "background_operations",
+      sa.Column("processed_count", sa.Integer(), nullable=True),
+  )
+  op.add_column(
+      "background_operations",
+      sa.Column("total_count", sa.Integer(), nullable=True),
+  )
+  connection = op.get_bind()
+  migrator_id = migrator.get_migration_user_id(connection)
+  connection.execute(
+      sa.text("""
+          INSERT INTO background_operation_types(
+            `name`, modified_by_id, created_at, updated_at
+          )
+          VALUES('automapping', :migrator_id, now(), now());
+      """),
+      migrator_id=migrator_id,
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  raise Exception("Downgrade is not supported.")
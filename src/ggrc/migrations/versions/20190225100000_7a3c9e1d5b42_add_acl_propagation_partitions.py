@@ -0,0 +1,51 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add acl propagation partitions table
+
+Create Date: 2019-02-25 10:00:00.000000
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '7a3c9e1d5b42'
+down_revision = '4e5f7c8a9b21'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'acl_propagation_partitions',
+      sa.Column('id', sa.Integer(), nullable=False),
+      sa.Column('job_id', sa.String(length=250), nullable=False),
+      sa.Column('object_type', sa.String(length=250), nullable=False),
+      sa.Column('min_id', sa.Integer(), nullable=False),
+      sa.Column('max_id', sa.Integer(), nullable=False),
+      sa.Column('acl_count', sa.Integer(), nullable=False),
+      sa.Column('propagated_count', sa.Integer(), nullable=False),
+      sa.Column('last_acl_id', sa.Integer(), nullable=True),
+      sa.Column('status', sa.String(length=250), nullable=False),
+      sa.Column('started_at', sa.DateTime(), nullable=True),
+      sa.Column('finished_at', sa.DateTime(), nullable=True),
+      sa.Column('created_at', sa.DateTime(), nullable=False),
+      sa.Column('updated_at', sa.DateTime(), nullable=False),
+      sa.Column('modified_by_id', sa.Integer(), nullable=True),
+      sa.PrimaryKeyConstraint('id')
+  )
+  op.create_index('ix_acl_propagation_partitions_job_status',
+                  'acl_propagation_partitions', ['job_id', 'status'],
+                  unique=False)
+  op.create_index('ix_acl_propagation_partitions_updated_at',
+                  'acl_propagation_partitions', ['updated_at'],
+                  unique=False)
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('acl_propagation_partitions')
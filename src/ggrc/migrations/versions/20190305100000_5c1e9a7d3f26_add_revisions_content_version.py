@@ -0,0 +1,34 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add content version to revisions
+
+Create Date: 2019-03-05 10:00:00.000000
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '5c1e9a7d3f26'
+down_revision = '2d8b6f1c4a93'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  # Existing revisions get version 0 and are rewritten in the current format
+  # by the upgrade revisions content admin task.
+  op.add_column(
+      'revisions',
+      sa.Column('content_version', sa.Integer(), nullable=False,
+                server_default='0'),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_column('revisions', 'content_version')
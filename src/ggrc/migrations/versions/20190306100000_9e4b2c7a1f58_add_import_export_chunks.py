@@ -0,0 +1,38 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add import export chunks table
+
+Create Date: 2019-03-06 10:00:00.000000
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '9e4b2c7a1f58'
+down_revision = '5c1e9a7d3f26'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'import_export_chunks',
+      sa.Column('import_export_id', sa.Integer(), nullable=False),
+      sa.Column('position', sa.Integer(), autoincrement=False,
+                nullable=False),
+      sa.Column('content', mysql.LONGBLOB(), nullable=False),
+      sa.ForeignKeyConstraint(['import_export_id'], ['import_exports.id'],
+                              ondelete='CASCADE'),
+      sa.PrimaryKeyConstraint('import_export_id', 'position')
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('import_export_chunks')
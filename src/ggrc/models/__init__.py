@@ -99,10 +99,16 @@ def init_sanitization_hooks():
       sa.event.listen(attr, 'set', html_cleaner.cleaner, retval=True)
 
 
+def init_log_json_cache():
+  from ggrc.models import log_json_cache
+  log_json_cache.init(all_models.all_models)
+
+
 def init_app(app):
   init_all_models(app)
   init_lazy_mixins()
   init_session_monitor_cache()
   init_sanitization_hooks()
+  init_log_json_cache()
 
 from ggrc.models.inflector import get_model  # noqa
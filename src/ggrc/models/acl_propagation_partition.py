@@ -0,0 +1,40 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Module for ACL propagation partition model."""
+
+from ggrc import db
+from ggrc.models.mixins import Base
+
+
+class AclPropagationPartition(Base, db.Model):
+  """Checkpoint of a part of the full ACL propagation job.
+
+  A partition covers non propagated ACL entries of one object type within an
+  id range. last_acl_id is the last entry whose propagation was committed, so
+  an interrupted partition continues after it.
+  """
+  __tablename__ = "acl_propagation_partitions"
+
+  PENDING_STATUS = "Pending"
+  RUNNING_STATUS = "Running"
+  DONE_STATUS = "Done"
+  FAILURE_STATUS = "Failure"
+
+  job_id = db.Column(db.String, nullable=False)
+  object_type = db.Column(db.String, nullable=False)
+  min_id = db.Column(db.Integer, nullable=False)
+  max_id = db.Column(db.Integer, nullable=False)
+  acl_count = db.Column(db.Integer, nullable=False)
+  propagated_count = db.Column(db.Integer, nullable=False, default=0)
+  last_acl_id = db.Column(db.Integer)
+  status = db.Column(db.String, nullable=False, default=PENDING_STATUS)
+  started_at = db.Column(db.DateTime)
+  finished_at = db.Column(db.DateTime)
+
+  @staticmethod
+  def _extra_table_args(_):
+    return (
+        db.Index("ix_acl_propagation_partitions_job_status",
+                 "job_id", "status"),
+    )
@@ -18,5 +18,12 @@ class BackgroundOperation(mixins.Base, db.Model):
   object_type = db.Column(db.String, nullable=False)
   object_id = db.Column(db.Integer, nullable=False)
   bg_task_id = db.Column(db.Integer, db.ForeignKey('background_tasks.id'))
+  processed_count = db.Column(db.Integer, nullable=True)
+  total_count = db.Column(db.Integer, nullable=True)
 
   bg_operation_type = db.relationship("BackgroundOperationType")
+
+  def set_progress(self, processed_count, total_count):
+    """Set number of processed items of the operation."""
+    self.processed_count = processed_count
+    self.total_count = total_count
@@ -4,6 +4,7 @@
 """Module for ggrc background tasks."""
 
 import json
+import time
 import traceback
 import uuid
 from email.utils import parseaddr
@@ -24,7 +25,7 @@ from ggrc.models.deferred import deferred
 from ggrc.models.mixins import Stateful
 from ggrc.models.types import CompressedType
 from ggrc.models import reflection
-from ggrc.utils import benchmark
+from ggrc.utils import benchmark, metrics
 
 
 logger = getLogger(__name__)
@@ -327,18 +328,23 @@ def queued_task(func):
                                 503,
                                 [('Content-Type', 'text/html')]))
     task.start()
+    start = time.time()
     try:
       result = func(task)
     except:  # pylint: disable=bare-except
       # Bare except is allowed here so that we can respond with the correct
       # message to all exceptions.
       logger.exception("Task failed")
+      metrics.BACKGROUND_TASK_DURATION.observe(
+          time.time() - start, task=func.__name__, status="Failure")
       task.finish("Failure", app.make_response((
           traceback.format_exc(), 200, [('Content-Type', 'text/html')])))
 
       # Return 200 so that the task is not retried
       return app.make_response((
           'failure', 200, [('Content-Type', 'text/html')]))
+    metrics.BACKGROUND_TASK_DURATION.observe(
+        time.time() - start, task=func.__name__, status="Success")
     task.finish("Success", result)
     return result
   return decorated_view
@@ -24,6 +24,10 @@ class Event(Base, db.Model):
       cascade='all, delete-orphan',
   )
 
+  # Ids of revisions written by log_event in bulk mode. They are inserted
+  # without ORM instances and never show up in the revisions relationship.
+  bulk_revision_ids = ()
+
   _api_attrs = reflection.ApiAttributes(
       'action',
       'resource_id',
@@ -41,6 +45,12 @@ class Event(Base, db.Model):
         db.Index('events_modified_by', 'modified_by_id'),
     )
 
+  @property
+  def revision_ids(self):
+    """Ids of all revisions logged with this event."""
+    return ([revision.id for revision in self.revisions] +
+            list(self.bulk_revision_ids))
+
   @classmethod
   def eager_query(cls):
     query = super(Event, cls).eager_query()
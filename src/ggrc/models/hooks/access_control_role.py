@@ -97,6 +97,13 @@ def handle_role_acls(role):
       db.session.commit()
 
 
+def _invalidate_propagation_plan():
+  """Make ACL propagation use the changed role tree."""
+  # acl hooks import this module, so import the plan on use
+  from ggrc.models.hooks.acl import propagation_plan
+  propagation_plan.invalidate()
+
+
 def init_hook():
   """Initialize all hooks"""
 
@@ -108,3 +115,19 @@ def init_hook():
     # pylint: disable=unused-argument
     # Arguments here have to be listed for the hooks to work.
     handle_role_acls(obj)
+    _invalidate_propagation_plan()
+
+  @signals.Restful.model_put_after_commit.connect_via(
+      all_models.AccessControlRole)
+  def handle_role_put(sender, obj=None, src=None, service=None, event=None,
+                      initial_state=None):
+    """Recompile the propagation plan after a role change."""
+    # pylint: disable=unused-argument
+    _invalidate_propagation_plan()
+
+  @signals.Restful.model_deleted_after_commit.connect_via(
+      all_models.AccessControlRole)
+  def handle_role_deleted(sender, obj=None, service=None, event=None):
+    """Recompile the propagation plan after a role removal."""
+    # pylint: disable=unused-argument
+    _invalidate_propagation_plan()
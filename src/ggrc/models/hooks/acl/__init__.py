@@ -84,7 +84,7 @@ def after_flush(session, _):
 
 def after_commit():
   """ACL propagation after commit action."""
-  with benchmark("General acl propagation"):
+  with benchmark("General acl propagation", metric_name="acl_propagation"):
     propagation.propagate()
 
 
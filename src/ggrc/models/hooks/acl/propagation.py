@@ -20,6 +20,8 @@ from ggrc.utils import helpers
 from ggrc.access_control import utils as acl_utils
 from ggrc.models import all_models
 from ggrc.models.hooks import access_control_role
+from ggrc.models.hooks.acl import propagation_plan
+from ggrc.models.hooks.acl import recursive_propagation
 
 logger = logging.getLogger(__name__)
 
@@ -29,31 +31,16 @@ logger = logging.getLogger(__name__)
 PROPAGATION_DEPTH_LIMIT = 50
 
 
-def _rel_parent(parent_acl_ids=None, relationship_ids=None, source=True,
-                user_id=None):
-  """Get left side of relationships mappings through source."""
+def _rel_parent(plan, parent_acl_ids=None, relationship_ids=None,
+                source=True):
+  """Get object ACL entries to propagate to relationships through source.
+
+  Rows hold the parent role and the object type at the other end of the
+  relationship, which are looked up in plan.relationship_roles to get roles
+  of the propagated entries.
+  """
   rel_table = all_models.Relationship.__table__
   acl_table = all_models.AccessControlList.__table__
-  parent_acr = all_models.AccessControlRole.__table__.alias(
-      "parent_acr_{}".format(source)
-  )
-  child_acr = all_models.AccessControlRole.__table__.alias(
-      "child_acr_{}".format(source)
-  )
-  # The grandchild is only used to check the child part of the relationship. We
-  # might want to check if it would be more efficient to store grandchild info
-  # in the child ACR entry instead of making an extra join on our tables.
-  grandchild_acr = all_models.AccessControlRole.__table__.alias(
-      "grandchild_acr_{}".format(source)
-  )
-  where_conditions = [
-  ]
-  if relationship_ids is not None:
-    where_conditions.append(rel_table.c.id.in_(relationship_ids))
-    if parent_acl_ids:
-      where_conditions.append(~acl_table.c.id.in_(parent_acl_ids))
-  elif parent_acl_ids is not None:
-    where_conditions.append(acl_table.c.id.in_(parent_acl_ids))
 
   if source:
     parent_object_id = rel_table.c.source_id
@@ -64,41 +51,34 @@ def _rel_parent(parent_acl_ids=None, relationship_ids=None, source=True,
     parent_object_type = rel_table.c.destination_type
     grandchild_object_type = rel_table.c.source_type
 
+  where_conditions = [
+      sa.tuple_(
+          acl_table.c.ac_role_id,
+          grandchild_object_type,
+      ).in_(plan.relationship_roles.keys()),
+  ]
+  if relationship_ids is not None:
+    where_conditions.append(rel_table.c.id.in_(relationship_ids))
+    if parent_acl_ids:
+      where_conditions.append(~acl_table.c.id.in_(parent_acl_ids))
+  elif parent_acl_ids is not None:
+    where_conditions.append(acl_table.c.id.in_(parent_acl_ids))
+
   select_statement = sa.select([
-      child_acr.c.id.label("ac_role_id"),
+      acl_table.c.ac_role_id.label("parent_role_id"),
+      grandchild_object_type.label("child_type"),
       rel_table.c.id.label("object_id"),
       sa.literal(all_models.Relationship.__name__).label("object_type"),
-      sa.func.now().label("created_at"),
-      sa.literal(user_id).label("modified_by_id"),
-      sa.func.now().label("updated_at"),
+      sa.func.now().label("now"),
       acl_table.c.id.label("parent_id"),
-      acl_table.c.id.label("parent_id_nn"),
       acl_table.c.base_id.label("base_id"),
   ]).select_from(
       sa.join(
-          sa.join(
-              sa.join(
-                  sa.join(
-                      rel_table,
-                      acl_table,
-                      sa.and_(
-                          acl_table.c.object_id == parent_object_id,
-                          acl_table.c.object_type == parent_object_type,
-                      )
-                  ),
-                  parent_acr,
-                  parent_acr.c.id == acl_table.c.ac_role_id
-              ),
-              child_acr,
-              sa.and_(
-                  child_acr.c.parent_id == parent_acr.c.id,
-                  child_acr.c.object_type == all_models.Relationship.__name__,
-              ),
-          ),
-          grandchild_acr,
+          rel_table,
+          acl_table,
           sa.and_(
-              grandchild_acr.c.parent_id == child_acr.c.id,
-              grandchild_acr.c.object_type == grandchild_object_type,
+              acl_table.c.object_id == parent_object_id,
+              acl_table.c.object_type == parent_object_type,
           )
       )
   ).where(
@@ -107,16 +87,14 @@ def _rel_parent(parent_acl_ids=None, relationship_ids=None, source=True,
   return select_statement
 
 
-def _rel_child(parent_acl_ids, source=True, user_id=None):
-  """Get left side of relationships mappings through source."""
+def _rel_child(plan, parent_acl_ids, source=True):
+  """Get relationship ACL entries to propagate to objects through source.
+
+  Rows hold the relationship role and the type of the object, which are
+  looked up in plan.object_roles to get roles of the propagated entries.
+  """
   rel_table = all_models.Relationship.__table__
   acl_table = all_models.AccessControlList.__table__
-  parent_acr = all_models.AccessControlRole.__table__.alias(
-      "parent_acr_{}".format(source)
-  )
-  child_acr = all_models.AccessControlRole.__table__.alias(
-      "child_acr_{}".format(source)
-  )
 
   if source:
     object_id = rel_table.c.destination_id
@@ -131,38 +109,63 @@ def _rel_child(parent_acl_ids, source=True, user_id=None):
   )
 
   select_statement = sa.select([
-      child_acr.c.id.label("ac_role_id"),
+      acl_table.c.ac_role_id.label("parent_role_id"),
+      object_type.label("child_type"),
       object_id.label("object_id"),
       object_type.label("object_type"),
-      sa.func.now().label("created_at"),
-      sa.literal(user_id).label("modified_by_id"),
-      sa.func.now().label("updated_at"),
+      sa.func.now().label("now"),
       acl_table.c.id.label("parent_id"),
-      acl_table.c.id.label("parent_id_nn"),
       acl_table.c.base_id.label("base_id"),
   ]).select_from(
       sa.join(
-          sa.join(
-              sa.join(
-                  rel_table,
-                  acl_table,
-                  acl_link
-              ),
-              parent_acr,
-              parent_acr.c.id == acl_table.c.ac_role_id
-          ),
-          child_acr,
-          child_acr.c.parent_id == parent_acr.c.id
+          rel_table,
+          acl_table,
+          acl_link
       )
   ).where(
       sa.and_(
           acl_table.c.id.in_(parent_acl_ids),
-          child_acr.c.object_type == object_type,
+          sa.tuple_(
+              acl_table.c.ac_role_id,
+              object_type,
+          ).in_(plan.object_roles.keys()),
       )
   )
   return select_statement
 
 
+def _insert_propagated_acls(select_statement, role_map, user_id):
+  """Insert propagated ACL entries for rows of the select statement.
+
+  Args:
+    select_statement: select from _rel_parent or _rel_child.
+    role_map: plan dict with role ids of propagated entries for the parent
+      role and child type of a row.
+    user_id: id of the user set as modified_by on propagated entries.
+  """
+  rows = db.session.execute(select_statement).fetchall()
+  if not rows:
+    return
+  # TODO: investigate whether the select above sets locks on any tables
+  db.session.plain_commit()
+
+  records = set()
+  for row in rows:
+    for role_id in role_map.get((row.parent_role_id, row.child_type), ()):
+      records.add((
+          role_id,
+          row.object_id,
+          row.object_type,
+          row.now,
+          user_id,
+          row.now,
+          row.parent_id,
+          row.parent_id,
+          row.base_id,
+      ))
+  acl_utils.insert_acl_records(sorted(records), select_statement)
+
+
 def _get_relationship_acl_ids(relationship_ids):
   """Get ACL ids for the given relationship ids.
 
@@ -199,41 +202,47 @@ def _get_child_ids(parent_ids):
   )
 
 
-def _handle_propagation_parents(parent_acl_ids, user_id):
+def _handle_propagation_parents(parent_acl_ids, user_id, plan):
   """Propagate ACL records from parent objects to relationships."""
-  src_select = _rel_parent(parent_acl_ids, source=True, user_id=user_id)
-  dst_select = _rel_parent(parent_acl_ids, source=False, user_id=user_id)
-  select_statement = sa.union(src_select, dst_select)
-  acl_utils.insert_select_acls(select_statement)
+  if not plan.relationship_roles:
+    return
+  src_select = _rel_parent(plan, parent_acl_ids, source=True)
+  dst_select = _rel_parent(plan, parent_acl_ids, source=False)
+  select_statement = sa.union_all(src_select, dst_select)
+  _insert_propagated_acls(select_statement, plan.relationship_roles, user_id)
 
 
-def _handle_propagation_children(new_parent_ids, user_id):
+def _handle_propagation_children(new_parent_ids, user_id, plan):
   """Propagate ACL records from relationships to child objects."""
-  src_select = _rel_child(new_parent_ids, source=True, user_id=user_id)
-  dst_select = _rel_child(new_parent_ids, source=False, user_id=user_id)
-  select_statement = sa.union(src_select, dst_select)
-  acl_utils.insert_select_acls(select_statement)
+  if not plan.object_roles:
+    return
+  src_select = _rel_child(plan, new_parent_ids, source=True)
+  dst_select = _rel_child(plan, new_parent_ids, source=False)
+  select_statement = sa.union_all(src_select, dst_select)
+  _insert_propagated_acls(select_statement, plan.object_roles, user_id)
 
 
-def _handle_propagation_rel(relationship_ids, new_acl_ids, user_id):
+def _handle_propagation_rel(relationship_ids, new_acl_ids, user_id, plan):
   """Handle propagation for relationship object."""
+  if not plan.relationship_roles:
+    return
   src_select = _rel_parent(
+      plan,
       parent_acl_ids=new_acl_ids,
       relationship_ids=relationship_ids,
       source=True,
-      user_id=user_id,
   )
   dst_select = _rel_parent(
+      plan,
       parent_acl_ids=new_acl_ids,
       relationship_ids=relationship_ids,
       source=False,
-      user_id=user_id,
   )
-  select_statement = sa.union(src_select, dst_select)
-  acl_utils.insert_select_acls(select_statement)
+  select_statement = sa.union_all(src_select, dst_select)
+  _insert_propagated_acls(select_statement, plan.relationship_roles, user_id)
 
 
-def _handle_acl_step(parent_acl_ids, user_id):
+def _handle_acl_step(parent_acl_ids, user_id, plan=None):
   """Handle role propagation through relationships.
 
   For handling relationships of type:
@@ -242,20 +251,23 @@ def _handle_acl_step(parent_acl_ids, user_id):
   Relationship. The child part refers to propagation from Relationship to
   Object (either Assessment, Issue, Document, Comment)
   """
+  plan = plan or propagation_plan.get_plan()
 
-  _handle_propagation_parents(parent_acl_ids, user_id)
+  _handle_propagation_parents(parent_acl_ids, user_id, plan)
   new_parent_ids = _get_child_ids(parent_acl_ids)
-  _handle_propagation_children(new_parent_ids, user_id)
+  _handle_propagation_children(new_parent_ids, user_id, plan)
 
   return _get_child_ids(new_parent_ids)
 
 
-def _handle_relationship_step(relationship_ids, new_acl_ids, user_id):
+def _handle_relationship_step(relationship_ids, new_acl_ids, user_id,
+                              plan=None):
   """Propagate first level or ACLs caused by new relationships."""
+  plan = plan or propagation_plan.get_plan()
 
-  _handle_propagation_rel(relationship_ids, new_acl_ids, user_id)
+  _handle_propagation_rel(relationship_ids, new_acl_ids, user_id, plan)
   new_parent_ids = _get_relationship_acl_ids(relationship_ids)
-  _handle_propagation_children(new_parent_ids, user_id)
+  _handle_propagation_children(new_parent_ids, user_id, plan)
 
   return _get_child_ids(new_parent_ids)
 
@@ -263,11 +275,18 @@ def _handle_relationship_step(relationship_ids, new_acl_ids, user_id):
 def _propagate(parent_acl_ids, user_id):
   """Propagate ACL entries through the entire propagation tree."""
 
+  if recursive_propagation.is_supported():
+    recursive_propagation.propagate(parent_acl_ids, user_id,
+                                    PROPAGATION_DEPTH_LIMIT)
+    return
+
+  plan = propagation_plan.get_plan()
+
   # The following for statement is a replacement for `while True` statement
   # with a safety cutoff limit.
   for _ in range(PROPAGATION_DEPTH_LIMIT):
 
-    child_ids = _handle_acl_step(parent_acl_ids, user_id)
+    child_ids = _handle_acl_step(parent_acl_ids, user_id, plan)
 
     count_query = child_ids.alias("counts").count()
     child_id_count = db.session.execute(count_query).scalar()
@@ -403,27 +422,11 @@ def _add_missing_acl_entries():
 
 @helpers.without_sqlalchemy_cache
 def propagate_all():
-  """Re-evaluate propagation for all objects."""
+  """Re-evaluate propagation for all objects.
+
+  Propagates all partitions of a new propagation job in this process, or of
+  the latest job if it was interrupted.
+  """
+  from ggrc.models.hooks.acl import propagation_job
   with utils.benchmark("Run propagate_all"):
-    with utils.benchmark("Add missing acl entries"):
-      _add_missing_acl_entries()
-    with utils.benchmark("Get non propagated acl ids"):
-      query = db.session.query(
-          all_models.AccessControlList.id,
-      ).filter(
-          all_models.AccessControlList.parent_id.is_(None),
-      )
-      all_acl_ids = [acl.id for acl in query]
-
-    with utils.benchmark("Propagate normal acl entries"):
-      count = len(all_acl_ids)
-      propagated_count = 0
-      for acl_ids in utils.list_chunks(all_acl_ids, chunk_size=50):
-        propagated_count += len(acl_ids)
-        logger.info("Propagating ACL entries: %s/%s", propagated_count, count)
-        _delete_propagated_acls(acl_ids)
-
-        flask.g.new_acl_ids = acl_ids
-        flask.g.new_relationship_ids = set()
-        flask.g.deleted_objects = set()
-        propagate()
+    propagation_job.run_partitions(propagation_job.prepare_job())
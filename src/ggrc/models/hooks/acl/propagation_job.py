@@ -0,0 +1,304 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Resumable propagation of all ACL entries.
+
+Non propagated ACL entries are split into partitions by object type and id
+range and every partition is stored in the acl_propagation_partitions table.
+Workers claim pending partitions one by one, so several background tasks can
+propagate the same job in parallel. Progress of a partition is committed
+after every chunk of entries, and an interrupted job continues with the
+entries that were not propagated yet instead of starting from zero.
+"""
+
+import datetime
+import logging
+import uuid
+
+import flask
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc import utils
+from ggrc.models import all_models
+from ggrc.models.hooks.acl import propagation
+from ggrc.utils import helpers
+from ggrc.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Width of the id range of a single partition.
+PARTITION_SIZE = 10000
+
+# Number of ACL entries propagated between two checkpoints.
+CHUNK_SIZE = 50
+
+# Running partitions that were not updated for this long are treated as
+# abandoned by a failed worker and are made pending again on resume.
+STALE_TIMEOUT = datetime.timedelta(minutes=30)
+
+Partition = all_models.AclPropagationPartition
+
+
+def _now():
+  return datetime.datetime.utcnow().replace(microsecond=0)
+
+
+def _update_partition(partition_id, **values):
+  """Update partition columns and commit the checkpoint."""
+  table = Partition.__table__
+  values["updated_at"] = _now()
+  db.session.execute(
+      table.update().where(table.c.id == partition_id).values(**values)
+  )
+  db.session.plain_commit()
+
+
+def _get_latest_job_id():
+  row = db.session.query(
+      Partition.job_id,
+  ).order_by(
+      Partition.id.desc(),
+  ).first()
+  return row.job_id if row else None
+
+
+def _is_finished(job_id):
+  unfinished = Partition.query.filter(
+      Partition.job_id == job_id,
+      Partition.status != Partition.DONE_STATUS,
+  )
+  return not db.session.query(unfinished.exists()).scalar()
+
+
+def create_job():
+  """Split all non propagated ACL entries into partitions of a new job.
+
+  Returns:
+    id of the created job.
+  """
+  # pylint: disable=protected-access
+  with utils.benchmark("Add missing acl entries"):
+    propagation._add_missing_acl_entries()
+
+  acl = all_models.AccessControlList
+  query = db.session.query(
+      acl.object_type,
+      sa.func.min(acl.id),
+      sa.func.max(acl.id),
+      sa.func.count(acl.id),
+  ).filter(
+      acl.parent_id.is_(None),
+  ).group_by(
+      acl.object_type,
+      sa.func.floor(acl.id / PARTITION_SIZE),
+  )
+  job_id = uuid.uuid4().hex
+  now = _now()
+  partitions = [{
+      "job_id": job_id,
+      "object_type": object_type,
+      "min_id": min_id,
+      "max_id": max_id,
+      "acl_count": acl_count,
+      "propagated_count": 0,
+      "status": Partition.PENDING_STATUS,
+      "created_at": now,
+      "updated_at": now,
+  } for object_type, min_id, max_id, acl_count in query]
+  if partitions:
+    db.session.execute(Partition.__table__.insert(), partitions)
+  db.session.commit()
+  logger.info("Created ACL propagation job %s with %s partitions",
+              job_id, len(partitions))
+  return job_id
+
+
+def _reset_partitions(job_id):
+  """Make failed and abandoned partitions of the job pending again."""
+  table = Partition.__table__
+  db.session.execute(
+      table.update().where(
+          sa.and_(
+              table.c.job_id == job_id,
+              sa.or_(
+                  table.c.status == Partition.FAILURE_STATUS,
+                  sa.and_(
+                      table.c.status == Partition.RUNNING_STATUS,
+                      table.c.updated_at < _now() - STALE_TIMEOUT,
+                  ),
+              ),
+          )
+      ).values(
+          status=Partition.PENDING_STATUS,
+          updated_at=_now(),
+      )
+  )
+  db.session.commit()
+
+
+def prepare_job():
+  """Get the job to run, continue the latest job if it is not finished.
+
+  Returns:
+    id of the job whose pending partitions should be propagated.
+  """
+  job_id = _get_latest_job_id()
+  if job_id is None or _is_finished(job_id):
+    return create_job()
+  _reset_partitions(job_id)
+  logger.info("Resuming ACL propagation job %s", job_id)
+  return job_id
+
+
+def _claim_partition(job_id):
+  """Mark the next pending partition of the job as running and return it.
+
+  The status check in the update makes sure that a partition is claimed
+  by a single worker even if several workers selected it.
+  """
+  table = Partition.__table__
+  while True:
+    partition = db.session.execute(
+        sa.select([table.c.id]).where(
+            sa.and_(
+                table.c.job_id == job_id,
+                table.c.status == Partition.PENDING_STATUS,
+            )
+        ).order_by(table.c.id).limit(1)
+    ).first()
+    if partition is None:
+      return None
+    now = _now()
+    result = db.session.execute(
+        table.update().where(
+            sa.and_(
+                table.c.id == partition.id,
+                table.c.status == Partition.PENDING_STATUS,
+            )
+        ).values(
+            status=Partition.RUNNING_STATUS,
+            started_at=sa.func.coalesce(table.c.started_at, now),
+            updated_at=now,
+        )
+    )
+    db.session.plain_commit()
+    if result.rowcount:
+      return db.session.execute(
+          table.select().where(table.c.id == partition.id)
+      ).first()
+
+
+def _propagate_partition(partition):
+  """Propagate ACL entries of the partition after its last checkpoint."""
+  acl = all_models.AccessControlList
+  start_id = partition.min_id
+  if partition.last_acl_id is not None:
+    start_id = partition.last_acl_id + 1
+  acl_ids = [row.id for row in db.session.query(acl.id).filter(
+      acl.parent_id.is_(None),
+      acl.object_type == partition.object_type,
+      acl.id.between(start_id, partition.max_id),
+  ).order_by(acl.id)]
+
+  propagated_count = partition.propagated_count
+  for acl_ids_chunk in utils.list_chunks(acl_ids, chunk_size=CHUNK_SIZE):
+    # pylint: disable=protected-access
+    propagation._delete_propagated_acls(acl_ids_chunk)
+    flask.g.new_acl_ids = acl_ids_chunk
+    flask.g.new_relationship_ids = set()
+    flask.g.deleted_objects = set()
+    propagation.propagate()
+
+    propagated_count += len(acl_ids_chunk)
+    _update_partition(
+        partition.id,
+        last_acl_id=acl_ids_chunk[-1],
+        propagated_count=propagated_count,
+    )
+    metrics.ACL_PROPAGATION_ENTRIES.inc(len(acl_ids_chunk))
+
+  _update_partition(
+      partition.id,
+      status=Partition.DONE_STATUS,
+      finished_at=_now(),
+  )
+
+
+@helpers.without_sqlalchemy_cache
+def run_partitions(job_id):
+  """Propagate pending partitions of the job until none is left.
+
+  Several workers can run this function for the same job in parallel.
+
+  Returns:
+    number of partitions propagated by this worker.
+  """
+  count = 0
+  while True:
+    partition = _claim_partition(job_id)
+    if partition is None:
+      return count
+    logger.info("Propagating ACL entries of %s with ids %s-%s",
+                partition.object_type, partition.min_id, partition.max_id)
+    try:
+      with utils.benchmark("Propagate ACL partition"):
+        _propagate_partition(partition)
+    except Exception:
+      db.session.rollback()
+      _update_partition(partition.id, status=Partition.FAILURE_STATUS)
+      raise
+    count += 1
+
+
+def get_status(job_id=None):
+  """Get progress of the job, the latest job by default.
+
+  Returns:
+    dict with partition counts by status, numbers of total, propagated and
+    remaining ACL entries, throughput in entries per second and an estimate
+    of the remaining time in seconds.
+  """
+  job_id = job_id or _get_latest_job_id()
+  if job_id is None:
+    return {"job_id": None}
+  query = db.session.query(
+      Partition.status,
+      sa.func.count(Partition.id),
+      sa.func.sum(Partition.acl_count),
+      sa.func.sum(Partition.propagated_count),
+      sa.func.min(Partition.started_at),
+      sa.func.max(Partition.updated_at),
+  ).filter(
+      Partition.job_id == job_id,
+  ).group_by(
+      Partition.status,
+  )
+  partitions = {}
+  acl_count = propagated_count = 0
+  started_at = updated_at = None
+  for status, count, status_acl, status_propagated, started, updated in query:
+    partitions[status] = count
+    acl_count += int(status_acl or 0)
+    propagated_count += int(status_propagated or 0)
+    if started and (started_at is None or started < started_at):
+      started_at = started
+    if updated and (updated_at is None or updated > updated_at):
+      updated_at = updated
+
+  throughput = None
+  if started_at and updated_at > started_at:
+    throughput = propagated_count / (updated_at - started_at).total_seconds()
+  remaining_count = acl_count - propagated_count
+  return {
+      "job_id": job_id,
+      "partitions": partitions,
+      "acl_count": acl_count,
+      "propagated_count": propagated_count,
+      "remaining_count": remaining_count,
+      "started_at": started_at.isoformat() if started_at else None,
+      "updated_at": updated_at.isoformat() if updated_at else None,
+      "throughput": throughput,
+      "remaining_seconds": (remaining_count / throughput
+                            if throughput else None),
+  }
@@ -0,0 +1,90 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Compiled propagation plan of the access control role tree.
+
+ACL propagation goes through two steps, from an object role to a role on a
+relationship and from the relationship role to a role on the object at the
+other end of the relationship. Both steps depend only on the role tree, so
+instead of joining access_control_roles three times in every propagation
+query the tree is compiled into two maps keyed by the parent role and the
+object type at the other end of the relationship.
+
+The plan is cached in the process and rebuilt when roles change. Changes
+made through the API invalidate it with the access control role hook,
+changes made by migrations are detected by a cheap aggregate query over the
+roles table.
+"""
+
+import collections
+
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc.models import all_models
+
+
+class PropagationPlan(object):
+  """Propagation steps of the role tree.
+
+  Attributes:
+    relationship_roles: dict mapping (parent role id, object type at the
+      other end of the relationship) to a set of relationship role ids.
+    object_roles: dict mapping (relationship role id, object type) to a set
+      of child role ids for that object.
+  """
+
+  def __init__(self, roles):
+    """Compile the plan.
+
+    Args:
+      roles: iterable of (id, parent_id, object_type) of all roles.
+    """
+    children = collections.defaultdict(list)
+    for role_id, parent_id, object_type in roles:
+      if parent_id is not None:
+        children[parent_id].append((role_id, object_type))
+
+    self.relationship_roles = collections.defaultdict(set)
+    self.object_roles = collections.defaultdict(set)
+    for parent_id, role_children in children.iteritems():
+      for child_id, child_type in role_children:
+        if child_type != all_models.Relationship.__name__:
+          continue
+        for grandchild_id, grandchild_type in children.get(child_id, ()):
+          self.relationship_roles[(parent_id, grandchild_type)].add(child_id)
+          self.object_roles[(child_id, grandchild_type)].add(grandchild_id)
+
+
+_CACHE = {
+    "signature": None,
+    "plan": None,
+}
+
+
+def _get_signature():
+  """Get values that change whenever a role is added, removed or edited."""
+  acr = all_models.AccessControlRole
+  return tuple(db.session.query(
+      sa.func.count(acr.id),
+      sa.func.max(acr.id),
+      sa.func.max(acr.updated_at),
+      sa.func.sum(sa.func.coalesce(acr.parent_id, 0)),
+  ).one())
+
+
+def get_plan():
+  """Get propagation plan for the current role tree."""
+  signature = _get_signature()
+  if _CACHE["plan"] is None or _CACHE["signature"] != signature:
+    acr = all_models.AccessControlRole
+    roles = db.session.query(acr.id, acr.parent_id, acr.object_type)
+    _CACHE["plan"] = PropagationPlan(roles)
+    _CACHE["signature"] = signature
+  return _CACHE["plan"]
+
+
+def invalidate():
+  """Drop the cached plan, it is compiled again on the next use."""
+  _CACHE["plan"] = None
+  _CACHE["signature"] = None
@@ -0,0 +1,214 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""ACL propagation with a recursive common table expression.
+
+The default propagation walks the propagation tree with two INSERT ... SELECT
+statements and a count query per level. On servers that support
+``WITH RECURSIVE`` (MySQL 8.0, MariaDB 10.2.2) the whole propagation closure of
+a batch of parent ACL entries is read with a single statement instead.
+
+Every propagated ACL entry references its parent entry by id, so the closure
+rows are inserted level by level: the CTE tags every row with the path of
+role and object ids it was reached through, and ids of inserted (or already
+existing) entries are looked up by parent id to resolve the parents of the
+next level.
+"""
+
+import collections
+
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc import settings
+from ggrc import utils
+from ggrc.access_control import utils as acl_utils
+from ggrc.models import all_models
+
+
+# Number of parent ACL entries whose propagation closure is read at once.
+BATCH_SIZE = 100
+
+_OBJECT_TO_RELATIONSHIP = """
+  SELECT child_acr.id, rel.id, 'Relationship', closure.base_id,
+         closure.depth + 1,
+         CONCAT(closure.path, '/', child_acr.id, ':', rel.id),
+         closure.path
+  FROM closure
+  JOIN relationships AS rel
+    ON rel.{parent}_type = closure.object_type AND
+       rel.{parent}_id = closure.object_id
+  JOIN access_control_roles AS child_acr
+    ON child_acr.parent_id = closure.ac_role_id AND
+       child_acr.object_type = 'Relationship'
+  WHERE MOD(closure.depth, 2) = 0 AND closure.depth < :max_depth AND EXISTS (
+      SELECT 1 FROM access_control_roles AS grandchild_acr
+      WHERE grandchild_acr.parent_id = child_acr.id AND
+            grandchild_acr.object_type = rel.{child}_type
+  )
+"""
+
+_RELATIONSHIP_TO_OBJECT = """
+  SELECT child_acr.id, rel.{child}_id, rel.{child}_type, closure.base_id,
+         closure.depth + 1,
+         CONCAT(closure.path, '/', child_acr.id, ':', rel.{child}_id),
+         closure.path
+  FROM closure
+  JOIN relationships AS rel
+    ON rel.id = closure.object_id
+  JOIN access_control_roles AS child_acr
+    ON child_acr.parent_id = closure.ac_role_id AND
+       child_acr.object_type = rel.{child}_type
+  WHERE MOD(closure.depth, 2) = 1 AND closure.depth < :max_depth
+"""
+
+_CLOSURE_SQL = """
+WITH RECURSIVE closure (
+    ac_role_id, object_id, object_type, base_id, depth, path, parent_path
+) AS (
+  SELECT acl.ac_role_id, acl.object_id, acl.object_type, acl.base_id, 0,
+         CAST(acl.id AS CHAR(4000)), CAST(NULL AS CHAR(4000))
+  FROM access_control_list AS acl
+  WHERE acl.id IN ({acl_ids})
+  UNION ALL {steps}
+)
+SELECT ac_role_id, object_id, object_type, NOW() AS created_at, base_id,
+       depth, path, parent_path
+FROM closure
+WHERE depth > 0
+"""
+
+
+def _get_closure_sql(acl_ids):
+  """Get closure statement text for the given number of parent ACL ids."""
+  steps = [
+      _OBJECT_TO_RELATIONSHIP.format(parent="source", child="destination"),
+      _OBJECT_TO_RELATIONSHIP.format(parent="destination", child="source"),
+      _RELATIONSHIP_TO_OBJECT.format(child="destination"),
+      _RELATIONSHIP_TO_OBJECT.format(child="source"),
+  ]
+  return _CLOSURE_SQL.format(
+      acl_ids=", ".join(":acl_id_{}".format(idx)
+                        for idx in range(len(acl_ids))),
+      steps="\n  UNION ALL".join(steps),
+  )
+
+
+def _server_supports_cte(dialect):
+  """Check if the database server supports WITH RECURSIVE statements."""
+  if dialect.name != "mysql":
+    return False
+  version = dialect.server_version_info
+  if not version:
+    return False
+  if any("mariadb" in str(part).lower() for part in version):
+    return tuple(version[:3]) >= (10, 2, 2)
+  return tuple(version[:2]) >= (8, 0)
+
+
+def is_supported():
+  """Check if recursive propagation is enabled and usable on this server."""
+  if not settings.ACL_RECURSIVE_PROPAGATION_ENABLED:
+    return False
+  return _server_supports_cte(db.engine.dialect)
+
+
+def _get_acl_ids(parent_acl_ids):
+  """Get list of parent ACL ids from a list or a select statement."""
+  if isinstance(parent_acl_ids, sa.sql.expression.Select):
+    return [row[0] for row in db.session.execute(parent_acl_ids)]
+  return sorted(parent_acl_ids)
+
+
+def _get_closure(acl_ids, max_depth):
+  """Get propagated ACL rows for all parents grouped by tree depth."""
+  params = {"max_depth": max_depth}
+  params.update(("acl_id_{}".format(idx), acl_id)
+                for idx, acl_id in enumerate(acl_ids))
+  statement = sa.text(_get_closure_sql(acl_ids))
+  rows = db.session.execute(statement, params).fetchall()
+  if rows:
+    # release locks taken by the select before the inserts
+    db.session.plain_commit()
+  levels = collections.defaultdict(list)
+  for row in rows:
+    levels[row.depth].append(row)
+  return levels, statement
+
+
+def _get_inserted_ids(rows, path_ids):
+  """Get ids of ACL entries for closure rows of a single level.
+
+  Args:
+    rows: closure rows whose parents are in path_ids.
+    path_ids: dict with ACL ids of already resolved paths.
+  Returns:
+    dict with ACL ids for paths of the given rows.
+  """
+  acl_table = all_models.AccessControlList.__table__
+  parent_ids = sorted({path_ids[row.parent_path] for row in rows})
+  acl_ids = {}
+  for chunk in utils.list_chunks(parent_ids):
+    query = sa.select([
+        acl_table.c.id,
+        acl_table.c.parent_id,
+        acl_table.c.ac_role_id,
+        acl_table.c.object_type,
+        acl_table.c.object_id,
+    ]).where(
+        acl_table.c.parent_id.in_(chunk)
+    )
+    for acl in db.session.execute(query):
+      key = (acl.parent_id, acl.ac_role_id, acl.object_type, acl.object_id)
+      acl_ids[key] = acl.id
+  result = {}
+  for row in rows:
+    key = (path_ids[row.parent_path], row.ac_role_id, row.object_type,
+           row.object_id)
+    if key in acl_ids:
+      result[row.path] = acl_ids[key]
+  return result
+
+
+def _propagate_batch(acl_ids, user_id, depth_limit):
+  """Propagate a batch of parent ACL entries through the whole tree."""
+  max_depth = depth_limit * 2
+  levels, statement = _get_closure(acl_ids, max_depth)
+  if max_depth in levels:
+    raise Exception("Propagation depth limit exceeded. Check the propagation "
+                    "tree for cycles, invalid entries or too deep entries.")
+
+  path_ids = {str(acl_id): acl_id for acl_id in acl_ids}
+  for depth in sorted(levels):
+    # Entries whose parent could not be inserted can not be propagated.
+    rows = [row for row in levels[depth] if row.parent_path in path_ids]
+    if not rows:
+      return
+    acl_utils.insert_acl_records([
+        (
+            row.ac_role_id,
+            row.object_id,
+            row.object_type,
+            row.created_at,
+            user_id,
+            row.created_at,
+            path_ids[row.parent_path],
+            path_ids[row.parent_path],
+            row.base_id,
+        )
+        for row in rows
+    ], statement)
+    path_ids.update(_get_inserted_ids(rows, path_ids))
+
+
+def propagate(parent_acl_ids, user_id, depth_limit):
+  """Propagate ACL entries through the entire propagation tree.
+
+  Args:
+    parent_acl_ids: list of parent ACL ids or a select statement with them.
+    user_id: id of the user set as modified_by on propagated entries.
+    depth_limit: maximum number of object to object propagation steps.
+  """
+  acl_ids = _get_acl_ids(parent_acl_ids)
+  for chunk in utils.list_chunks(acl_ids, chunk_size=BATCH_SIZE):
+    _propagate_batch(chunk, user_id, depth_limit)
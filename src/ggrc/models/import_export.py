@@ -7,9 +7,11 @@ import json
 from datetime import datetime, timedelta
 from logging import getLogger
 
+import sqlalchemy as sa
 from sqlalchemy.dialects import mysql
 
 from ggrc import db
+from ggrc import settings
 from ggrc.models.mixins.base import Identifiable
 from ggrc.login import get_current_user
 from werkzeug.exceptions import BadRequest, Forbidden, NotFound
@@ -85,6 +87,142 @@ class ImportExport(Identifiable, db.Model):
     return res
 
 
+class ImportExportChunk(db.Model):
+  """Chunk of the CSV content of an export job.
+
+  Exports are written in chunks by ContentWriter instead of the content
+  column, so neither writing nor downloading them needs the whole file in
+  memory. Chunks hold encoded CSV and can split multibyte characters.
+  """
+  __tablename__ = 'import_export_chunks'
+
+  import_export_id = db.Column(
+      db.Integer,
+      db.ForeignKey('import_exports.id', ondelete='CASCADE'),
+      primary_key=True,
+  )
+  position = db.Column(db.Integer, primary_key=True, autoincrement=False)
+  content = db.Column(mysql.LONGBLOB, nullable=False)
+
+
+# Chunks of export part N take positions from N * PART_POSITIONS on. The
+# last position of that range holds an empty chunk marking the part as
+# finished.
+PART_POSITIONS = 1000000
+
+
+class ContentWriter(object):
+  """File-like sink storing written data as chunks of an import/export job.
+
+  Written data is buffered and inserted as a new chunk whenever the buffer
+  reaches EXPORT_CHUNK_SIZE bytes. close must be called to store the rest.
+  Writers of export parts store their chunks at positions of the part.
+  """
+
+  def __init__(self, ie_id, chunk_size=None, part_index=0):
+    self.ie_id = ie_id
+    self.chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    self._buffer = []
+    self._buffer_size = 0
+    self._position = part_index * PART_POSITIONS
+
+  def write(self, data):
+    self._buffer.append(data)
+    self._buffer_size += len(data)
+    if self._buffer_size >= self.chunk_size:
+      self._flush()
+
+  def _flush(self):
+    """Insert buffered data as the next chunk."""
+    if not self._buffer:
+      return
+    db.session.execute(ImportExportChunk.__table__.insert().values(
+        import_export_id=self.ie_id,
+        position=self._position,
+        content="".join(self._buffer),
+    ))
+    self._position += 1
+    self._buffer = []
+    self._buffer_size = 0
+
+  def close(self):
+    self._flush()
+
+
+def _get_part_marker_position(part_index):
+  return (part_index + 1) * PART_POSITIONS - 1
+
+
+def finish_part(ie_id, part_index):
+  """Mark an export part as finished in the transaction storing it."""
+  db.session.execute(ImportExportChunk.__table__.insert().values(
+      import_export_id=ie_id,
+      position=_get_part_marker_position(part_index),
+      content="",
+  ))
+
+
+def is_part_finished(ie_id, part_index):
+  """Check whether chunks of the export part have been stored already."""
+  table = ImportExportChunk.__table__
+  return db.session.execute(
+      sa.select([sa.exists().where(
+          sa.and_(
+              table.c.import_export_id == ie_id,
+              table.c.position == _get_part_marker_position(part_index),
+          )
+      )])
+  ).scalar()
+
+
+def count_finished_parts(ie_id):
+  """Count finished export parts, including ones committed meanwhile."""
+  table = ImportExportChunk.__table__
+  return db.session.execute(
+      sa.select([sa.func.count()]).where(
+          sa.and_(
+              table.c.import_export_id == ie_id,
+              table.c.position % PART_POSITIONS == PART_POSITIONS - 1,
+          )
+      ).with_for_update(read=True)
+  ).scalar()
+
+
+def delete_content_chunks(ie_id):
+  """Delete content chunks of the job, for example of a failed run."""
+  table = ImportExportChunk.__table__
+  db.session.execute(table.delete().where(table.c.import_export_id == ie_id))
+
+
+def iter_content(ie_job):
+  """Yield encoded content of the job chunk by chunk.
+
+  Chunks are read one query at a time. Jobs with the content column set,
+  imports and exports made before chunks were used, yield it at once.
+  """
+  if ie_job.content is not None:
+    yield ie_job.content.encode("utf-8")
+    return
+  table = ImportExportChunk.__table__
+  position = -1
+  while True:
+    row = db.session.execute(
+        sa.select([table.c.position, table.c.content]).where(
+            sa.and_(
+                table.c.import_export_id == ie_job.id,
+                table.c.position > position,
+            )
+        ).order_by(
+            table.c.position,
+        ).limit(1)
+    ).first()
+    if row is None:
+      return
+    position, chunk = row
+    if chunk:
+      yield chunk
+
+
 def create_import_export_entry(**kwargs):
   """Create ImportExport entry"""
   meta = json.dumps(kwargs['gdrive_metadata']) if 'gdrive_metadata' in kwargs \
@@ -146,6 +284,17 @@ def get(ie_id):
   raise Forbidden()
 
 
+def get_locked(ie_id):
+  """Get import_exports entry locked until the end of the transaction.
+
+  The entry is read again even if it is in the session already, so its
+  status reflects changes committed by other background tasks.
+  """
+  return ImportExport.query.filter_by(
+      id=ie_id,
+  ).with_for_update().populate_existing().one()
+
+
 def clear_overtimed_tasks():
   """
   Clear ImportExport jobs not finished normally
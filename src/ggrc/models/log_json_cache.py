@@ -0,0 +1,187 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Memoization of log_json output.
+
+log_json of objects with custom attributes, roles or evidence walks their
+related objects, and the same object is serialized several times per
+request: by the session cache before every flush, by log_json of its parent
+objects and by log_event. The output is memoized on the instance.
+
+Every instance has a version that moves on attribute or collection changes
+of the instance, on its expire and refresh and when a flush writes it. A
+memo keeps versions of the objects its output was built from: the instance,
+objects loaded in its relationships, objects serialized by nested log_json
+calls and objects passed to depend_on. The memo is reused while none of
+these versions has moved. Rollbacks and bulk updates and deletes invalidate
+all memos.
+"""
+
+import copy
+import functools
+import itertools
+import threading
+
+import sqlalchemy as sa
+from sqlalchemy.orm.session import Session
+
+from ggrc.utils import metrics
+
+
+_MEMO_KEY = "_log_json_memo"
+
+_VERSION_KEY = "_log_json_version"
+
+# Every change takes a new unique value, so a concurrent change can not bring
+# back a value a memo was stored with.
+_VERSIONS = itertools.count(1)
+
+_STATE = {
+    "generation": 0,
+}
+
+# Dependencies collected by log_json calls in progress, innermost last.
+_LOCAL = threading.local()
+
+
+def invalidate(*_, **__):
+  """Invalidate memoized log_json of all objects."""
+  _STATE["generation"] = next(_VERSIONS)
+
+
+def touch(obj, *_, **__):
+  """Invalidate memoized log_json depending on the object."""
+  obj.__dict__[_VERSION_KEY] = next(_VERSIONS)
+
+
+def _get_frames():
+  """Get dependency sets of log_json calls in progress in this thread."""
+  frames = getattr(_LOCAL, "frames", None)
+  if frames is None:
+    frames = _LOCAL.frames = []
+  return frames
+
+
+def depend_on(*objects):
+  """Make log_json in progress depend on the objects.
+
+  log_json reading attributes of objects that are neither loaded in
+  relationships of the serialized object nor serialized with their own
+  log_json has to declare them with this function.
+  """
+  frames = _get_frames()
+  if frames:
+    frames[-1].update(objects)
+
+
+def _get_version(obj):
+  return obj.__dict__.get(_VERSION_KEY, 0)
+
+
+def _get_related(obj):
+  """Get objects loaded in relationships of the object."""
+  state = sa.inspect(obj)
+  for prop in state.mapper.relationships:
+    value = state.dict.get(prop.key)
+    if value is None:
+      continue
+    if not prop.uselist:
+      yield value
+      continue
+    if isinstance(value, dict):
+      value = value.values()
+    for item in value:
+      yield item
+
+
+def _is_valid(memo):
+  generation, versions, _ = memo
+  return generation == _STATE["generation"] and all(
+      _get_version(obj) == version for obj, version in versions
+  )
+
+
+def _memoize(model, log_json):
+  """Get memoizing wrapper of log_json of the model.
+
+  Subclasses of the model can extend its log_json with super calls, so
+  output is memoized only for instances of the model itself.
+  """
+  @functools.wraps(log_json)
+  def memoized_log_json(self, *args, **kwargs):
+    """Get a copy of memoized log_json output or compute it."""
+    # pylint: disable=unidiomatic-typecheck
+    memoize = not (args or kwargs) and type(self) is model
+    if memoize:
+      memo = self.__dict__.get(_MEMO_KEY)
+      if memo is not None and _is_valid(memo):
+        metrics.count_log_json(model.__name__, True)
+        depend_on(*[obj for obj, _ in memo[1]])
+        return copy.deepcopy(memo[2])
+      metrics.count_log_json(model.__name__, False)
+
+    generation = _STATE["generation"]
+    frames = _get_frames()
+    frames.append({self})
+    try:
+      result = log_json(self, *args, **kwargs)
+    finally:
+      dependencies = frames.pop()
+    dependencies.update(_get_related(self))
+    depend_on(*dependencies)
+    if memoize:
+      versions = [(obj, _get_version(obj)) for obj in dependencies]
+      # callers modify the output, the memo keeps its own copy
+      self.__dict__[_MEMO_KEY] = (generation, versions,
+                                  copy.deepcopy(result))
+    return result
+
+  memoized_log_json.original = log_json
+  return memoized_log_json
+
+
+def _listen_changes(model):
+  """Move versions of instances of the model on their changes."""
+  mapper = sa.inspect(model)
+  for prop in mapper.column_attrs:
+    sa.event.listen(getattr(model, prop.key), "set", touch)
+  for prop in mapper.relationships:
+    attr = getattr(model, prop.key)
+    sa.event.listen(attr, "set", touch)
+    if prop.uselist:
+      sa.event.listen(attr, "append", touch)
+      sa.event.listen(attr, "remove", touch)
+  sa.event.listen(model, "expire", touch)
+  sa.event.listen(model, "refresh", touch)
+
+
+def _after_flush(session, _):
+  """Move versions of flushed objects.
+
+  A flush sets ids, defaults and server generated values without attribute
+  events.
+  """
+  for obj in itertools.chain(session.new, session.dirty, session.deleted):
+    touch(obj)
+
+
+def init(models):
+  """Memoize log_json of the models and listen for their changes.
+
+  Models inheriting log_json get their own wrapper of the original
+  function, as the wrapper of the parent model does not memoize them.
+  """
+  for model in models:
+    _listen_changes(model)
+    log_json = getattr(model, "log_json", None)
+    if log_json is None:
+      continue
+    log_json = log_json.im_func
+    if "log_json" in model.__dict__ and hasattr(log_json, "original"):
+      continue
+    model.log_json = _memoize(model, getattr(log_json, "original", log_json))
+
+  sa.event.listen(Session, "after_flush", _after_flush)
+  for event_name in ("after_rollback", "after_bulk_update",
+                     "after_bulk_delete"):
+    sa.event.listen(Session, event_name, invalidate)
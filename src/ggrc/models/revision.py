@@ -3,8 +3,11 @@
 
 """Defines a Revision model for storing snapshots."""
 
+import copy
+
 from ggrc import builder
 from ggrc import db
+from ggrc import settings
 from ggrc.models.mixins import base
 from ggrc.models.mixins import Base
 from ggrc.models.mixins.filterable import Filterable
@@ -13,20 +16,32 @@ from ggrc.access_control import role
 from ggrc.models.types import LongJsonType
 from ggrc.utils.revisions_diff import builder as revisions_diff
 from ggrc.utils import referenced_objects
+from ggrc.utils import structures
 from ggrc.utils.revisions_diff import meta_info
 
 
+# Upgraded content of revisions stored in an older format, keyed by revision
+# id, creation time and access control roles of the resource type.
+_UPGRADED_CONTENT = structures.LRUCache(settings.REVISION_CONTENT_CACHE_SIZE)
+
+
 class Revision(Filterable, base.ContextRBAC, Base, db.Model):
   """Revision object holds a JSON snapshot of the object at a time."""
 
   __tablename__ = 'revisions'
 
+  # Version of the stored content format. Content of revisions with an older
+  # version is upgraded on access and the upgraded content is memoized.
+  CONTENT_VERSION = 1
+
   resource_id = db.Column(db.Integer, nullable=False)
   resource_type = db.Column(db.String, nullable=False)
   event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
   action = db.Column(db.Enum(u'created', u'modified', u'deleted'),
                      nullable=False)
-  _content = db.Column('content', LongJsonType, nullable=False)
+  _content = db.Column('content', LongJsonType(compressed=True),
+                       nullable=False)
+  content_version = db.Column(db.Integer, nullable=False, server_default="0")
 
   resource_slug = db.Column(db.String, nullable=True)
   source_type = db.Column(db.String, nullable=True)
@@ -83,11 +98,22 @@ class Revision(Filterable, base.ContextRBAC, Base, db.Model):
     )
 
   def __init__(self, obj, modified_by_id, action, content):
-    self.resource_id = obj.id
-    self.resource_type = obj.__class__.__name__
-    self.resource_slug = getattr(obj, "slug", None)
-    self.modified_by_id = modified_by_id
-    self.action = action
+    row = self.build_row(obj, modified_by_id, action, content)
+    self._content = row.pop("content")
+    for attr, value in row.iteritems():
+      setattr(self, attr, value)
+
+  @classmethod
+  def build_row(cls, obj, modified_by_id, action, content):
+    """Get column values of a new revision of obj.
+
+    The values are used both for ORM revisions and for rows written with
+    Core inserts, so both ways of logging produce the same revisions.
+
+    Returns:
+      dict with values of all revision columns except event, context and
+      timestamps.
+    """
     if "access_control_list" in content and content["access_control_list"]:
       for acl in content["access_control_list"]:
         acl["person"] = {
@@ -95,14 +121,22 @@ class Revision(Filterable, base.ContextRBAC, Base, db.Model):
             "type": "Person",
             "href": "/api/people/{}".format(acl["person_id"]),
         }
-
-    self._content = content
-
+    row = {
+        "resource_id": obj.id,
+        "resource_type": obj.__class__.__name__,
+        "resource_slug": getattr(obj, "slug", None),
+        "modified_by_id": modified_by_id,
+        "action": action,
+        "content": content,
+        # content of new revisions comes from log_json in the current format
+        "content_version": cls.CONTENT_VERSION,
+    }
     for attr in ["source_type",
                  "source_id",
                  "destination_type",
                  "destination_id"]:
-      setattr(self, attr, getattr(obj, attr, None))
+      row[attr] = getattr(obj, attr, None)
+    return row
 
   @builder.callable_property
   def diff_with_current(self):
@@ -298,6 +332,14 @@ class Revision(Filterable, base.ContextRBAC, Base, db.Model):
             "id": None,
         })
 
+    return {
+        "access_control_list": access_control_list,
+    }
+
+  def _filter_acl(self, content):
+    """Keep only external ACL entries of existing roles."""
+    roles_dict = role.get_custom_roles_for(self.resource_type)
+    access_control_list = content.get("access_control_list") or []
     acl_with_people = self._populate_acl_with_people(access_control_list)
     filtered_acl = self._filter_internal_acls(acl_with_people)
     result_acl = [
@@ -427,22 +469,24 @@ class Revision(Filterable, base.ContextRBAC, Base, db.Model):
         result.append(categorization)
     return {key_name: result}
 
-  def _get_cavs(self):
+  def _get_cavs(self, content=None):
     """Return cavs values from content."""
-    if "custom_attribute_values" in self._content:
-      return self._content["custom_attribute_values"]
-    if "custom_attributes" in self._content:
-      return self._content["custom_attributes"]
+    if content is None:
+      content = self._content
+    if "custom_attribute_values" in content:
+      return content["custom_attribute_values"]
+    if "custom_attributes" in content:
+      return content["custom_attributes"]
     return []
 
-  def populate_cavs(self):
+  def populate_cavs(self, content=None):
     """Setup cads in cav list if they are not presented in content
 
     but now they are associated to instance."""
     from ggrc.models import custom_attribute_definition
     cads = custom_attribute_definition.get_custom_attributes_for(
         self.resource_type, self.resource_id)
-    cavs = {int(i["custom_attribute_id"]): i for i in self._get_cavs()}
+    cavs = {int(i["custom_attribute_id"]): i for i in self._get_cavs(content)}
     for cad in cads:
       custom_attribute_id = int(cad["id"])
       if custom_attribute_id in cavs:
@@ -555,33 +599,84 @@ class Revision(Filterable, base.ContextRBAC, Base, db.Model):
             cav["attributable_type"] = "Requirement"
         populated_content["custom_attribute_values"] = cavs
 
+  def _upgrade_content(self):
+    """Upgrade stored content to the current content format.
+
+    The result is only memoized, never stored, as some upgrades depend on
+    roles existing at the time of the upgrade.
+    """
+    upgraded_content = self._content.copy()
+    upgraded_content.update(self.populate_acl())
+    upgraded_content.update(self.populate_reference_url())
+    upgraded_content.update(self.populate_folder())
+    upgraded_content.update(self.populate_labels())
+    upgraded_content.update(self.populate_review_status())
+    upgraded_content.update(self._document_evidence_hack())
+    upgraded_content.update(self.populate_categoies("categories"))
+    upgraded_content.update(self.populate_categoies("assertions"))
+    upgraded_content.update(self.populate_cad_default_values())
+    upgraded_content["custom_attribute_values"] = self._get_cavs()
+    # remove custom_attributes,
+    # it's old style interface and now it's not needed
+    upgraded_content.pop("custom_attributes", None)
+    self.populate_requirements(upgraded_content)
+    return upgraded_content
+
+  def _get_upgraded_content_key(self):
+    """Get memo key of the upgraded content.
+
+    ACL upgrade depends on roles of the resource type, so renamed, added or
+    deleted roles get the content upgraded again in every process.
+    """
+    roles_dict = role.get_custom_roles_for(self.resource_type)
+    return (self.id, self.created_at, frozenset(roles_dict.iteritems()))
+
+  def _get_upgraded_content(self):
+    """Get content in the current format, memoized for older revisions."""
+    if self.content_version == self.CONTENT_VERSION:
+      return self._content
+    key = self._get_upgraded_content_key()
+    upgraded_content = _UPGRADED_CONTENT.get(key)
+    if upgraded_content is None:
+      upgraded_content = self._upgrade_content()
+      if self.id is not None:
+        _UPGRADED_CONTENT.set(key, copy.deepcopy(upgraded_content))
+      return upgraded_content
+    return copy.deepcopy(upgraded_content)
+
   @builder.simple_property
   def content(self):
     """Property. Contains the revision content dict.
 
     Updated by required values, generated from saved content dict."""
-    # pylint: disable=too-many-locals
-    populated_content = self._content.copy()
-    populated_content.update(self.populate_acl())
-    populated_content.update(self.populate_reference_url())
+    upgraded_content = self._get_upgraded_content()
+    populated_content = upgraded_content.copy()
     populated_content.update(self.populate_folder())
-    populated_content.update(self.populate_labels())
     populated_content.update(self.populate_status())
-    populated_content.update(self.populate_review_status())
-    populated_content.update(self._document_evidence_hack())
-    populated_content.update(self.populate_categoies("categories"))
-    populated_content.update(self.populate_categoies("assertions"))
-    populated_content.update(self.populate_cad_default_values())
-    populated_content.update(self.populate_cavs())
-
+    populated_content.update(self._filter_acl(upgraded_content))
+    populated_content.update(self.populate_cavs(upgraded_content))
     self.populate_requirements(populated_content)
-    # remove custom_attributes,
-    # it's old style interface and now it's not needed
     populated_content.pop("custom_attributes", None)
-
     return populated_content
 
   @content.setter
   def content(self, value):
     """ Setter for content property."""
     self._content = value
+    self.content_version = 0
+    if self.id is not None:
+      _UPGRADED_CONTENT.delete(self._get_upgraded_content_key())
+
+
+class LatestRevision(db.Model):
+  """Pointer to the latest revision of a resource.
+
+  The table is maintained by ggrc.utils.latest_revisions whenever revisions
+  are written, so the latest revision of an object can be looked up without
+  grouping all its revisions.
+  """
+  __tablename__ = "latest_revisions"
+
+  resource_type = db.Column(db.String(250), primary_key=True)
+  resource_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+  revision_id = db.Column(db.Integer, nullable=False)
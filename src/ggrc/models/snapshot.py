@@ -7,7 +7,6 @@ import collections
 from datetime import datetime
 
 from sqlalchemy import event
-from sqlalchemy import func
 from sqlalchemy import inspect
 from sqlalchemy import orm
 from sqlalchemy.ext.declarative import declared_attr
@@ -23,13 +22,13 @@ from ggrc.login import get_current_user_id
 from ggrc.models import mixins
 from ggrc.models import reflection
 from ggrc.models import relationship
-from ggrc.models import revision
 from ggrc.models.deferred import deferred
 from ggrc.models.mixins import base
 from ggrc.models.mixins import rest_handable
 from ggrc.models.mixins import with_last_assessment_date
 from ggrc.utils import benchmark
 from ggrc.utils import errors
+from ggrc.utils import latest_revisions
 
 
 class Snapshot(rest_handable.WithDeleteHandable,
@@ -355,20 +354,7 @@ def _set_latest_revisions(objects):
     objects: list of snapshot objects with child_id and child_type set.
   """
   pairs = [(o.child_type, o.child_id) for o in objects]
-  query = db.session.query(
-      func.max(revision.Revision.id, name="id", identifier="id"),
-      revision.Revision.resource_type,
-      revision.Revision.resource_id,
-  ).filter(
-      tuple_(
-          revision.Revision.resource_type,
-          revision.Revision.resource_id,
-      ).in_(pairs)
-  ).group_by(
-      revision.Revision.resource_type,
-      revision.Revision.resource_id,
-  )
-  id_map = {(r_type, r_id): id_ for id_, r_type, r_id in query}
+  id_map = latest_revisions.get_latest_revision_ids(pairs)
   for o in objects:
     o.revision_id = id_map.get((o.child_type, o.child_id))
     if o.revision_id is None:
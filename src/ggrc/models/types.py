@@ -6,12 +6,108 @@
 Add Json and Compressed type declaration for use in ORM models.
 """
 
+import base64
 import json
+import logging
 import pickle
+import zlib
+
 import sqlalchemy.types as types
+from ggrc import settings
 from ggrc import utils
 from ggrc.models import exceptions
 
+try:
+  import zstandard
+except ImportError:
+  zstandard = None  # pylint: disable=invalid-name
+
+logger = logging.getLogger(__name__)
+
+ZLIB_CODEC = "zlib"
+ZSTD_CODEC = "zstd"
+
+# Compressed values are stored as text that starts with a header which can
+# not start a JSON document: COMPRESSION_MARKER, codec id and codec version.
+# The compressed data follows the header encoded in base64.
+COMPRESSION_MARKER = "~"
+CODEC_VERSION = "1"
+_CODEC_IDS = {
+    ZLIB_CODEC: "z",
+    ZSTD_CODEC: "s",
+}
+_CODEC_NAMES = {id_: name for name, id_ in _CODEC_IDS.items()}
+_HEADER_LENGTH = 3
+
+
+# Codecs usable for writing, resolved once per requested codec.
+_WRITE_CODECS = {}
+
+
+def _get_codec(codec):
+  """Get codec usable for writing, zstd falls back to zlib if missing."""
+  if codec not in _WRITE_CODECS:
+    if codec == ZSTD_CODEC and zstandard is None:
+      logger.warning("zstandard module is not installed, using zlib instead")
+      _WRITE_CODECS[codec] = ZLIB_CODEC
+    else:
+      _WRITE_CODECS[codec] = codec
+  return _WRITE_CODECS[codec]
+
+
+def compress_json(value, codec=None):
+  """Compress serialized JSON if that makes it shorter.
+
+  Args:
+    value: serialized JSON document.
+    codec: ZLIB_CODEC or ZSTD_CODEC, JSON_COMPRESSION_CODEC by default. No
+      compression is done for an empty codec.
+
+  Returns:
+    compressed value with a header or the original value.
+  """
+  codec = _get_codec(settings.JSON_COMPRESSION_CODEC if codec is None
+                     else codec)
+  if not codec or len(value) < settings.JSON_COMPRESSION_MIN_SIZE:
+    return value
+  data = value.encode("utf-8") if isinstance(value, unicode) else value
+  if codec == ZSTD_CODEC:
+    compressed = zstandard.ZstdCompressor(
+        level=settings.JSON_COMPRESSION_LEVEL).compress(data)
+  else:
+    compressed = zlib.compress(data, settings.JSON_COMPRESSION_LEVEL)
+  encoded = "".join((COMPRESSION_MARKER, _CODEC_IDS[codec], CODEC_VERSION,
+                     base64.b64encode(compressed)))
+  if len(encoded) >= len(data):
+    return value
+  return encoded
+
+
+def get_json_codec(value):
+  """Get codec of a stored value or None if it is not compressed."""
+  if not value or not value.startswith(COMPRESSION_MARKER):
+    return None
+  return _CODEC_NAMES.get(value[1])
+
+
+def decompress_json(value):
+  """Get serialized JSON from a value stored with compress_json."""
+  if not value or not value.startswith(COMPRESSION_MARKER):
+    return value
+  codec = _CODEC_NAMES.get(value[1])
+  version = value[2]
+  if codec is None or version != CODEC_VERSION:
+    raise ValueError("Unknown JSON compression {}".format(
+        value[:_HEADER_LENGTH]))
+  data = base64.b64decode(value[_HEADER_LENGTH:])
+  if codec == ZSTD_CODEC:
+    if zstandard is None:
+      raise ValueError("zstandard module is needed to read zstd values")
+    data = zstandard.ZstdDecompressor().decompress(data)
+  else:
+    data = zlib.decompress(data)
+  return data.decode("utf-8")
+
 
 class LongJsonType(types.TypeDecorator):
   # pylint: disable=W0223
@@ -20,13 +116,21 @@ class LongJsonType(types.TypeDecorator):
   Custom type for storing Json objects in our database as serialized text.
   The Limit for the serialized Json is the same as the database text column
   limit (2^32).
+
+  Columns created with compressed=True store new values compressed with
+  JSON_COMPRESSION_CODEC. Compressed values are read transparently from any
+  column of this type.
   """
   MAX_TEXT_LENGTH = 4294967295
   impl = types.Text
 
+  def __init__(self, *args, **kwargs):
+    self.compressed = kwargs.pop("compressed", False)
+    super(LongJsonType, self).__init__(*args, **kwargs)
+
   def process_result_value(self, value, dialect):
     if value is not None:
-      value = json.loads(value)
+      value = json.loads(decompress_json(value))
     return value
 
   def process_bind_param(self, value, dialect):
@@ -34,6 +138,8 @@ class LongJsonType(types.TypeDecorator):
       pass
     else:
       value = utils.as_json(value)
+      if self.compressed:
+        value = compress_json(value)
       if len(value.encode('utf-8')) > self.MAX_TEXT_LENGTH:
         raise exceptions.ValidationError("Log record content too long")
     return value
@@ -21,6 +21,7 @@ from ggrc.query import autocast
 from ggrc.query import my_objects
 from ggrc.query.exceptions import BadQueryException
 from ggrc.snapshotter import rules
+from ggrc.utils import latest_revisions
 from ggrc.utils import revisions_diff
 
 
@@ -503,28 +504,29 @@ def not_empty_revisions(exp, object_class, target_class, query):
     raise BadQueryException("'{}' resource type does not exist"
                             .format(resource_type))
 
-  query = all_models.Revision.query.filter(
+  query = db.session.query(
+      all_models.Revision.id,
+  ).filter(
       all_models.Revision.resource_type == resource_type,
       all_models.Revision.resource_id == resource_id,
   ).order_by(
       all_models.Revision.created_at,
   )
+  revision_ids = [revision_id for revision_id, in query]
 
   current_instance = resource_cls.query.get(resource_id)
-  current_instance_meta = revisions_diff.meta_info.MetaInfo(current_instance)
-  latest_rev_content = revisions_diff.builder.get_latest_revision_content(
+  latest_id = latest_revisions.get_latest_revision_id(resource_type,
+                                                      resource_id)
+  diffs = revisions_diff.builder.prepare_revision_diffs(
       current_instance,
+      [(latest_id, revision_id) for revision_id in revision_ids],
   )
   prev_diff = None
   revision_with_changes = []
-  for revision in query:
-    diff = revisions_diff.builder.prepare_content_diff(
-        instance_meta_info=current_instance_meta,
-        l_content=latest_rev_content,
-        r_content=revision.content,
-    )
+  for revision_id in revision_ids:
+    diff = diffs.get((latest_id, revision_id))
     if diff != prev_diff:
-      revision_with_changes.append(revision.id)
+      revision_with_changes.append(revision_id)
       prev_diff = diff
 
   if not revision_with_changes:
@@ -17,8 +17,8 @@ from ggrc.query.default_handler import DefaultHandler
 from ggrc.login import login_required
 from ggrc.models.inflector import get_model
 from ggrc.services.common import etag
-from ggrc.utils import as_json
 from ggrc.utils import benchmark
+from ggrc.utils import json_encoding
 
 
 logger = logging.getLogger()
@@ -43,7 +43,7 @@ def json_success_response(response_object, last_modified=None, status=200):
     headers.append(('Last-Modified', http_timestamp(last_modified)))
 
   return current_app.make_response(
-      (as_json(response_object), status, headers),
+      (json_encoding.dumps(response_object), status, headers),
   )
 
 
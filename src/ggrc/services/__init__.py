@@ -16,6 +16,7 @@ def contributed_services():
   from ggrc.models import review
   from ggrc.services.resources import assessment
   from ggrc.services.resources import audit
+  from ggrc.services.resources import change_log
   from ggrc.services.resources import issue
   from ggrc.services.resources import person
   from ggrc.services.resources import related_assessments
@@ -27,6 +28,7 @@ def contributed_services():
       service('access_groups', models.AccessGroup),
       service('audits', models.Audit, audit.AuditResource),
       service('calendar_events', models.CalendarEvent),
+      service('change_log', None, change_log.ChangeLogResource),
       service('categorizations', models.Categorization),
       service('category_bases', models.CategoryBase),
       service('control_categories', models.ControlCategory),
@@ -35,6 +35,7 @@ from ggrc import db
 from ggrc import gdrive
 from ggrc import utils
 from ggrc.utils import as_json, benchmark, dump_attrs
+from ggrc.utils import json_encoding
 from ggrc.utils.log_event import log_event
 from ggrc.fulltext import get_indexer
 from ggrc.login import get_current_user_id, get_current_user
@@ -412,7 +413,7 @@ class Resource(ModelView):
 
   def dispatch_request(self, *args, **kwargs):  # noqa
     # pylint: disable=too-many-return-statements,arguments-differ
-    with benchmark("Dispatch request"):
+    with benchmark("Dispatch request", metric_name="dispatch_request"):
       with benchmark("dispatch_request > Check Headers"):
         method = request.method
         if method in ('POST', 'PUT', 'DELETE')\
@@ -835,7 +836,8 @@ class Resource(ModelView):
 
       with benchmark("Make response"):
         return self.json_success_response(
-            collection, self.collection_last_modified(), cache_op=cache_op)
+            collection, self.collection_last_modified(), cache_op=cache_op,
+            stream=len(objs) >= settings.JSON_STREAMING_MIN_OBJECTS)
 
   def get_resources_from_cache(self, matches):
     """Get resources from cache for specified matches"""
@@ -1251,7 +1253,9 @@ class Resource(ModelView):
   # Response helpers
   @classmethod
   def as_json(cls, obj, **kwargs):
-    return as_json(obj, **kwargs)
+    if kwargs:
+      return as_json(obj, **kwargs)
+    return json_encoding.dumps(obj)
 
   @staticmethod
   def get_properties_to_include(inclusions):
@@ -1416,7 +1420,11 @@ class Resource(ModelView):
 
   def json_success_response(self, response_object, last_modified=None,
                             status=200, id=None, cache_op=None,
-                            obj_etag=None):
+                            obj_etag=None, stream=False):
+    """Build a JSON response with metadata headers.
+
+    If stream is set, the response body is encoded while it is being sent.
+    """
     headers = [('Content-Type', 'application/json')]
     if last_modified:
       headers.append(('Last-Modified', self.http_timestamp(last_modified)))
@@ -1426,6 +1434,8 @@ class Resource(ModelView):
       headers.append(('Location', self.url_for(id=id)))
     if cache_op:
       headers.append(('X-GGRC-Cache', cache_op))
+    if stream:
+      return json_encoding.stream_response(response_object, status, headers)
     return current_app.make_response(
         (self.as_json(response_object), status, headers))
 
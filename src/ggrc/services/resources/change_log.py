@@ -0,0 +1,127 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Custom resource for the change log of an object.
+
+Every entry of the change log is a revision of the object together with its
+diff to the previous revision. Diffs of a page are built with a single
+revision content query and cached in memcache.
+
+This resource works with the following queries:
+  - /api/change_log with get parameters:
+    - object_type=Control
+    - object_id=XXX
+    - optional: limit=from,to, newest revisions first
+"""
+
+import logging
+
+from werkzeug.exceptions import BadRequest, Forbidden
+from flask import request
+
+from ggrc import db
+from ggrc import models
+from ggrc.utils import benchmark
+from ggrc.rbac import permissions
+from ggrc.services import common
+from ggrc.utils.revisions_diff import builder
+
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeLogResource(common.Resource):
+  """Resource handler for change logs of objects."""
+
+  def patch(self):
+    """PATCH operation handler."""
+    raise NotImplementedError()
+
+  def post(self, *args, **kwargs):
+    """POST operation handler."""
+    raise NotImplementedError()
+
+  @classmethod
+  def add_to(cls, app, url, model_class=None, decorators=()):
+    view_func = cls.as_view(cls.endpoint_name())
+    app.add_url_rule(url, view_func=view_func, methods=['GET'])
+
+  @classmethod
+  def _get_limit_parameters(cls):
+    """Parse limit=from,to parameter into a list of two integers."""
+    limit_string = request.args.get("limit", "")
+    limit = [int(i) for i in limit_string.split(",") if i]
+    if limit and (len(limit) != 2 or limit[0] < 0 or limit[1] < limit[0]):
+      raise ValueError
+    return limit
+
+  @staticmethod
+  def _get_revisions(object_type, object_id, limit):
+    """Get a page of revisions and the previous revision of its oldest one.
+
+    Returns:
+      tuple of list of revision rows of the page, newest first, list of
+      (previous revision id, revision id) pairs and total count.
+    """
+    revision = models.all_models.Revision
+    query = db.session.query(
+        revision.id,
+        revision.action,
+        revision.created_at,
+        revision.modified_by_id,
+    ).filter(
+        revision.resource_type == object_type,
+        revision.resource_id == object_id,
+    ).order_by(
+        revision.id.desc(),
+    )
+    total = query.count()
+    start, stop = limit or (0, total)
+    # one more revision is needed to diff the oldest revision of the page
+    rows = query.offset(start).limit(stop - start + 1).all()
+    page = rows[:stop - start]
+    previous = [row.id for row in rows[1:]] + [None]
+    pairs = [(prev_id, row.id) for row, prev_id in zip(page, previous)]
+    return page, pairs, total
+
+  def dispatch_request(self, *args, **kwargs):
+    """Dispatch request for change_log."""
+    with benchmark("dispatch change_log request"):
+      try:
+        if request.method != 'GET':
+          raise BadRequest()
+
+        object_type = request.args.get("object_type")
+        object_id = int(request.args.get("object_id"))
+        limit = self._get_limit_parameters()
+
+        model = models.inflector.get_model(object_type)
+        obj = model.query.get(object_id)
+        if obj is None:
+          raise ValueError("Object does not exist")
+        if not permissions.is_allowed_read(object_type, object_id, None):
+          raise Forbidden()
+
+        with benchmark("get change log"):
+          page, pairs, total = self._get_revisions(object_type, object_id,
+                                                   limit)
+          diffs = builder.prepare_revision_diffs(obj, pairs)
+          data = [{
+              "id": row.id,
+              "action": row.action,
+              "created_at": row.created_at,
+              "modified_by": {"type": "Person", "id": row.modified_by_id},
+              "diff": diffs.get(pair),
+          } for row, pair in zip(page, pairs)]
+
+        return self.json_success_response({
+            "total": total,
+            "data": data,
+        })
+
+      except (ValueError, TypeError, AttributeError) as err:
+        # Type Error and Value Error are for invalid integer values,
+        # Attribute error is for invalid models passed, which return None type
+        # that does not have query attribute.
+        logger.exception(err)
+        raise BadRequest()
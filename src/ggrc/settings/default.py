@@ -163,6 +163,10 @@ LOGGING_LOGGERS = {
 
 DEBUG_BENCHMARK = os.environ.get("GGRC_BENCHMARK")
 
+# Directory where benchmarks of each request are written as trace files in
+# Chrome trace event format. Tracing is disabled if it is not set.
+BENCHMARK_TRACE_DIR = os.environ.get("GGRC_BENCHMARK_TRACE_DIR")
+
 # GGRCQ integration
 GGRC_Q_INTEGRATION_URL = os.environ.get('GGRC_Q_INTEGRATION_URL', '')
 
@@ -247,3 +251,114 @@ DEFAULT_QUEUE = "ggrc"
 
 APPENGINE_INSTANCE = os.environ.get('APPENGINE_INSTANCE')
 APPENGINE_LOCATION = os.environ.get('APPENGINE_LOCATION', 'us-central1')
+
+# JSON encoding backend for API responses. "auto" uses a C accelerated
+# library when it is installed and falls back to the stdlib json module.
+# Possible values: "auto", "simplejson", "json".
+JSON_ENCODER = os.environ.get("GGRC_JSON_ENCODER", "auto")
+
+# Collection responses with at least this many objects are encoded and sent
+# chunk by chunk instead of being built as a single string.
+JSON_STREAMING_MIN_OBJECTS = int(
+    os.environ.get("GGRC_JSON_STREAMING_MIN_OBJECTS", "500")
+)
+
+# Compress responses with gzip or brotli if the client accepts it.
+# Responses smaller than COMPRESSION_MIN_SIZE bytes are sent uncompressed,
+# streamed responses are always compressed.
+COMPRESSION_ENABLED = not bool(os.environ.get("GGRC_COMPRESSION_DISABLED"))
+COMPRESSION_MIN_SIZE = int(os.environ.get("GGRC_COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVEL = int(os.environ.get("GGRC_COMPRESSION_LEVEL", "6"))
+
+# Fraction of requests for which SQL queries are profiled. Admins can profile
+# any request by sending the X-GGRC-Profile header.
+SQL_PROFILER_SAMPLE_RATE = float(
+    os.environ.get("GGRC_SQL_PROFILER_SAMPLE_RATE", "0")
+)
+# Same SELECT executed more times than this in one request is reported as
+# a possible N+1 query.
+SQL_PROFILER_N_PLUS_ONE_THRESHOLD = int(
+    os.environ.get("GGRC_SQL_PROFILER_N_PLUS_ONE_THRESHOLD", "10")
+)
+
+# Sampling profiler. Requests are profiled if they are picked by
+# PROFILER_SAMPLE_RATE (fraction of requests) or if their endpoint or current
+# user email is in the comma separated PROFILER_ENDPOINTS/PROFILER_USERS.
+PROFILER_SAMPLE_RATE = float(os.environ.get("GGRC_PROFILER_SAMPLE_RATE", "0"))
+PROFILER_ENDPOINTS = os.environ.get("GGRC_PROFILER_ENDPOINTS", "")
+PROFILER_USERS = os.environ.get("GGRC_PROFILER_USERS", "")
+# Seconds between two stack samples of a profiled request.
+PROFILER_INTERVAL = float(os.environ.get("GGRC_PROFILER_INTERVAL", "0.01"))
+
+# Runtime metrics exposed at /metrics in Prometheus text format. When
+# METRICS_DIR is set, every process writes its metrics there at most every
+# METRICS_FLUSH_INTERVAL seconds and /metrics sums metrics of all processes.
+# METRICS_DIR has to be local to the host, files of processes that are not
+# running on the host are removed.
+METRICS_ENABLED = not bool(os.environ.get("GGRC_METRICS_DISABLED"))
+METRICS_DIR = os.environ.get("GGRC_METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(
+    os.environ.get("GGRC_METRICS_FLUSH_INTERVAL", "10")
+)
+
+# Automappings of relationships that are estimated to create more than
+# AUTOMAPPING_BACKGROUND_THRESHOLD mappings are generated in a background
+# task, AUTOMAPPING_BACKGROUND_CHUNK_SIZE relationships per commit. 0 disables
+# background automapping.
+AUTOMAPPING_BACKGROUND_THRESHOLD = int(
+    os.environ.get("GGRC_AUTOMAPPING_BACKGROUND_THRESHOLD", "0")
+)
+AUTOMAPPING_BACKGROUND_CHUNK_SIZE = int(
+    os.environ.get("GGRC_AUTOMAPPING_BACKGROUND_CHUNK_SIZE", "10")
+)
+
+# ACL propagation reads the whole propagation tree with a single recursive
+# query when the database server supports WITH RECURSIVE (MySQL 8.0+).
+ACL_RECURSIVE_PROPAGATION_ENABLED = not bool(
+    os.environ.get("GGRC_ACL_RECURSIVE_PROPAGATION_DISABLED")
+)
+
+# Number of background tasks that propagate partitions of a full ACL
+# propagation job in parallel.
+ACL_PROPAGATION_WORKERS = int(
+    os.environ.get("GGRC_ACL_PROPAGATION_WORKERS", "4")
+)
+
+# Snapshots of an audit scope are created SNAPSHOT_CHUNK_SIZE children at a
+# time, each chunk with its own revision lookup and inserts.
+SNAPSHOT_CHUNK_SIZE = int(os.environ.get("GGRC_SNAPSHOT_CHUNK_SIZE", "1000"))
+
+# Number of revisions in an older content format whose upgraded content is
+# memoized in every process.
+REVISION_CONTENT_CACHE_SIZE = int(
+    os.environ.get("GGRC_REVISION_CONTENT_CACHE_SIZE", "1000")
+)
+
+# Exports are stored and downloaded in chunks of this many bytes.
+EXPORT_CHUNK_SIZE = int(os.environ.get("GGRC_EXPORT_CHUNK_SIZE", "1048576"))
+
+# Number of rows of an import block committed together. Rows are committed
+# one by one by default.
+IMPORT_BATCH_SIZE = int(os.environ.get("GGRC_IMPORT_BATCH_SIZE", "1"))
+
+# Number of parts of an export job exported by parallel background tasks,
+# unless the job requests another number, and the maximum a job can request.
+EXPORT_PARALLELISM = int(os.environ.get("GGRC_EXPORT_PARALLELISM", "1"))
+EXPORT_MAX_PARALLELISM = int(
+    os.environ.get("GGRC_EXPORT_MAX_PARALLELISM", "8"))
+
+# Seconds a diff between two revisions is kept in memcache.
+REVISION_DIFF_CACHE_TIMEOUT = int(
+    os.environ.get("GGRC_REVISION_DIFF_CACHE_TIMEOUT", "86400")
+)
+
+# Codec for JSON columns stored compressed, such as revisions content: "zlib",
+# "zstd" (needs the zstandard module) or empty to store new values as plain
+# JSON. Values shorter than JSON_COMPRESSION_MIN_SIZE are never compressed.
+JSON_COMPRESSION_CODEC = os.environ.get("GGRC_JSON_COMPRESSION_CODEC", "")
+JSON_COMPRESSION_LEVEL = int(
+    os.environ.get("GGRC_JSON_COMPRESSION_LEVEL", "6")
+)
+JSON_COMPRESSION_MIN_SIZE = int(
+    os.environ.get("GGRC_JSON_COMPRESSION_MIN_SIZE", "512")
+)
@@ -8,6 +8,7 @@ snapshot object represent a join between parent object (Audit),
 child object (e.g. Control, Regulation, ...) and a particular revision.
 """
 
+import collections
 from logging import getLogger
 
 import sqlalchemy as sa
@@ -16,10 +17,13 @@ from sqlalchemy.sql.expression import bindparam
 
 from ggrc import db
 from ggrc import models
+from ggrc import settings
+from ggrc import utils
 from ggrc.models.hooks import acl
 from ggrc.login import get_current_user_id
 from ggrc.models import all_models
 from ggrc.utils import benchmark
+from ggrc.utils import latest_revisions
 
 from ggrc.snapshotter.datastructures import Attr
 from ggrc.snapshotter.datastructures import Pair
@@ -48,6 +52,7 @@ class SnapshotGenerator(object):
     self.context_cache = dict()
     self.dry_run = dry_run
     self.manual_snapshots = set()
+    self.progress_callback = None
 
   def add_parent(self, obj):
     """Add parent object and automatically scan neighborhood for snapshottable
@@ -180,9 +185,10 @@ class SnapshotGenerator(object):
       else:
         event_id = event.id
 
-      with benchmark("Snapshot._update.filter"):
+      with benchmark("Snapshot._update.filter") as span:
         if _filter:
           for_update = {elem for elem in for_update if _filter(elem)}
+        span.set_attribute("object_count", len(for_update))
 
       with benchmark("Snapshot._update.get existing snapshots"):
         existing_snapshots = db.session.query(
@@ -255,7 +261,7 @@ class SnapshotGenerator(object):
           revision_payload += [data]
 
       with benchmark("Insert Snapshot entries into Revision"):
-        self._execute(models.Revision.__table__.insert(), revision_payload)
+        self._insert_revisions(revision_payload)
       return OperationResponse("update", True, for_update, response_data)
 
   def analyze(self):
@@ -334,91 +340,237 @@ class SnapshotGenerator(object):
     if data and not self.dry_run:
       db.session.execute(operation, data)
 
+  def _insert_revisions(self, revision_payload):
+    """Insert snapshot revisions and point snapshots to them."""
+    self._execute(models.Revision.__table__.insert(), revision_payload)
+    if revision_payload and not self.dry_run:
+      latest_revisions.refresh(
+          (data["resource_type"], data["resource_id"])
+          for data in revision_payload
+      )
+
   def create(self, event, revisions, _filter=None):
     """Create snapshots of parent object's neighborhood per provided rules
-    and split in chuncks if there are too many snapshottable objects."""
+    and split in chuncks if there are too many snapshottable objects.
+
+    Relationships of the created snapshots are inserted together with every
+    chunk of snapshots.
+    """
     for_create, _ = self.analyze()
     result = self._create(
         for_create=for_create, event=event,
-        revisions=revisions, _filter=_filter)
+        revisions=revisions, _filter=_filter, with_relationships=True)
     created = result.response
     if not self.dry_run:
       indexer.reindex_pairs_bg(created)
-      self._copy_snapshot_relationships()
-      self._create_audit_relationships()
     return result
 
-  def _create(self, for_create, event, revisions, _filter):
+  def _create(self, for_create, event, revisions, _filter,
+              with_relationships=False):
     """Create snapshots of parent objects neighhood and create revisions for
     snapshots.
 
+    Snapshots are created in chunks of SNAPSHOT_CHUNK_SIZE pairs, so that
+    revision lookup and payloads of a large scope never have to be held in
+    memory at once.
+
     Args:
       event: A ggrc.models.Event instance
       revisions: A set of tuples of pairs with revisions to which it should
         either create or update a snapshot of that particular audit
       _filter: Callable that should return True if it should be updated
+      with_relationships: Flag for creating relationships of the created
+        snapshots together with each chunk.
     Returns:
       OperationResponse
     """
-    # pylint: disable=too-many-locals,too-many-statements
-    with benchmark("Snapshot._create"):
-      with benchmark("Snapshot._create init"):
-        user_id = get_current_user_id()
-        missed_keys = set()
-        data_payload = list()
-        revision_payload = list()
-        response_data = dict()
-
-        if self.dry_run and event is None:
-          event_id = 0
-        else:
-          event_id = event.id
+    with benchmark("Snapshot._create") as span:
+      if self.dry_run and event is None:
+        event_id = 0
+      else:
+        event_id = event.id
 
       with benchmark("Snapshot._create.filter"):
         if _filter:
           for_create = {elem for elem in for_create if _filter(elem)}
+      span.set_attribute("object_count", len(for_create))
 
-      with benchmark("Snapshot._create._get_revisions"):
-        revision_id_cache = get_revisions(for_create, revisions)
-
-      response_data["revisions"] = revision_id_cache
-
-      with benchmark("Snapshot._create.create payload"):
-        for pair in for_create:
-          if pair in revision_id_cache:
-            revision_id = revision_id_cache[pair]
-            context_id = self.context_cache[pair.parent]
-            data = create_snapshot_dict(pair, revision_id, user_id, context_id)
-            data_payload += [data]
-          else:
-            missed_keys.add(pair)
+      revision_id_cache = dict()
+      missed_keys = set()
+      processed = 0
+      pairs = sorted(for_create)
+      for chunk in utils.list_chunks(pairs, settings.SNAPSHOT_CHUNK_SIZE):
+        chunk_revisions = self._create_chunk(chunk, event_id, revisions,
+                                             with_relationships)
+        revision_id_cache.update(chunk_revisions)
+        missed_keys.update(pair for pair in chunk
+                           if pair not in chunk_revisions)
+        processed += len(chunk)
+        logger.info("Created snapshots for %s of %s objects",
+                    processed, len(pairs))
+        if self.progress_callback:
+          self.progress_callback(processed, len(pairs))
 
       if missed_keys:
         logger.warning(
             "Tried to create snapshots for the following objects but "
             "found no revisions: %s", missed_keys)
 
-      with benchmark("Snapshot._create.write to database"):
-        self._execute(
-            models.Snapshot.__table__.insert(),
-            data_payload
-        )
+      response_data = {"revisions": revision_id_cache}
+      return OperationResponse("create", True, for_create, response_data)
 
-      with benchmark("Snapshot._create.retrieve inserted snapshots"):
-        snapshots = get_snapshots(for_create)
+  def _create_chunk(self, pairs, event_id, revisions, with_relationships):
+    """Create snapshots and their revisions for a chunk of pairs.
 
-      with benchmark("Snapshot._create.create revision payload"):
-        with benchmark("Snapshot._create.create snapshots revision payload"):
-          for snapshot in snapshots:
-            parent = Stub(snapshot.parent_type, snapshot.parent_id)
-            context_id = self.context_cache[parent]
-            data = create_snapshot_revision_dict("created", event_id, snapshot,
-                                                 user_id, context_id)
-            revision_payload += [data]
+    Args:
+      pairs: list of pairs of the chunk.
+      event_id: id of the event for snapshot revisions.
+      revisions: dict of revisions requested for pairs.
+      with_relationships: Flag for creating relationships of the snapshots.
+    Returns:
+      dict of revision ids for snapshots created in the chunk.
+    """
+    user_id = get_current_user_id()
+
+    if revisions:
+      revisions = {pair: revisions[pair] for pair in pairs
+                   if pair in revisions}
+    with benchmark("Snapshot._create._get_revisions"):
+      revision_id_cache = get_revisions(pairs, revisions)
+
+    with benchmark("Snapshot._create.write to database"):
+      data_payload = [
+          create_snapshot_dict(pair, revision_id_cache[pair], user_id,
+                               self.context_cache[pair.parent])
+          for pair in pairs if pair in revision_id_cache
+      ]
+      self._execute(models.Snapshot.__table__.insert(), data_payload)
+
+    if self.dry_run or not data_payload:
+      return revision_id_cache
+
+    with benchmark("Snapshot._create.write revisions to database"):
+      snapshot_ids = collections.defaultdict(list)
+      revision_payload = list()
+      for snapshot in get_snapshots(pairs):
+        parent = Stub(snapshot.parent_type, snapshot.parent_id)
+        snapshot_ids[parent].append(snapshot.id)
+        revision_payload.append(create_snapshot_revision_dict(
+            "created", event_id, snapshot, user_id,
+            self.context_cache[parent],
+        ))
+      self._insert_revisions(revision_payload)
+
+    if with_relationships:
+      with benchmark("Snapshot._create.write relationships to database"):
+        for parent, ids in snapshot_ids.iteritems():
+          self._copy_chunk_relationships(parent, ids)
+          self._create_chunk_audit_relationships(parent, ids)
+    return revision_id_cache
+
+  def _copy_chunk_relationships(self, parent, snapshot_ids):
+    """Add relationships between snapshots of a chunk and its parent scope.
+
+    A relationship between two snapshots is inserted when the second of them
+    is created, so relationships are copied for snapshots of the chunk on
+    either side.
+    """
+    rel_table = all_models.Relationship.__table__
+    snapshot_table = all_models.Snapshot.__table__
+    inserter = rel_table.insert().prefix_with("IGNORE")
+    user_id = get_current_user_id()
+
+    for chunk_side in (0, 1):
+      snap_1 = snapshot_table.alias("snap_1")
+      snap_2 = snapshot_table.alias("snap_2")
+      chunk_snapshot = (snap_1, snap_2)[chunk_side]
+      select_statement = sa.select([
+          sa.literal(user_id),
+          sa.func.now(),
+          sa.func.now(),
+          snap_1.c.id,
+          sa.literal(all_models.Snapshot.__name__),
+          snap_2.c.id,
+          sa.literal(all_models.Snapshot.__name__),
+          snap_2.c.context_id,
+      ]).select_from(
+          rel_table.join(
+              snap_1,
+              sa.and_(
+                  snap_1.c.child_type == rel_table.c.source_type,
+                  snap_1.c.child_id == rel_table.c.source_id,
+              )
+          ).join(
+              snap_2,
+              sa.and_(
+                  snap_2.c.child_type == rel_table.c.destination_type,
+                  snap_2.c.child_id == rel_table.c.destination_id,
+              )
+          )
+      ).where(
+          sa.and_(
+              snap_1.c.parent_id == parent.id,
+              snap_2.c.parent_id == parent.id,
+              chunk_snapshot.c.id.in_(snapshot_ids),
+          )
+      )
+      db.session.execute(inserter.from_select(
+          [
+              rel_table.c.modified_by_id,
+              rel_table.c.created_at,
+              rel_table.c.updated_at,
+              rel_table.c.source_id,
+              rel_table.c.source_type,
+              rel_table.c.destination_id,
+              rel_table.c.destination_type,
+              rel_table.c.context_id,
+          ],
+          select_statement
+      ))
+
+  @staticmethod
+  def _create_chunk_audit_relationships(parent, snapshot_ids):
+    """Create relationships between snapshots of a chunk and their parent.
+
+    Snapshots of the chunk were just created, so every relationship between
+    the parent and those snapshots is a new one.
+    """
+    relationships_table = all_models.Relationship.__table__
+    snapshot_table = all_models.Snapshot.__table__
+    inserter = relationships_table.insert().prefix_with("IGNORE")
 
-      with benchmark("Snapshot._create.write revisions to database"):
-        self._execute(models.Revision.__table__.insert(), revision_payload)
-      return OperationResponse("create", True, for_create, response_data)
+    select_statement = sa.select([
+        sa.literal(get_current_user_id()),
+        sa.func.now(),
+        sa.func.now(),
+        snapshot_table.c.parent_id,
+        snapshot_table.c.parent_type,
+        snapshot_table.c.id,
+        sa.literal(all_models.Snapshot.__name__),
+    ]).where(
+        snapshot_table.c.id.in_(snapshot_ids)
+    )
+    db.session.execute(inserter.from_select(
+        [
+            relationships_table.c.modified_by_id,
+            relationships_table.c.created_at,
+            relationships_table.c.updated_at,
+            relationships_table.c.source_id,
+            relationships_table.c.source_type,
+            relationships_table.c.destination_id,
+            relationships_table.c.destination_type,
+        ],
+        select_statement
+    ))
+
+    created_ids = db.session.query(all_models.Relationship.id).filter(
+        all_models.Relationship.source_type == parent.type,
+        all_models.Relationship.source_id == parent.id,
+        all_models.Relationship.destination_type ==
+        all_models.Snapshot.__name__,
+        all_models.Relationship.destination_id.in_(snapshot_ids),
+    )
+    acl.add_relationships({row.id for row in created_ids})
 
   def _copy_snapshot_relationships(self):
     """Add relationships between snapshotted objects.
@@ -595,8 +747,14 @@ class SnapshotGenerator(object):
       db.session.delete(rel)
 
 
-def create_snapshots(objs, event, revisions=None, _filter=None, dry_run=False):
-  """Create snapshots of parent objects."""
+def create_snapshots(objs, event, revisions=None, _filter=None, dry_run=False,
+                     progress_callback=None):
+  """Create snapshots of parent objects.
+
+  Args:
+    progress_callback: callable receiving the number of processed and total
+      snapshottable objects after every created chunk of snapshots.
+  """
   # pylint: disable=unused-argument
   if not revisions:
     revisions = set()
@@ -604,6 +762,7 @@ def create_snapshots(objs, event, revisions=None, _filter=None, dry_run=False):
   with benchmark("Snapshot.create_snapshots"):
     with benchmark("Snapshot.create_snapshots.init"):
       generator = SnapshotGenerator(dry_run)
+      generator.progress_callback = progress_callback
       if not isinstance(objs, set):
         objs = {objs}
       for obj in objs:
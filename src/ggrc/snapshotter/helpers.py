@@ -13,6 +13,7 @@ from ggrc import models
 from ggrc.snapshotter.datastructures import Stub
 from ggrc.snapshotter.datastructures import Pair
 from ggrc.utils import benchmark
+from ggrc.utils import latest_revisions
 
 logger = getLogger(__name__)
 
@@ -32,28 +33,21 @@ def get_revision_query_for(statement, filters):
 
 
 def get_revisions_query(child_stubs, revisions, filters=None):
-  """Return revisions query for sent params."""
-  queries = []
+  """Return revision id, type and id rows for sent params.
+
+  Latest revisions of child objects are looked up through the latest
+  revisions pointers.
+  """
+  rows = []
   if revisions:
-    queries.append(get_revision_query_for(
+    rows.extend(get_revision_query_for(
         models.Revision.id.in_(revisions.values()),
         filters,
     ))
-  if child_stubs:
-    queries.append(get_revision_query_for(
-        tuple_(
-            models.Revision.resource_type,
-            models.Revision.resource_id,
-        ).in_(
-            child_stubs
-        ),
-        filters,
-    ))
-  if not queries:
-    queries.append(get_revision_query_for(True, filters))
-  if len(queries) == 1:
-    return queries[0]
-  return queries[0].union_all(*queries[1:])
+  latest = latest_revisions.get_latest_revision_ids(child_stubs, filters)
+  rows.extend((revid, restype, resid)
+              for (restype, resid), revid in latest.iteritems())
+  return rows
 
 
 def get_revisions(pairs, revisions, filters=None):
@@ -178,7 +172,8 @@ def create_snapshot_revision_dict(action, event_id, snapshot,
       "modified_by_id": user_id,
       "resource_id": snapshot[0],
       "resource_type": "Snapshot",
-      "context_id": context_id
+      "context_id": context_id,
+      "content_version": models.Revision.CONTENT_VERSION,
   }
 
 
@@ -375,6 +375,8 @@ def reindex_pairs(pairs):
           "resource_type",
           "resource_id",
           "_content",
+          "content_version",
+          "created_at",
       ),
       orm.load_only(
           "id",
@@ -30,6 +30,30 @@ DATE_FORMAT_US = "%m/%d/%Y"
 CHUNK_SIZE = 200
 
 
+def json_default(obj):
+  """Convert objects not supported by JSON encoders to serializable values.
+
+  Raises:
+    TypeError: if the object can not be converted.
+  """
+  from ggrc.models import mixins
+  if isinstance(obj, datetime.datetime):
+    if not obj.time():
+      return obj.date().isoformat()
+    return obj.isoformat()
+  elif isinstance(obj, datetime.date):
+    return obj.isoformat()
+  elif isinstance(obj, datetime.timedelta):
+    return (datetime.datetime.min + obj).time().isoformat()
+  elif isinstance(obj, set):
+    return list(obj)
+  elif isinstance(obj, mixins.Base):
+    return {"id": obj.id, "type": obj.type}
+  elif callable(obj):
+    return obj()
+  raise TypeError(repr(obj) + " is not JSON serializable")
+
+
 class GrcEncoder(json.JSONEncoder):
 
   """Custom JSON Encoder to handle datetime objects and sets
@@ -41,22 +65,9 @@ class GrcEncoder(json.JSONEncoder):
   """
 
   def default(self, obj):
-    from ggrc.models import mixins
-    if isinstance(obj, datetime.datetime):
-      if not obj.time():
-        return obj.date().isoformat()
-      return obj.isoformat()
-    elif isinstance(obj, datetime.date):
-      return obj.isoformat()
-    elif isinstance(obj, datetime.timedelta):
-      return (datetime.datetime.min + obj).time().isoformat()
-    elif isinstance(obj, set):
-      return list(obj)
-    elif isinstance(obj, mixins.Base):
-      return {"id": obj.id, "type": obj.type}
-    elif callable(obj):
-      return obj()
-    else:
+    try:
+      return json_default(obj)
+    except TypeError:
       return super(GrcEncoder, self).default(obj)
 
 
@@ -12,18 +12,58 @@ in ``DEBUG`` level within ``settings`` module:
         "ggrc.utils.benchmarks": "DEBUG",
     }
 
+To record benchmarks as structured traces set ``GGRC_BENCHMARK_TRACE_DIR``
+env var to a directory where trace files should be written. See
+``TraceBenchmark`` for details.
+
+All benchmark context managers accept keyword arguments with span attributes
+and support ``set_attribute`` on the object returned by ``__enter__``:
+
+..  code-block:: python
+
+    with benchmark("Reindex", model="Control", chunk_size=100) as span:
+      span.set_attribute("row_count", len(ids))
+
 """
 
 import inspect
+import json
 import logging
+import os
+import random
+import re
+import threading
 import time
 from collections import defaultdict
 
 from ggrc import settings
+from ggrc.utils import metrics
 
 
 logger = logging.getLogger(__name__)
 
+_local = threading.local()  # pylint: disable=invalid-name
+
+
+def _get_label_stack():
+  """Get stack of messages of the currently running benchmarks."""
+  stack = getattr(_local, "labels", None)
+  if stack is None:
+    stack = _local.labels = []
+  return stack
+
+
+def get_current_label():
+  """Get message of the innermost running benchmark or None."""
+  stack = _get_label_stack()
+  return stack[-1] if stack else None
+
+
+def _observe(metric_name, duration):
+  """Record duration of a benchmark that has a metric name."""
+  if metric_name:
+    metrics.BENCHMARK_DURATION.observe(duration, name=metric_name)
+
 
 class BenchmarkContextManager(object):
   """Default benchmark context manager.
@@ -35,17 +75,25 @@ class BenchmarkContextManager(object):
   # unused arguments is for kwargs that has to be in the init so that all
   # benchmark context managers are compatible. See DebugBenchmark init.
 
-  def __init__(self, message, **kwargs):
+  def __init__(self, message, metric_name=None, **kwargs):
     self.message = message
+    self.metric_name = metric_name
     self.start = 0
 
   def __enter__(self):
+    _get_label_stack().append(self.message)
     self.start = time.time()
+    return self
 
   def __exit__(self, exc_type, exc_value, exc_trace):
     end = time.time()
+    _get_label_stack().pop()
+    _observe(self.metric_name, end - self.start)
     logger.debug("%.4f %s", end - self.start, self.message)
 
+  def set_attribute(self, key, value):
+    """Attributes are not recorded by this benchmark."""
+
 
 class DebugBenchmark(object):
   """Debug benchmark context manager.
@@ -87,7 +135,8 @@ class DebugBenchmark(object):
 
   _summary = "all"
 
-  def __init__(self, message, func_name=None, form=COMPACT_FORM, quiet=False):
+  def __init__(self, message, func_name=None, form=COMPACT_FORM, quiet=False,
+               metric_name=None, **attributes):
     """Initialize a new instance of this benchmark.
 
     Args:
@@ -98,8 +147,14 @@ class DebugBenchmark(object):
         Note that this is a slow process.
       form: String containing the format of the benchmark results. Two given
         options are COMPACT_FORM and FULL_FORM.
+      metric_name: Fixed name the duration is recorded under in the
+        benchmark duration metric. Durations of benchmarks without it are
+        not recorded, messages can contain ids and other unbounded values.
+      attributes: span attributes, they are ignored by this benchmark.
     """
+    # pylint: disable=unused-argument,too-many-arguments
     self.message = message
+    self.metric_name = metric_name
     self.quiet = quiet
     self.form = form
     self.start = 0
@@ -118,7 +173,9 @@ class DebugBenchmark(object):
     if DebugBenchmark._depth == 0:
       self._reset_stats()
     DebugBenchmark._depth += 1
+    _get_label_stack().append(self.message)
     self.start = time.time()
+    return self
 
   def __exit__(self, exc_type, exc_value, exc_trace):
     """Stop the benchmark timer.
@@ -127,8 +184,10 @@ class DebugBenchmark(object):
     the outer most benchmark, the summary of all calls will be printed.
     """
     duration = time.time() - self.start
+    _get_label_stack().pop()
     DebugBenchmark._depth -= 1
     self.update_stats(duration)
+    _observe(self.metric_name, duration)
     if not self.quiet and self._summary in {"all", "last"}:
       msg = self.form.format(
           prefix=self.PREFIX * DebugBenchmark._depth,
@@ -138,6 +197,9 @@ class DebugBenchmark(object):
     if DebugBenchmark._depth == 0:
       self._print_stats(self.STATS[self._summary])
 
+  def set_attribute(self, key, value):
+    """Attributes are not recorded by this benchmark."""
+
   def _update_stats(self, stats, duration):
     """Add duration data to stats.
 
@@ -198,10 +260,168 @@ class DebugBenchmark(object):
       cls._summary = summary.lower()
 
 
+class FileTraceSink(object):
+  """Write every finished trace into a JSON file in the given directory."""
+  # pylint: disable=too-few-public-methods
+
+  def __init__(self, directory):
+    self.directory = directory
+
+  def write(self, trace):
+    """Write trace events into a new file."""
+    name = re.sub(r"[^\w.-]+", "_", trace.name).strip("_")[:80]
+    path = os.path.join(self.directory, "{:.0f}-{}-{}.json".format(
+        trace.start * 1000, trace.trace_id, name))
+    try:
+      if not os.path.isdir(self.directory):
+        os.makedirs(self.directory)
+      with open(path, "w") as trace_file:
+        json.dump(trace.as_trace_events(), trace_file)
+    except (IOError, OSError):
+      logger.warning("Unable to write trace to %s", path, exc_info=True)
+
+
+class Trace(object):
+  """Spans recorded during one request or background task."""
+
+  def __init__(self, name, **attributes):
+    self.trace_id = "{:032x}".format(random.getrandbits(128))
+    self.name = name
+    self.attributes = attributes
+    self.start = time.time()
+    self.spans = []
+
+  def as_trace_events(self):
+    """Get the trace in Chrome trace event format.
+
+    Span, parent span and trace ids are kept in event args so that the
+    trace can be converted to OpenTelemetry spans.
+    """
+    pid = os.getpid()
+    events = []
+    for span in self.spans:
+      args = dict(span["attributes"])
+      args.update(
+          trace_id=self.trace_id,
+          span_id=span["span_id"],
+          parent_span_id=span["parent_span_id"],
+      )
+      events.append({
+          "name": span["name"],
+          "cat": "benchmark",
+          "ph": "X",
+          "ts": int(span["start"] * 1e6),
+          "dur": int((span["end"] - span["start"]) * 1e6),
+          "pid": pid,
+          "tid": span["thread_id"],
+          "args": args,
+      })
+    return {
+        "traceEvents": events,
+        "displayTimeUnit": "ms",
+        "otherData": dict(self.attributes, trace_id=self.trace_id,
+                          name=self.name),
+    }
+
+
+def _get_trace_sinks():
+  sinks = []
+  if settings.BENCHMARK_TRACE_DIR:
+    sinks.append(FileTraceSink(settings.BENCHMARK_TRACE_DIR))
+  return sinks
+
+
+def get_current_trace():
+  """Get trace that is recorded in the current thread or None."""
+  return getattr(_local, "trace", None)
+
+
+def start_trace(name, **attributes):
+  """Start recording benchmark spans of the current thread in a new trace."""
+  _local.trace = Trace(name, **attributes)
+  _local.span_ids = []
+  return _local.trace
+
+
+def finish_trace():
+  """Stop recording the current trace and write it to the trace sinks."""
+  trace = get_current_trace()
+  _local.trace = None
+  if trace is None or not trace.spans:
+    return trace
+  for sink in _get_trace_sinks():
+    sink.write(trace)
+  return trace
+
+
+class TraceBenchmark(object):
+  """Benchmark that records nested spans into the current trace.
+
+  Traces are started and finished for each request by the app. Benchmarks
+  that run outside of a started trace, such as in scripts, record the spans
+  of the outermost benchmark in an implicit trace of their own.
+
+  This benchmark is used when ``BENCHMARK_TRACE_DIR`` setting is set and
+  finished traces are written there in Chrome trace event format that can
+  be opened with chrome://tracing or Perfetto.
+  """
+
+  def __init__(self, message, func_name=None, metric_name=None,
+               **attributes):
+    # pylint: disable=unused-argument
+    self.message = message
+    self.metric_name = metric_name
+    self.attributes = attributes
+    self.span_id = None
+    self.start = 0
+    self._trace = None
+    self._implicit_trace = False
+
+  def __enter__(self):
+    self._trace = get_current_trace()
+    if self._trace is None:
+      self._trace = start_trace(self.message)
+      self._implicit_trace = True
+    span_ids = _local.span_ids
+    self.parent_span_id = span_ids[-1] if span_ids else None
+    self.span_id = "{:016x}".format(random.getrandbits(64))
+    span_ids.append(self.span_id)
+    _get_label_stack().append(self.message)
+    self.start = time.time()
+    return self
+
+  def __exit__(self, exc_type, exc_value, exc_trace):
+    end = time.time()
+    _get_label_stack().pop()
+    _observe(self.metric_name, end - self.start)
+    span_ids = getattr(_local, "span_ids", [])
+    if span_ids and span_ids[-1] == self.span_id:
+      span_ids.pop()
+    if exc_type is not None:
+      self.attributes["error"] = exc_type.__name__
+    self._trace.spans.append({
+        "name": self.message,
+        "span_id": self.span_id,
+        "parent_span_id": self.parent_span_id,
+        "thread_id": threading.current_thread().ident,
+        "start": self.start,
+        "end": end,
+        "attributes": self.attributes,
+    })
+    if self._implicit_trace:
+      finish_trace()
+
+  def set_attribute(self, key, value):
+    """Set attribute of the span."""
+    self.attributes[key] = value
+
+
 def get_benchmark():
   """Get a benchmark context manager."""
   if settings.DEBUG_BENCHMARK:
     DebugBenchmark.set_summary(settings.DEBUG_BENCHMARK)
     return DebugBenchmark
+  elif settings.BENCHMARK_TRACE_DIR:
+    return TraceBenchmark
   else:
     return BenchmarkContextManager
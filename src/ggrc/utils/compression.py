@@ -0,0 +1,211 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""HTTP response compression.
+
+Responses are compressed with brotli (when the ``brotli`` module is
+installed) or gzip, depending on the ``Accept-Encoding`` request header.
+Buffered responses are compressed only if they are larger than
+``COMPRESSION_MIN_SIZE`` bytes. Streamed responses have unknown size when
+headers are sent, so they are always compressed chunk by chunk.
+
+Raw and compressed sizes are accumulated per endpoint and can be read with
+``get_stats``.
+"""
+
+import collections
+import logging
+import re
+import threading
+import zlib
+
+from ggrc import settings
+
+try:
+  import brotli
+except ImportError:
+  brotli = None  # pylint: disable=invalid-name
+
+
+logger = logging.getLogger(__name__)
+
+GZIP = "gzip"
+BROTLI = "br"
+
+COMPRESSIBLE_MIMETYPES = frozenset([
+    "application/json",
+    "application/javascript",
+    "text/csv",
+    "text/css",
+    "text/html",
+    "text/plain",
+])
+
+# Status codes which do not have a body worth compressing.
+_SKIP_STATUS_CODES = frozenset([204, 206, 304])
+
+_STATS_LOCK = threading.Lock()
+_STATS = collections.defaultdict(lambda: {
+    "count": 0,
+    "raw_bytes": 0,
+    "compressed_bytes": 0,
+})
+
+
+def _accepted_encodings(accept_encoding):
+  """Get set of encodings accepted by the client with non zero quality."""
+  accepted = set()
+  for item in accept_encoding.split(","):
+    parts = item.strip().split(";")
+    name = parts[0].strip().lower()
+    quality = 1.0
+    for param in parts[1:]:
+      match = re.match(r"\s*q\s*=\s*([0-9.]+)", param)
+      if match:
+        try:
+          quality = float(match.group(1))
+        except ValueError:
+          quality = 0
+    if name and quality > 0:
+      accepted.add(name)
+  return accepted
+
+
+def choose_encoding(accept_encoding):
+  """Choose the best supported encoding for Accept-Encoding header value."""
+  accepted = _accepted_encodings(accept_encoding or "")
+  if brotli is not None and BROTLI in accepted:
+    return BROTLI
+  if GZIP in accepted or "*" in accepted:
+    return GZIP
+  return None
+
+
+class _GzipCompressor(object):
+  """Incremental gzip compressor."""
+
+  def __init__(self):
+    self._compressor = zlib.compressobj(
+        settings.COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+  def compress(self, data):
+    return self._compressor.compress(data)
+
+  def flush(self):
+    """Flush pending data so the client can decode everything sent so far."""
+    return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+  def finish(self):
+    return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor(object):
+  """Incremental brotli compressor."""
+
+  def __init__(self):
+    self._compressor = brotli.Compressor(quality=settings.COMPRESSION_LEVEL)
+
+  def compress(self, data):
+    return self._compressor.process(data)
+
+  def flush(self):
+    return self._compressor.flush()
+
+  def finish(self):
+    return self._compressor.finish()
+
+
+COMPRESSORS = {
+    GZIP: _GzipCompressor,
+    BROTLI: _BrotliCompressor,
+}
+
+
+def compress(data, encoding):
+  """Compress data with the given encoding."""
+  compressor = COMPRESSORS[encoding]()
+  return compressor.compress(data) + compressor.finish()
+
+
+def record_stats(endpoint, raw_bytes, compressed_bytes):
+  """Add raw and compressed response sizes for the endpoint."""
+  with _STATS_LOCK:
+    stats = _STATS[endpoint]
+    stats["count"] += 1
+    stats["raw_bytes"] += raw_bytes
+    stats["compressed_bytes"] += compressed_bytes
+  logger.debug("Compressed response for %s: %s -> %s bytes",
+               endpoint, raw_bytes, compressed_bytes)
+
+
+def get_stats():
+  """Get copy of per endpoint compression stats."""
+  with _STATS_LOCK:
+    return {endpoint: dict(stats) for endpoint, stats in _STATS.items()}
+
+
+def _compress_stream(chunks, encoding, endpoint):
+  """Compress iterable of chunks and record stats when it is exhausted."""
+  compressor = COMPRESSORS[encoding]()
+  raw_bytes = 0
+  compressed_bytes = 0
+  try:
+    for chunk in chunks:
+      if isinstance(chunk, unicode):
+        chunk = chunk.encode("utf-8")
+      raw_bytes += len(chunk)
+      data = compressor.compress(chunk) + compressor.flush()
+      if data:
+        compressed_bytes += len(data)
+        yield data
+    data = compressor.finish()
+    compressed_bytes += len(data)
+    yield data
+  finally:
+    if hasattr(chunks, "close"):
+      chunks.close()
+  record_stats(endpoint, raw_bytes, compressed_bytes)
+
+
+def _is_compressible(response):
+  """Check if response may be compressed at all."""
+  return (
+      200 <= response.status_code < 300 and
+      response.status_code not in _SKIP_STATUS_CODES and
+      not response.direct_passthrough and
+      "Content-Encoding" not in response.headers and
+      response.mimetype in COMPRESSIBLE_MIMETYPES
+  )
+
+
+def compress_response(request, response):
+  """Compress response body if the client accepts a supported encoding.
+
+  Args:
+    request: flask request for which the response was created.
+    response: flask response that is updated in place.
+  Returns:
+    The response.
+  """
+  if not _is_compressible(response):
+    return response
+  encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+  if encoding is None:
+    return response
+  endpoint = request.endpoint or request.path
+
+  if response.is_streamed:
+    response.response = _compress_stream(
+        response.response, encoding, endpoint)
+    response.headers.pop("Content-Length", None)
+  else:
+    data = response.get_data()
+    if len(data) < settings.COMPRESSION_MIN_SIZE:
+      return response
+    compressed = compress(data, encoding)
+    response.set_data(compressed)
+    record_stats(endpoint, len(data), len(compressed))
+
+  response.headers["Content-Encoding"] = encoding
+  response.vary.add("Accept-Encoding")
+  return response
@@ -0,0 +1,139 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""JSON encoding backends for API responses.
+
+The backend is selected with the ``JSON_ENCODER`` setting. With the default
+"auto" value a C accelerated library is used when it is installed, otherwise
+the stdlib ``json`` module is used. All backends produce the same output as
+``ggrc.utils.as_json``.
+
+Large responses can be encoded chunk by chunk with ``iterencode`` and sent
+with ``stream_response`` so that the whole encoded payload does not have to be
+built as a single string.
+"""
+
+import json
+import logging
+
+import flask
+
+from ggrc import settings
+from ggrc.utils import json_default
+
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_BACKEND = None
+
+
+def _load_simplejson():
+  """Get simplejson encoder if it is installed with its C speedups."""
+  import simplejson
+  from simplejson import encoder
+  if encoder.c_make_encoder is None:
+    raise ImportError("simplejson C speedups are not available")
+
+  def simplejson_dumps(obj):
+    # namedtuples are encoded as lists by the stdlib json module
+    return simplejson.dumps(obj, default=json_default,
+                            namedtuple_as_object=False)
+  return simplejson_dumps
+
+
+def _load_json():
+  """Get stdlib json encoder."""
+  def json_dumps(obj):
+    return json.dumps(obj, default=json_default)
+  return json_dumps
+
+
+BACKENDS = (
+    ("simplejson", _load_simplejson),
+    ("json", _load_json),
+)
+
+
+def _load_backend(name):
+  """Load encoder for the backend name, "auto" picks the first available."""
+  for backend_name, loader in BACKENDS:
+    if name not in ("auto", backend_name):
+      continue
+    try:
+      return backend_name, loader()
+    except ImportError:
+      if name != "auto":
+        logger.warning("JSON encoder '%s' is not available, "
+                       "falling back to stdlib json.", name)
+        break
+  return "json", _load_json()
+
+
+def get_backend():
+  """Get (name, dumps function) pair of the configured encoding backend."""
+  global _BACKEND  # pylint: disable=global-statement
+  if _BACKEND is None:
+    _BACKEND = _load_backend(getattr(settings, "JSON_ENCODER", "auto"))
+  return _BACKEND
+
+
+def dumps(obj):
+  """Encode obj to JSON string with the configured backend."""
+  _, backend_dumps = get_backend()
+  return backend_dumps(obj)
+
+
+def _iter_pieces(obj):
+  """Yield encoded pieces of obj.
+
+  Dicts are split into keys and values and lists into items so that large
+  collections are never encoded as a single string. Items of lists are
+  encoded as a whole.
+  """
+  if isinstance(obj, dict) and all(isinstance(key, basestring)
+                                   for key in obj):
+    yield "{"
+    for idx, (key, value) in enumerate(obj.iteritems()):
+      yield (", " if idx else "") + dumps(key) + ": "
+      for piece in _iter_pieces(value):
+        yield piece
+    yield "}"
+  elif isinstance(obj, (list, tuple)):
+    yield "["
+    for idx, item in enumerate(obj):
+      yield (", " if idx else "") + dumps(item)
+    yield "]"
+  else:
+    yield dumps(obj)
+
+
+def iterencode(obj, chunk_size=STREAM_CHUNK_SIZE):
+  """Encode obj to JSON and yield the result in chunks of about chunk_size."""
+  buf = []
+  size = 0
+  for piece in _iter_pieces(obj):
+    buf.append(piece)
+    size += len(piece)
+    if size >= chunk_size:
+      yield "".join(buf)
+      buf = []
+      size = 0
+  if buf:
+    yield "".join(buf)
+
+
+def stream_response(obj, status=200, headers=None):
+  """Build response that encodes obj to JSON while it is being sent.
+
+  The request context is kept during streaming so that values which are
+  converted lazily by ``json_default`` can still be resolved.
+  """
+  if headers is None:
+    headers = [("Content-Type", "application/json")]
+  return flask.current_app.response_class(
+      flask.stream_with_context(iterencode(obj)),
+      status=status,
+      headers=headers,
+  )
@@ -0,0 +1,208 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Pointers to the latest revision of every resource.
+
+Finding the latest revision of an object with MAX(revisions.id) has to go
+through all revisions of that object. The latest_revisions table keeps the
+id of the latest revision per resource instead. It is updated whenever
+revisions are written and all latest revision lookups should go through
+get_latest_revision_ids.
+
+Resources without a pointer, for example before the backfill task has run,
+are still looked up in the revisions table.
+"""
+
+from logging import getLogger
+
+import sqlalchemy as sa
+from sqlalchemy.orm.session import Session
+
+from ggrc import db
+from ggrc.models.revision import LatestRevision
+from ggrc.models.revision import Revision
+from ggrc.utils import benchmark
+from ggrc.utils import list_chunks
+
+logger = getLogger(__name__)
+
+# Width of the revision id range processed by one backfill statement.
+BACKFILL_CHUNK_SIZE = 10000
+
+_PENDING_KEY = "pending_latest_revisions"
+
+_UPSERT_SQL = sa.text("""
+    INSERT INTO latest_revisions (resource_type, resource_id, revision_id)
+    VALUES (:resource_type, :resource_id, :revision_id)
+    ON DUPLICATE KEY UPDATE
+        revision_id = GREATEST(revision_id, VALUES(revision_id))
+""")
+
+_BACKFILL_SQL = sa.text("""
+    INSERT INTO latest_revisions (resource_type, resource_id, revision_id)
+    SELECT resource_type, resource_id, MAX(id)
+    FROM revisions
+    WHERE id BETWEEN :min_id AND :max_id
+    GROUP BY resource_type, resource_id
+    ON DUPLICATE KEY UPDATE
+        revision_id = GREATEST(revision_id, VALUES(revision_id))
+""")
+
+
+_REFRESH_EVENT_SQL = sa.text("""
+    INSERT INTO latest_revisions (resource_type, resource_id, revision_id)
+    SELECT resource_type, resource_id, MAX(id)
+    FROM revisions
+    WHERE event_id = :event_id
+    GROUP BY resource_type, resource_id
+    ON DUPLICATE KEY UPDATE
+        revision_id = GREATEST(revision_id, VALUES(revision_id))
+""")
+
+
+def upsert(rows, connection=None):
+  """Point resources to new revisions unless they have newer ones already.
+
+  Args:
+    rows: iterable of (resource_type, resource_id, revision_id) tuples.
+    connection: connection to write pointers with, the session by default.
+  """
+  params = [{
+      "resource_type": resource_type,
+      "resource_id": resource_id,
+      "revision_id": revision_id,
+  } for resource_type, resource_id, revision_id in rows]
+  if params:
+    (connection or db.session).execute(_UPSERT_SQL, params)
+
+
+def refresh_event(connection, event_id):
+  """Update pointers of resources with revisions of the event.
+
+  Used by migrations that insert revisions with INSERT ... SELECT.
+  """
+  connection.execute(_REFRESH_EVENT_SQL, event_id=event_id)
+
+
+def _get_max_revision_ids(stubs, filters=None):
+  """Get the latest revision ids by grouping revisions of resources."""
+  query = db.session.query(
+      sa.func.max(Revision.id),
+      Revision.resource_type,
+      Revision.resource_id,
+  ).filter(
+      sa.tuple_(Revision.resource_type, Revision.resource_id).in_(stubs),
+      *(filters or [])
+  ).group_by(
+      Revision.resource_type,
+      Revision.resource_id,
+  )
+  return {(type_, id_): rev_id for rev_id, type_, id_ in query}
+
+
+def refresh(stubs):
+  """Update pointers of resources whose revisions were bulk inserted.
+
+  Args:
+    stubs: iterable of (resource_type, resource_id) tuples.
+  """
+  for chunk in list_chunks(list(set(stubs))):
+    latest = _get_max_revision_ids(chunk)
+    upsert((type_, id_, rev_id) for (type_, id_), rev_id in latest.items())
+
+
+def get_latest_revision_ids(stubs, filters=None):
+  """Get ids of the latest revisions of resources.
+
+  Args:
+    stubs: iterable of (resource_type, resource_id) tuples.
+    filters: additional predicates on revisions. A resource whose latest
+      revision does not satisfy them gets the latest one that does.
+
+  Returns:
+    dict mapping (resource_type, resource_id) to revision id.
+  """
+  stubs = {tuple(stub) for stub in stubs}
+  if not stubs:
+    return {}
+  with benchmark("latest_revisions.get_latest_revision_ids"):
+    query = db.session.query(
+        LatestRevision.revision_id,
+        LatestRevision.resource_type,
+        LatestRevision.resource_id,
+    ).join(
+        Revision,
+        Revision.id == LatestRevision.revision_id,
+    ).filter(
+        sa.tuple_(
+            LatestRevision.resource_type,
+            LatestRevision.resource_id,
+        ).in_(stubs),
+        *(filters or [])
+    )
+    result = {(type_, id_): rev_id for rev_id, type_, id_ in query}
+    missing = stubs.difference(result)
+    if missing:
+      result.update(_get_max_revision_ids(missing, filters))
+    return result
+
+
+def get_latest_revision_id(resource_type, resource_id):
+  """Get id of the latest revision of a single resource or None."""
+  key = (resource_type, resource_id)
+  return get_latest_revision_ids([key]).get(key)
+
+
+def track(session, revisions):
+  """Update pointers of new revisions once the session flushes them."""
+  session.info.setdefault(_PENDING_KEY, []).extend(revisions)
+
+
+def _after_flush(session, _):
+  """Point resources to revisions tracked with track and just flushed."""
+  pending = session.info.pop(_PENDING_KEY, None)
+  if not pending:
+    return
+  rows = {}
+  for revision in pending:
+    if revision.id is None:
+      track(session, [revision])
+      continue
+    key = (revision.resource_type, revision.resource_id)
+    rows[key] = max(rows.get(key), revision.id)
+  if rows:
+    session.execute(_UPSERT_SQL, [{
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "revision_id": revision_id,
+    } for (resource_type, resource_id), revision_id in rows.items()])
+
+
+def _after_rollback(session):
+  session.info.pop(_PENDING_KEY, None)
+
+
+def backfill():
+  """Populate pointers of all existing revisions.
+
+  Revisions are processed in id ranges committed one by one. Pointers only
+  move forward, so the backfill can be interrupted, run again and run while
+  new revisions are being written.
+  """
+  min_id, max_id = db.session.query(
+      sa.func.min(Revision.id),
+      sa.func.max(Revision.id),
+  ).one()
+  if min_id is None:
+    return
+  for start in xrange(min_id, max_id + 1, BACKFILL_CHUNK_SIZE):
+    end = start + BACKFILL_CHUNK_SIZE - 1
+    with benchmark("Backfill latest revisions"):
+      db.session.execute(_BACKFILL_SQL, {"min_id": start, "max_id": end})
+      db.session.commit()
+    logger.info("Backfilled latest revisions up to revision %s of %s",
+                min(end, max_id), max_id)
+
+
+sa.event.listen(Session, "after_flush", _after_flush)
+sa.event.listen(Session, "after_rollback", _after_rollback)
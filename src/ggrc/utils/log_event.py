@@ -3,30 +3,32 @@
 
 """Utils for event logging"""
 
+import datetime
 import itertools
 
 from logging import getLogger
 from flask import request
+import sqlalchemy as sa
 
 from ggrc.models.cache import Cache
 from ggrc.models.event import Event
 from ggrc.models.revision import Revision
 from ggrc.login import get_current_user_id
+from ggrc.utils import latest_revisions
+from ggrc.utils import list_chunks
 
 logger = getLogger(__name__)
 
+# Number of revisions written by one multi-row INSERT in bulk mode.
+BULK_INSERT_CHUNK_SIZE = 500
 
-def _revision_generator(user_id, action, objects):
-  for obj in objects:
-    yield Revision(obj, user_id, action, obj.log_json())
 
-
-def _get_log_revisions(current_user_id, obj=None, force_obj=False):
-  """Generate and return revisions for all cached objects."""
-  revisions = []
+def _get_log_changes(obj=None, force_obj=False):
+  """Get (object, action) pairs for all cached objects."""
+  changes = []
   cache = Cache.get_cache()
   if not cache:
-    return revisions
+    return changes
   modified_objects = set(cache.dirty)
   new_objects = set(cache.new)
   delete_objects = set(cache.deleted)
@@ -45,28 +47,71 @@ def _get_log_revisions(current_user_id, obj=None, force_obj=False):
               documentable not in delete_objects):
         modified_objects.add(documentable)
 
-  revisions.extend(_revision_generator(
-      current_user_id, "created", cache.new
-  ))
-  revisions.extend(_revision_generator(
-      current_user_id, "modified", modified_objects
-  ))
+  changes.extend((new_obj, "created") for new_obj in cache.new)
+  changes.extend((dirty_obj, "modified") for dirty_obj in modified_objects)
   if force_obj and obj is not None and obj not in cache.dirty:
     # If the ``obj`` has been updated, but only its custom attributes have
     # been changed, then this object will not be added into
     # ``cache.dirty set``. So that its revision will not be created.
     # The ``force_obj`` flag solves the issue, but in a bit dirty way.
-    revision = Revision(obj, current_user_id, 'modified', obj.log_json())
-    revisions.append(revision)
-  revisions.extend(_revision_generator(
-      current_user_id, "deleted", cache.deleted
-  ))
-  return revisions
+    changes.append((obj, "modified"))
+  changes.extend((deleted_obj, "deleted") for deleted_obj in cache.deleted)
+  return changes
+
+
+def _get_log_revisions(current_user_id, obj=None, force_obj=False):
+  """Generate and return revisions for all cached objects."""
+  return [
+      Revision(changed_obj, current_user_id, action, changed_obj.log_json())
+      for changed_obj, action in _get_log_changes(obj, force_obj)
+  ]
+
+
+def _get_log_rows(current_user_id, obj=None, force_obj=False):
+  """Generate and return revision rows for all cached objects."""
+  return [
+      Revision.build_row(changed_obj, current_user_id, action,
+                         changed_obj.log_json())
+      for changed_obj, action in _get_log_changes(obj, force_obj)
+  ]
+
+
+def _insert_revisions(session, event_id, rows):
+  """Write revision rows with multi-row INSERTs.
+
+  Ids of a multi-row INSERT are increasing in the order of rows, so the ids
+  of the new rows of the event starting at the first inserted id belong to
+  the rows in the same order.
+
+  Returns:
+    list of ids of the inserted revisions.
+  """
+  table = Revision.__table__
+  now = datetime.datetime.utcnow().replace(microsecond=0)
+  revision_ids = []
+  for chunk in list_chunks(rows, BULK_INSERT_CHUNK_SIZE):
+    for row in chunk:
+      row.update(event_id=event_id, created_at=now, updated_at=now)
+    first_id = session.execute(table.insert().values(chunk)).lastrowid
+    chunk_ids = [row.id for row in session.execute(
+        sa.select([table.c.id]).where(
+            sa.and_(
+                table.c.event_id == event_id,
+                table.c.id >= first_id,
+            )
+        ).order_by(table.c.id)
+    )]
+    latest_revisions.upsert(
+        (row["resource_type"], row["resource_id"], revision_id)
+        for row, revision_id in zip(chunk, chunk_ids)
+    )
+    revision_ids.extend(chunk_ids)
+  return revision_ids
 
 
 # pylint: disable-msg=too-many-arguments
 def log_event(session, obj=None, current_user_id=None, flush=True,
-              force_obj=False, event=None):
+              force_obj=False, event=None, bulk=False):
   """Logs an event on object `obj`.
 
   Args:
@@ -76,14 +121,22 @@ def log_event(session, obj=None, current_user_id=None, flush=True,
     flush: If set to true, flush the session at the start
     force_obj: Used in case of custom attribute changes to force revision write
     event: event object to log
+    bulk: If set to true, write revisions with multi-row Core INSERTs
+      instead of adding Revision instances to the session. Ids of such
+      revisions are available in event.revision_ids. The session is always
+      flushed in bulk mode.
   Returns:
     Uncommitted models.Event instance
   """
-  if flush:
+  if flush or bulk:
     session.flush()
   if current_user_id is None:
     current_user_id = get_current_user_id()
-  revisions = _get_log_revisions(current_user_id, obj=obj, force_obj=force_obj)
+  if bulk:
+    revisions = _get_log_rows(current_user_id, obj=obj, force_obj=force_obj)
+  else:
+    revisions = _get_log_revisions(current_user_id, obj=obj,
+                                   force_obj=force_obj)
   if obj is None:
     resource_id = 0
     resource_type = None
@@ -108,5 +161,11 @@ def log_event(session, obj=None, current_user_id=None, flush=True,
         resource_type=resource_type,
     )
     session.add(event)
+  if bulk:
+    session.flush()
+    event.bulk_revision_ids = (list(event.bulk_revision_ids) +
+                               _insert_revisions(session, event.id, revisions))
+    return event
   event.revisions.extend(revisions)
+  latest_revisions.track(session, revisions)
   return event
@@ -9,6 +9,8 @@ import zlib
 
 import cPickle
 
+from ggrc.utils import metrics
+
 logger = logging.getLogger(__name__)
 
 MEMCACHE_MAX_ITEM_SIZE = 10 ** 6 - 1
@@ -80,6 +82,7 @@ def blob_get(cache, key, key_prefix="", namespace=None):
   """
   chunk_keys = blob_get_chunk_keys(cache, key, namespace)
   if not chunk_keys:
+    metrics.count_memcache("blob", False)
     return None
 
   chunk_map = cache.get_multi(
@@ -87,6 +90,7 @@ def blob_get(cache, key, key_prefix="", namespace=None):
       key_prefix=key_prefix,
       namespace=namespace
   )
+  metrics.count_memcache("blob", bool(chunk_map))
   if not chunk_map:
     return None
 
@@ -0,0 +1,384 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""In-process runtime metrics with Prometheus text exposition.
+
+Metrics are registered once on module level and updated with label values:
+
+..  code-block:: python
+
+    TASKS = metrics.counter("ggrc_tasks_total", "Finished tasks.", ("name",))
+    TASKS.inc(name="reindex")
+
+Values are kept in memory of the process. If ``METRICS_DIR`` is set, each
+process periodically writes its values to a file in that directory and
+``render`` sums values from files of all processes, so that ``/metrics``
+shows the same numbers whichever worker handles the scrape. Files of
+processes that are no longer running are removed, which Prometheus sees as
+a counter reset. Updates are ignored when ``METRICS_ENABLED`` is off.
+
+Label values should come from a small fixed set, every label value combination
+is kept in memory and in the files for the lifetime of the process.
+"""
+
+import collections
+import errno
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+
+from ggrc import settings
+
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0)
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_LOCK = threading.Lock()
+_METRICS = collections.OrderedDict()
+_LAST_FLUSH = [0.0]
+# Random token per pid, so that a process reusing the pid of a finished one
+# does not take over its file.
+_PROCESS_TOKENS = {}
+_PROCESS_FILE_RE = re.compile(r"^metrics-(\d+)-(\w+)\.json$")
+
+
+def _enabled():
+  return getattr(settings, "METRICS_ENABLED", False)
+
+
+class _Metric(object):
+  """Base class for metrics with a fixed set of label names."""
+
+  type_ = None
+
+  def __init__(self, name, documentation, labelnames=()):
+    self.name = name
+    self.documentation = documentation
+    self.labelnames = tuple(labelnames)
+    self.values = {}
+
+  def _key(self, labels):
+    """Get tuple of label values in the order of label names."""
+    if set(labels) != set(self.labelnames):
+      raise ValueError("Metric {} expects labels {}, got {}".format(
+          self.name, self.labelnames, sorted(labels)))
+    return tuple(unicode(labels[name]) for name in self.labelnames)
+
+  def reset(self):
+    with _LOCK:
+      self.values.clear()
+
+  def dump(self):
+    """Get JSON serializable copy of the metric."""
+    with _LOCK:
+      values = [[list(key), list(value) if isinstance(value, list) else value]
+                for key, value in self.values.iteritems()]
+    return {
+        "type": self.type_,
+        "help": self.documentation,
+        "labelnames": list(self.labelnames),
+        "values": values,
+    }
+
+
+class Counter(_Metric):
+  """Monotonically increasing value."""
+
+  type_ = "counter"
+
+  def inc(self, amount=1, **labels):
+    """Increase counter for the given label values."""
+    if not _enabled():
+      return
+    key = self._key(labels)
+    with _LOCK:
+      self.values[key] = self.values.get(key, 0) + amount
+
+
+class Histogram(_Metric):
+  """Distribution of observed values in buckets.
+
+  Values are stored as counts per bucket followed by the sum of observed
+  values, counts are made cumulative on exposition.
+  """
+
+  type_ = "histogram"
+
+  def __init__(self, name, documentation, labelnames=(),
+               buckets=DEFAULT_BUCKETS):
+    super(Histogram, self).__init__(name, documentation, labelnames)
+    self.buckets = tuple(sorted(buckets))
+
+  def observe(self, value, **labels):
+    """Add an observed value for the given label values."""
+    if not _enabled():
+      return
+    key = self._key(labels)
+    idx = len(self.buckets)
+    for bucket_idx, bound in enumerate(self.buckets):
+      if value <= bound:
+        idx = bucket_idx
+        break
+    with _LOCK:
+      counts = self.values.get(key)
+      if counts is None:
+        # one bucket per bound, +Inf bucket and sum
+        counts = self.values[key] = [0] * (len(self.buckets) + 2)
+      counts[idx] += 1
+      counts[-1] += value
+
+  def dump(self):
+    result = super(Histogram, self).dump()
+    result["buckets"] = list(self.buckets)
+    return result
+
+
+def _register(metric):
+  with _LOCK:
+    existing = _METRICS.get(metric.name)
+    if existing is not None:
+      return existing
+    _METRICS[metric.name] = metric
+  return metric
+
+
+def counter(name, documentation, labelnames=()):
+  """Get registered counter, register it if it does not exist."""
+  return _register(Counter(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+  """Get registered histogram, register it if it does not exist."""
+  return _register(Histogram(name, documentation, labelnames, buckets))
+
+
+def dump():
+  """Get JSON serializable values of all metrics of this process."""
+  return {name: metric.dump() for name, metric in _METRICS.items()}
+
+
+def reset():
+  """Reset values of all metrics of this process."""
+  for metric in _METRICS.values():
+    metric.reset()
+
+
+def _process_file(directory):
+  """Get path of the metrics file of this process."""
+  pid = os.getpid()
+  token = _PROCESS_TOKENS.get(pid)
+  if token is None:
+    token = _PROCESS_TOKENS[pid] = uuid.uuid4().hex[:8]
+  return os.path.join(directory, "metrics-{}-{}.json".format(pid, token))
+
+
+def _is_running(pid):
+  """Check if a process with the pid is running on this host."""
+  try:
+    os.kill(pid, 0)
+  except OSError as err:
+    return err.errno == errno.EPERM
+  return True
+
+
+def _is_stale(name):
+  """Check if a metrics file belongs to a process that is not running.
+
+  A file with the pid of this process and another token was written by a
+  finished process with the same pid.
+  """
+  match = _PROCESS_FILE_RE.match(name)
+  if not match:
+    return True
+  pid = int(match.group(1))
+  return pid == os.getpid() or not _is_running(pid)
+
+
+def flush(force=False):
+  """Write metrics of this process to METRICS_DIR.
+
+  Writes are throttled to one per METRICS_FLUSH_INTERVAL unless force is set.
+  """
+  directory = settings.METRICS_DIR
+  if not directory:
+    return
+  now = time.time()
+  if not force and now - _LAST_FLUSH[0] < settings.METRICS_FLUSH_INTERVAL:
+    return
+  _LAST_FLUSH[0] = now
+  path = _process_file(directory)
+  tmp_path = "{}.tmp".format(path)
+  try:
+    if not os.path.isdir(directory):
+      os.makedirs(directory)
+    with open(tmp_path, "w") as metrics_file:
+      json.dump(dump(), metrics_file)
+    os.rename(tmp_path, path)
+  except (IOError, OSError):
+    logger.warning("Unable to write metrics to %s", path, exc_info=True)
+
+
+def _load_dumps():
+  """Get dumps of this process and of other processes from METRICS_DIR."""
+  dumps = [dump()]
+  directory = settings.METRICS_DIR
+  if not directory or not os.path.isdir(directory):
+    return dumps
+  own_file = os.path.basename(_process_file(directory))
+  for name in os.listdir(directory):
+    if name == own_file or not name.startswith("metrics-") or (
+        not name.endswith(".json")):
+      continue
+    if _is_stale(name):
+      try:
+        os.remove(os.path.join(directory, name))
+      except OSError:
+        logger.warning("Unable to remove metrics file %s", name,
+                       exc_info=True)
+      continue
+    try:
+      with open(os.path.join(directory, name)) as metrics_file:
+        dumps.append(json.load(metrics_file))
+    except (IOError, OSError, ValueError):
+      logger.warning("Unable to read metrics file %s", name, exc_info=True)
+  return dumps
+
+
+def merge(dumps):
+  """Sum values of metric dumps from several processes."""
+  merged = collections.OrderedDict()
+  for metrics_dump in dumps:
+    for name, data in sorted(metrics_dump.iteritems()):
+      target = merged.setdefault(name, dict(data, values={}))
+      if target["type"] != data["type"] or (
+          target.get("buckets") != data.get("buckets")):
+        logger.warning("Metric %s has different definitions", name)
+        continue
+      for key, value in data["values"]:
+        key = tuple(key)
+        current = target["values"].get(key)
+        if current is None:
+          target["values"][key] = value
+        elif isinstance(value, list):
+          target["values"][key] = [a + b for a, b in zip(current, value)]
+        else:
+          target["values"][key] = current + value
+  return merged
+
+
+def _escape(value):
+  return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, key, extra=()):
+  pairs = list(zip(labelnames, key)) + list(extra)
+  if not pairs:
+    return ""
+  return "{" + ",".join(u'{}="{}"'.format(name, _escape(value))
+                        for name, value in pairs) + "}"
+
+
+def _format_value(value):
+  if isinstance(value, float):
+    return repr(value)
+  return str(value)
+
+
+def _render_metric(name, data):
+  """Get exposition lines of a merged metric."""
+  lines = [
+      u"# HELP {} {}".format(name, _escape(data["help"])),
+      u"# TYPE {} {}".format(name, data["type"]),
+  ]
+  labelnames = data["labelnames"]
+  for key, value in sorted(data["values"].iteritems()):
+    if data["type"] != "histogram":
+      lines.append(u"{}{} {}".format(
+          name, _format_labels(labelnames, key), _format_value(value)))
+      continue
+    cumulative = 0
+    bounds = [repr(float(bound)) for bound in data["buckets"]] + ["+Inf"]
+    for bound, count in zip(bounds, value[:-1]):
+      cumulative += count
+      lines.append(u"{}_bucket{} {}".format(
+          name, _format_labels(labelnames, key, [("le", bound)]), cumulative))
+    lines.append(u"{}_sum{} {}".format(
+        name, _format_labels(labelnames, key), _format_value(value[-1])))
+    lines.append(u"{}_count{} {}".format(
+        name, _format_labels(labelnames, key), cumulative))
+  return lines
+
+
+def render():
+  """Get metrics of all processes in Prometheus text exposition format."""
+  flush(force=True)
+  lines = []
+  for name, data in merge(_load_dumps()).iteritems():
+    lines.extend(_render_metric(name, data))
+  return u"\n".join(lines) + u"\n"
+
+
+REQUEST_DURATION = histogram(
+    "ggrc_http_request_duration_seconds",
+    "Time spent handling HTTP requests.",
+    ("method", "endpoint", "status"),
+)
+REQUEST_SQL_QUERIES = histogram(
+    "ggrc_http_request_sql_queries",
+    "Number of SQL queries executed by one HTTP request.",
+    ("method", "endpoint"),
+    buckets=COUNT_BUCKETS,
+)
+SQL_QUERIES = counter(
+    "ggrc_sql_queries_total",
+    "Executed SQL queries.",
+)
+BENCHMARK_DURATION = histogram(
+    "ggrc_benchmark_duration_seconds",
+    "Time spent in benchmark blocks with a metric name.",
+    ("name",),
+)
+MEMCACHE_REQUESTS = counter(
+    "ggrc_memcache_requests_total",
+    "Memcache lookups by result.",
+    ("cache", "result"),
+)
+BACKGROUND_TASK_DURATION = histogram(
+    "ggrc_background_task_duration_seconds",
+    "Time spent running background tasks.",
+    ("task", "status"),
+)
+REINDEXED_OBJECTS = counter(
+    "ggrc_reindexed_objects_total",
+    "Objects written to the full text index by reindex.",
+    ("model",),
+)
+
+ACL_PROPAGATION_ENTRIES = counter(
+    "ggrc_acl_propagation_entries_total",
+    "Non propagated ACL entries processed by full ACL propagation.",
+)
+LOG_JSON_CALLS = counter(
+    "ggrc_log_json_calls_total",
+    "log_json calls by model and by memo result, misses are recomputations.",
+    ("model", "result"),
+)
+
+
+def count_memcache(cache, hit):
+  """Count a memcache lookup for the cache name."""
+  MEMCACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def count_log_json(model, hit):
+  """Count a log_json call of the model served from memo or recomputed."""
+  LOG_JSON_CALLS.inc(model=model, result="hit" if hit else "miss")
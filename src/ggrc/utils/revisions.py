@@ -5,12 +5,22 @@
 
 from logging import getLogger
 
+import sqlalchemy as sa
+
 from ggrc import db
+from ggrc import settings
+from ggrc import utils
 from ggrc.models import all_models
+from ggrc.models import types
+from ggrc.models.revision import LatestRevision
+from ggrc.utils import latest_revisions
 
 
 logger = getLogger(__name__)
 
+# Width of the revision id range recompressed in one commit.
+RECOMPRESS_CHUNK_SIZE = 1000
+
 
 def _get_new_objects():
   """Returns list of new objects"""
@@ -44,6 +54,7 @@ def build_revision_body(obj_id, obj_type, obj_content, event_id, action,
       "event_id": event_id,
       "action": action,
       "content": obj_content,
+      "content_version": all_models.Revision.CONTENT_VERSION,
       "context_id": obj_content.get("context_id"),
       "modified_by_id": modified_by_id,
       "source_type": obj_content.get("source_type"),
@@ -102,6 +113,9 @@ def do_missing_revisions():
             obj_id, obj_type, obj_content, event.id, action, modified_by_id
         ))
     db.session.execute(revisions_table.insert(), revisions)
+    latest_revisions.refresh(
+        (rev["resource_type"], rev["resource_id"]) for rev in revisions
+    )
     db.session.commit()
   db.session.execute("truncate objects_without_revisions")
 
@@ -112,9 +126,10 @@ def get_last_revision_content(obj_type, obj_id):
    we need to get content of latest known revision
    """
   content = None
-  last_revision = all_models.Revision.query.filter_by(
-      resource_type=obj_type, resource_id=obj_id
-  ).order_by(all_models.Revision.created_at.desc()).first()
+  last_revision_id = latest_revisions.get_latest_revision_id(obj_type, obj_id)
+  last_revision = None
+  if last_revision_id is not None:
+    last_revision = all_models.Revision.query.get(last_revision_id)
   if last_revision and last_revision.action == u"deleted":
     logger.info("Deleted revision already logged for Object '%s' "
                 "with id '%s', 'deleted' revision generation skipped",
@@ -122,3 +137,94 @@ def get_last_revision_content(obj_type, obj_id):
   else:
     content = last_revision.content if last_revision else None
   return content
+
+
+def _byte_length(value):
+  if isinstance(value, unicode):
+    value = value.encode("utf-8")
+  return len(value)
+
+
+def recompress_revisions_content(chunk_size=RECOMPRESS_CHUNK_SIZE):
+  """Store content of all revisions with the current JSON compression.
+
+  Revisions are processed in id ranges of chunk_size ids and every range is
+  committed separately. Content that is already stored with the current
+  codec is not rewritten. With an empty codec compressed content is stored
+  as plain JSON again.
+
+  Returns:
+    dict with numbers of rewritten revisions and of stored content bytes
+    before and after the recompression.
+  """
+  revisions_table = all_models.Revision.__table__
+  raw_content = sa.type_coerce(revisions_table.c.content, sa.Text)
+  update_statement = revisions_table.update().where(
+      revisions_table.c.id == sa.bindparam("_id")
+  ).values(
+      content=sa.bindparam("_content"),
+      updated_at=revisions_table.c.updated_at,
+  )
+  codec = settings.JSON_COMPRESSION_CODEC
+  stats = {"rewritten": 0, "bytes_before": 0, "bytes_after": 0}
+  min_id, max_id = db.session.query(
+      sa.func.min(revisions_table.c.id),
+      sa.func.max(revisions_table.c.id),
+  ).one()
+  if min_id is None:
+    return stats
+  for start in xrange(min_id, max_id + 1, chunk_size):
+    rows = db.session.execute(sa.select([
+        revisions_table.c.id,
+        raw_content.label("content"),
+    ]).where(
+        revisions_table.c.id.between(start, start + chunk_size - 1)
+    ))
+    payload = []
+    for row in rows:
+      stored_codec = types.get_json_codec(row.content)
+      if stored_codec == (codec or None):
+        continue
+      content = types.compress_json(types.decompress_json(row.content),
+                                    codec=codec)
+      if content == row.content:
+        continue
+      payload.append({"_id": row.id, "_content": content})
+      stats["bytes_before"] += _byte_length(row.content)
+      stats["bytes_after"] += _byte_length(content)
+    if payload:
+      db.session.execute(update_statement, payload)
+      db.session.commit()
+      stats["rewritten"] += len(payload)
+    logger.info("Recompressed revisions up to id %s of %s: %s",
+                min(start + chunk_size - 1, max_id), max_id, stats)
+  return stats
+
+
+def get_revisions_by_type(resource_type):
+  """Get ids of the latest revisions of all objects of the given type.
+
+  Objects without a latest revision pointer, for example before the backfill
+  task has run, are looked up in the revisions table.
+
+  Returns:
+    dict mapping object id to its latest revision id.
+  """
+  query = db.session.query(
+      LatestRevision.resource_id,
+      LatestRevision.revision_id,
+  ).filter(
+      LatestRevision.resource_type == resource_type,
+  )
+  result = dict(query)
+  model = getattr(all_models, resource_type, None)
+  if model is None:
+    return result
+  missing = [(resource_type, obj_id)
+             for obj_id, in db.session.query(model.id)
+             if obj_id not in result]
+  for chunk in utils.list_chunks(missing):
+    latest = latest_revisions.get_latest_revision_ids(chunk)
+    result.update((obj_id, revision_id)
+                  for (_, obj_id), revision_id in latest.iteritems())
+  return result
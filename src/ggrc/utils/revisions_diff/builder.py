@@ -5,27 +5,30 @@
 instance state and proposed content."""
 
 import collections
+import copy
+import hashlib
 
 from flask import g
 
+from ggrc import settings
+from ggrc.utils import benchmark
 from ggrc.utils.revisions_diff import meta_info
 
 
+DIFF_CACHE_PREFIX = "revision_diff"
+
+
 def get_latest_revision_content(instance):
   """Returns latest revision for instance."""
   from ggrc.models import all_models
+  from ggrc.utils import latest_revisions
   if not hasattr(g, "latest_revision_content"):
     g.latest_revision_content = {}
   key = (instance.type, instance.id)
   content = g.latest_revision_content.get(key)
   if not content:
-    content = all_models.Revision.query.filter(
-        all_models.Revision.resource_id == instance.id,
-        all_models.Revision.resource_type == instance.type
-    ).order_by(
-        all_models.Revision.created_at.desc(),
-        all_models.Revision.id.desc(),
-    ).first().content
+    revision_id = latest_revisions.get_latest_revision_id(*key)
+    content = all_models.Revision.query.get(revision_id).content
     g.latest_revision_content[key] = content
   return content
 
@@ -40,6 +43,7 @@ def mark_for_latest_content(type_, id_):
 def rewarm_latest_content():
   """Rewarm cache for latest content for marked objects."""
   from ggrc.models import all_models
+  from ggrc.utils import latest_revisions
   if not hasattr(g, "latest_revision_content_markers"):
     return
   if not hasattr(g, "latest_revision_content"):
@@ -48,26 +52,15 @@ def rewarm_latest_content():
   del g.latest_revision_content_markers
   if not cache:
     return
-  query = all_models.Revision.query.filter(
-      all_models.Revision.resource_type == cache.keys()[0],
-      all_models.Revision.resource_id.in_(cache[cache.keys()[0]])
+  revision_ids = latest_revisions.get_latest_revision_ids(
+      (type_, id_) for type_, ids in cache.iteritems() for id_ in ids
   )
-  for type_, ids in cache.items()[1:]:
-    query = query.union_all(
-        all_models.Revision.query.filter(
-            all_models.Revision.resource_type == type_,
-            all_models.Revision.resource_id.in_(ids)
-        ))
-  query = query.order_by(
-      all_models.Revision.resource_id,
-      all_models.Revision.resource_type,
-      all_models.Revision.created_at.desc(),
-      all_models.Revision.id.desc(),
+  if not revision_ids:
+    return
+  query = all_models.Revision.query.filter(
+      all_models.Revision.id.in_(revision_ids.values())
   )
-  key = None
   for revision in query:
-    if key == (revision.resource_type, revision.resource_id):
-      continue
     key = (revision.resource_type, revision.resource_id)
     g.latest_revision_content[key] = revision.content
 
@@ -333,3 +326,96 @@ def prepare_content_diff(instance_meta_info, l_content, r_content):
   )
 
   return diff
+
+
+def get_revision_contents(revision_ids):
+  """Get contents of revisions with a single query.
+
+  Returns:
+    dict mapping revision id to its content.
+  """
+  from ggrc.models import all_models
+  revision_ids = {rev_id for rev_id in revision_ids if rev_id is not None}
+  if not revision_ids:
+    return {}
+  query = all_models.Revision.query.filter(
+      all_models.Revision.id.in_(revision_ids)
+  )
+  return {revision.id: revision.content for revision in query}
+
+
+def _get_meta_signature(instance_meta_info):
+  """Get a short hash of the meta info the diffs depend on."""
+  cads = sorted((cad.id, cad.attribute_type, cad.default_value)
+                for cad in instance_meta_info.cads)
+  acr_ids = sorted(acr.id for acr in instance_meta_info.acrs)
+  return hashlib.md5(repr((cads, acr_ids))).hexdigest()[:12]
+
+
+def _get_diff_cache_key(instance, signature, pair):
+  return "{}:{}:{}:{}:{}:{}".format(DIFF_CACHE_PREFIX, instance.type,
+                                    instance.id, signature, *pair)
+
+
+def _get_memcache_client():
+  """Get memcache client or None if memcache is disabled."""
+  from ggrc.cache import memcache
+  if not memcache.has_memcache():
+    return None
+  return memcache.memcache.Client()
+
+
+def prepare_revision_diffs(instance, revision_pairs):
+  """Prepare diffs between pairs of revisions of the instance.
+
+  Contents of all revisions are fetched with one query. Revision content
+  never changes, so a diff is cached in memcache by the pair of revision ids
+  together with a signature of the custom attribute definitions and roles
+  the diff is built with.
+
+  Args:
+    instance: object whose revisions are compared.
+    revision_pairs: iterable of (left revision id, right revision id). The
+      left id can be None to diff the right revision with empty content.
+
+  Returns:
+    dict mapping pairs to diffs built with prepare_content_diff.
+  """
+  revision_pairs = list(set(revision_pairs))
+  if not revision_pairs:
+    return {}
+  instance_meta_info = meta_info.MetaInfo(instance)
+  signature = _get_meta_signature(instance_meta_info)
+  keys = {pair: _get_diff_cache_key(instance, signature, pair)
+          for pair in revision_pairs}
+
+  client = _get_memcache_client()
+  cached = client.get_multi(keys.values()) if client else {}
+  diffs = {pair: cached[key] for pair, key in keys.iteritems()
+           if key in cached}
+  missing = [pair for pair in revision_pairs if pair not in diffs]
+  if not missing:
+    return diffs
+
+  with benchmark("Prepare revision diffs"):
+    contents = get_revision_contents(
+        rev_id for pair in missing for rev_id in pair
+    )
+    new_diffs = {}
+    for left_id, right_id in missing:
+      if right_id not in contents:
+        continue
+      # mapping fields are popped from the right content, the same content
+      # can be the left one of another pair
+      new_diffs[(left_id, right_id)] = prepare_content_diff(
+          instance_meta_info,
+          contents.get(left_id, {}),
+          copy.deepcopy(contents[right_id]),
+      )
+  if client and new_diffs:
+    client.set_multi(
+        {keys[pair]: diff for pair, diff in new_diffs.iteritems()},
+        time=settings.REVISION_DIFF_CACHE_TIMEOUT,
+    )
+  diffs.update(new_diffs)
+  return diffs
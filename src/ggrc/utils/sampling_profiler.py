@@ -0,0 +1,147 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Sampling profiler for production requests.
+
+A request is profiled if it is picked by ``PROFILER_SAMPLE_RATE`` or if its
+endpoint is listed in ``PROFILER_ENDPOINTS`` or the current user is listed in
+``PROFILER_USERS``. While a request is profiled, a sampler thread records the
+stack of the request thread every ``PROFILER_INTERVAL`` seconds. Requests that
+are not profiled do not pay anything but the selection check.
+
+Stacks are aggregated in memory of the instance in collapsed stack format
+("frame;frame;frame count" lines) which can be turned into a flame graph
+with tools such as flamegraph.pl or speedscope.
+"""
+
+import collections
+import logging
+import os
+import random
+import sys
+import threading
+
+import flask
+
+from ggrc import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Limit of different stacks kept in memory, new stacks above the limit are
+# counted under a single "[dropped]" stack.
+MAX_STACKS = 20000
+MAX_DEPTH = 100
+DROPPED_STACK = "[dropped]"
+
+_STACKS_LOCK = threading.Lock()
+_STACKS = collections.Counter()
+
+
+def _frame_name(frame):
+  """Get "module:function" name of a frame."""
+  code = frame.f_code
+  module = frame.f_globals.get("__name__") or os.path.basename(
+      code.co_filename)
+  return "{}:{}".format(module, code.co_name)
+
+
+def collapse_stack(frame, root):
+  """Get collapsed representation of the stack ending with the frame."""
+  names = []
+  while frame is not None and len(names) < MAX_DEPTH:
+    names.append(_frame_name(frame))
+    frame = frame.f_back
+  names.append(root)
+  return ";".join(reversed(names))
+
+
+def add_samples(samples):
+  """Add counted collapsed stacks to the aggregated stacks."""
+  with _STACKS_LOCK:
+    for stack, count in samples.iteritems():
+      if stack not in _STACKS and len(_STACKS) >= MAX_STACKS:
+        stack = DROPPED_STACK
+      _STACKS[stack] += count
+
+
+def get_collapsed_stacks():
+  """Get aggregated stacks in collapsed stack format."""
+  with _STACKS_LOCK:
+    return "".join("{} {}\n".format(stack, count)
+                   for stack, count in sorted(_STACKS.iteritems()))
+
+
+def reset():
+  """Remove all aggregated stacks."""
+  with _STACKS_LOCK:
+    _STACKS.clear()
+
+
+class Sampler(threading.Thread):
+  """Thread that samples stacks of another thread."""
+
+  def __init__(self, thread_id, root, interval):
+    super(Sampler, self).__init__(name="ggrc-sampler-{}".format(thread_id))
+    self.daemon = True
+    self.thread_id = thread_id
+    self.root = root
+    self.interval = interval
+    self.samples = collections.Counter()
+    self._stop_event = threading.Event()
+
+  def run(self):
+    while not self._stop_event.wait(self.interval):
+      frame = sys._current_frames().get(self.thread_id)  # noqa pylint: disable=protected-access
+      if frame is None:
+        break
+      self.samples[collapse_stack(frame, self.root)] += 1
+
+  def stop(self):
+    """Stop sampling and add recorded samples to the aggregated stacks."""
+    self._stop_event.set()
+    self.join()
+    add_samples(self.samples)
+
+
+def _split_setting(value):
+  return {item.strip() for item in (value or "").split(",") if item.strip()}
+
+
+def _should_profile(request):
+  """Check if the current request should be profiled."""
+  sample_rate = settings.PROFILER_SAMPLE_RATE
+  if sample_rate and random.random() < sample_rate:
+    return True
+  if request.endpoint in _split_setting(settings.PROFILER_ENDPOINTS):
+    return True
+  users = _split_setting(settings.PROFILER_USERS)
+  if users:
+    from ggrc.login import get_current_user
+    email = getattr(get_current_user(use_external_user=False), "email", None)
+    return email in users
+  return False
+
+
+def start_profile(request):
+  """Start sampling of the current thread if the request is profiled."""
+  if not _should_profile(request):
+    return
+  root = "{} {}".format(request.method, request.endpoint or request.path)
+  sampler = Sampler(threading.current_thread().ident, root,
+                    settings.PROFILER_INTERVAL)
+  try:
+    sampler.start()
+  except RuntimeError:
+    # Threads may not be available in some environments.
+    logger.warning("Unable to start sampling profiler", exc_info=True)
+    return
+  flask.g.profiler_sampler = sampler
+
+
+def finish_profile():
+  """Stop sampling of the current request if it is profiled."""
+  sampler = getattr(flask.g, "profiler_sampler", None)
+  if sampler is not None:
+    flask.g.profiler_sampler = None
+    sampler.stop()
@@ -0,0 +1,194 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Per request SQL profiler.
+
+Queries executed while a request is profiled are grouped by a normalized
+fingerprint, in which literals and parameter lists are replaced with
+placeholders. Every query is attributed to the innermost running
+``benchmark()`` label. Fingerprints of SELECT statements executed more than
+``SQL_PROFILER_N_PLUS_ONE_THRESHOLD`` times are reported as N+1 candidates.
+
+A request is profiled if it is picked by ``SQL_PROFILER_SAMPLE_RATE`` or if an
+admin sends the ``X-GGRC-Profile`` request header. The summary of a profile
+is returned in the ``X-GGRC-Profile`` response header and recent profiles are
+kept in memory of the instance for the ``/admin/sql_profiles`` view.
+"""
+
+import collections
+import hashlib
+import random
+import re
+import threading
+import time
+
+import flask
+import sqlalchemy
+from sqlalchemy.engine import Engine
+
+from ggrc import settings
+from ggrc.utils import benchmarks
+
+
+PROFILE_HEADER = "X-GGRC-Profile"
+
+_STRING_RE = re.compile(r"'(?:''|[^'\\]|\\.)*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_LIST_RE = re.compile(
+    r"\(\s*(?:%s|\?|:\w+)(?:\s*,\s*(?:%s|\?|:\w+))*\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_PROFILES_LOCK = threading.Lock()
+_PROFILES = collections.deque(maxlen=50)
+
+
+def normalize_statement(statement):
+  """Replace literals and parameter lists in SQL statement with placeholders.
+
+  Statements that differ only in literal values or in the number of
+  parameters in an IN clause get the same normalized form.
+  """
+  statement = _STRING_RE.sub("?", statement)
+  statement = _NUMBER_RE.sub("?", statement)
+  statement = _PARAM_LIST_RE.sub("(...)", statement)
+  return _WHITESPACE_RE.sub(" ", statement).strip()
+
+
+def fingerprint(normalized_statement):
+  """Get short fingerprint of a normalized statement."""
+  if isinstance(normalized_statement, unicode):
+    normalized_statement = normalized_statement.encode("utf-8")
+  return hashlib.sha1(normalized_statement).hexdigest()[:12]
+
+
+class RequestProfile(object):
+  """SQL queries executed during one request grouped by fingerprint."""
+
+  def __init__(self, method, path):
+    self.id = "{:x}{:04x}".format(int(time.time() * 1000),
+                                  random.getrandbits(16))
+    self.method = method
+    self.path = path
+    self.query_count = 0
+    self.query_time = 0.0
+    self.fingerprints = {}
+
+  def add_query(self, statement, duration, label):
+    """Add executed query to the profile."""
+    normalized = normalize_statement(statement)
+    key = fingerprint(normalized)
+    entry = self.fingerprints.get(key)
+    if entry is None:
+      entry = self.fingerprints[key] = {
+          "fingerprint": key,
+          "statement": normalized,
+          "count": 0,
+          "time": 0.0,
+          "labels": collections.Counter(),
+      }
+    entry["count"] += 1
+    entry["time"] += duration
+    entry["labels"][label or "<no benchmark>"] += 1
+    self.query_count += 1
+    self.query_time += duration
+
+  def n_plus_one(self, threshold):
+    """Get fingerprint entries of SELECTs executed more than threshold times.
+    """
+    return sorted(
+        (entry for entry in self.fingerprints.itervalues()
+         if entry["count"] > threshold and
+         entry["statement"].upper().startswith("SELECT")),
+        key=lambda entry: entry["count"],
+        reverse=True,
+    )
+
+  def as_dict(self, threshold):
+    """Get JSON serializable representation of the profile."""
+    fingerprints = sorted(self.fingerprints.itervalues(),
+                          key=lambda entry: entry["time"], reverse=True)
+    return {
+        "id": self.id,
+        "method": self.method,
+        "path": self.path,
+        "query_count": self.query_count,
+        "query_time": self.query_time,
+        "fingerprints": [dict(entry, labels=dict(entry["labels"]))
+                         for entry in fingerprints],
+        "n_plus_one": [entry["fingerprint"]
+                       for entry in self.n_plus_one(threshold)],
+    }
+
+  def header_value(self, threshold, max_n_plus_one=5):
+    """Get short summary for the response header."""
+    return "id={};queries={};time={:.4f};fingerprints={};n_plus_one={}".format(
+        self.id, self.query_count, self.query_time, len(self.fingerprints),
+        ",".join("{}x{}".format(entry["fingerprint"], entry["count"])
+                 for entry in self.n_plus_one(threshold)[:max_n_plus_one]),
+    )
+
+
+def _get_current_profile():
+  if not flask.has_request_context():
+    return None
+  return getattr(flask.g, "sql_profile", None)
+
+
+def _before_cursor_execute(conn, *_):
+  if _get_current_profile() is not None:
+    conn.info["sql_profiler_start"] = time.time()
+
+
+def _after_cursor_execute(conn, _cursor, statement, *_):
+  profile = _get_current_profile()
+  if profile is None:
+    return
+  start = conn.info.pop("sql_profiler_start", None)
+  if start is None:
+    return
+  profile.add_query(statement, time.time() - start,
+                    benchmarks.get_current_label())
+
+
+def _should_profile(request):
+  """Check if the current request should be profiled."""
+  sample_rate = settings.SQL_PROFILER_SAMPLE_RATE
+  if sample_rate and random.random() < sample_rate:
+    return True
+  if PROFILE_HEADER in request.headers:
+    from ggrc.rbac import permissions
+    return permissions.is_admin()
+  return False
+
+
+def start_profile(request):
+  """Start profiling of the request if it should be profiled."""
+  if _should_profile(request):
+    flask.g.sql_profile = RequestProfile(request.method, request.path)
+
+
+def finish_profile(response):
+  """Store profile of the current request and add its summary header."""
+  profile = getattr(flask.g, "sql_profile", None)
+  if profile is None:
+    return response
+  flask.g.sql_profile = None
+  threshold = settings.SQL_PROFILER_N_PLUS_ONE_THRESHOLD
+  response.headers[PROFILE_HEADER] = profile.header_value(threshold)
+  with _PROFILES_LOCK:
+    _PROFILES.append(profile.as_dict(threshold))
+  return response
+
+
+def get_profiles():
+  """Get recent request profiles of this instance, newest first."""
+  with _PROFILES_LOCK:
+    return list(reversed(_PROFILES))
+
+
+def register_listeners():
+  """Register SQLAlchemy listeners that feed request profiles."""
+  sqlalchemy.event.listen(
+      Engine, "before_cursor_execute", _before_cursor_execute)
+  sqlalchemy.event.listen(
+      Engine, "after_cursor_execute", _after_cursor_execute)
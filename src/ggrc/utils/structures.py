@@ -110,3 +110,40 @@ class EmptyList(list):
   def append(self, item):
     """Append new item to list."""
     pass
+
+
+class LRUCache(object):
+  """Mapping that keeps only the most recently used max_size entries."""
+
+  def __init__(self, max_size):
+    self.max_size = max_size
+    self._store = collections.OrderedDict()
+
+  def get(self, key, default=None):
+    """Get the value for key and mark it as the most recently used."""
+    try:
+      value = self._store.pop(key)
+    except KeyError:
+      return default
+    self._store[key] = value
+    return value
+
+  def set(self, key, value):
+    """Store the value and drop the least recently used entries."""
+    self._store.pop(key, None)
+    self._store[key] = value
+    while len(self._store) > self.max_size:
+      self._store.popitem(last=False)
+
+  def delete(self, key):
+    """Drop the entry for key if there is one."""
+    self._store.pop(key, None)
+
+  def clear(self):
+    self._store.clear()
+
+  def __contains__(self, key):
+    return key in self._store
+
+  def __len__(self):
+    return len(self._store)
@@ -29,7 +29,8 @@ from ggrc.query import views as query_views
 from ggrc.rbac import permissions
 from ggrc.services import common as services_common
 from ggrc.snapshotter import rules, indexer as snapshot_indexer
-from ggrc.utils import benchmark, helpers, log_event, revisions
+from ggrc.utils import benchmark, helpers, latest_revisions, log_event, \
+    metrics, revisions
 from ggrc.views import converters, cron, filters, notifications, registry, \
     utils
 
@@ -42,11 +43,33 @@ REINDEX_CHUNK_SIZE = 100
 @app.route("/_background_tasks/propagate_acl", methods=["POST"])
 @background_task.queued_task
 def propagate_acl(_):
-  """Web hook to update revision content."""
-  models.hooks.acl.propagation.propagate_all()
+  """Web hook to start workers that propagate all ACL entries."""
+  from ggrc.models.hooks.acl import propagation_job
+  job_id = propagation_job.prepare_job()
+  for worker in range(settings.ACL_PROPAGATION_WORKERS):
+    background_task.create_task(
+        name="propagate_acl_partitions_{}".format(worker),
+        url=flask.url_for(propagate_acl_partitions.__name__),
+        queued_callback=propagate_acl_partitions,
+        parameters={"job_id": job_id},
+    )
+  db.session.commit()
   return app.make_response(("success", 200, [("Content-Type", "text/html")]))
 
 
+@app.route("/_background_tasks/propagate_acl_partitions", methods=["POST"])
+@background_task.queued_task
+def propagate_acl_partitions(task):
+  """Web hook to propagate pending partitions of an ACL propagation job."""
+  from ggrc.models.hooks.acl import propagation_job
+  count = propagation_job.run_partitions(task.parameters["job_id"])
+  return app.make_response((
+      "propagated {} partitions".format(count),
+      200,
+      [("Content-Type", "text/html")],
+  ))
+
+
 @app.route("/_background_tasks/create_missing_revisions", methods=["POST"])
 @background_task.queued_task
 def create_missing_revisions(_):
@@ -55,6 +78,27 @@ def create_missing_revisions(_):
   return app.make_response(("success", 200, [("Content-Type", "text/html")]))
 
 
+@app.route("/_background_tasks/backfill_latest_revisions", methods=["POST"])
+@background_task.queued_task
+def backfill_latest_revisions(_):
+  """Web hook to populate latest revision pointers of existing revisions."""
+  latest_revisions.backfill()
+  return app.make_response(("success", 200, [("Content-Type", "text/html")]))
+
+
+@app.route("/_background_tasks/recompress_revisions_content",
+           methods=["POST"])
+@background_task.queued_task
+def recompress_revisions_content(_):
+  """Web hook to store revisions content with the current compression."""
+  stats = revisions.recompress_revisions_content()
+  return app.make_response((
+      services_common.as_json(stats),
+      200,
+      [("Content-Type", "application/json")],
+  ))
+
+
 @app.route("/_background_tasks/reindex_snapshots", methods=["POST"])
 @background_task.queued_task
 def reindex_snapshots(_):
@@ -180,6 +224,18 @@ def run_children_issues_generation(task):
     raise exceptions.BadRequest(error.message)
 
 
+@app.route("/_background_tasks/run_deferred_automappings", methods=["POST"])
+@background_task.queued_task
+def run_deferred_automappings(task):
+  """Generate automappings deferred by a request."""
+  from ggrc import automapper
+  return app.make_response((
+      automapper.generate_deferred_automappings(task),
+      200,
+      [("Content-Type", "text/html")],
+  ))
+
+
 @app.route(
     "/_background_tasks/run_issues_generation", methods=["POST"]
 )
@@ -375,10 +431,13 @@ def do_reindex(with_reindex_snapshots=False):
   ))
   for model_name in sorted(indexed_models.keys()):
     logger.info("Updating index for: %s", model_name)
-    with benchmark("Create records for %s" % model_name):
+    with benchmark("Create records for %s" % model_name,
+                   model=model_name,
+                   chunk_size=REINDEX_CHUNK_SIZE) as span:
       model = indexed_models[model_name]
       ids = [id_[0] for id_ in db.session.query(model.id)]
       ids_count = len(ids)
+      span.set_attribute("row_count", ids_count)
       handled_ids = 0
       ids_chunks = ggrc_utils.list_chunks(ids, chunk_size=REINDEX_CHUNK_SIZE)
       for ids_chunk in ids_chunks:
@@ -386,6 +445,7 @@ def do_reindex(with_reindex_snapshots=False):
         logger.info("%s: %s / %s", model.__name__, handled_ids, ids_count)
         model.bulk_record_update_for(ids_chunk)
         db.session.plain_commit()
+        metrics.REINDEXED_OBJECTS.inc(len(ids_chunk), model=model_name)
 
   if with_reindex_snapshots:
     logger.info("Updating index for: %s", "Snapshot")
@@ -748,6 +808,19 @@ def admin_propagate_acl():
                          [('Content-Type', 'text/html')])))
 
 
+@app.route("/admin/propagate_acl/status")
+@login.login_required
+@login.admin_required
+def admin_propagate_acl_status():
+  """Progress of the latest full ACL propagation job."""
+  from ggrc.models.hooks.acl import propagation_job
+  return app.make_response((
+      services_common.as_json(propagation_job.get_status()),
+      200,
+      [("Content-Type", "application/json")],
+  ))
+
+
 @app.route("/admin/create_missing_revisions", methods=["POST"])
 @login.login_required
 @login.admin_required
@@ -768,6 +841,38 @@ def admin_create_missing_revisions():
                         [('Content-Type', 'text/html')])))
 
 
+@app.route("/admin/backfill_latest_revisions", methods=["POST"])
+@login.login_required
+@login.admin_required
+def admin_backfill_latest_revisions():
+  """Populate latest revision pointers for existing revisions"""
+  bg_task = background_task.create_task(
+      name="backfill_latest_revisions",
+      url=flask.url_for(backfill_latest_revisions.__name__),
+      queued_callback=backfill_latest_revisions,
+  )
+  db.session.commit()
+  return bg_task.make_response(
+      app.make_response(("scheduled %s" % bg_task.name, 200,
+                         [('Content-Type', 'text/html')])))
+
+
+@app.route("/admin/recompress_revisions_content", methods=["POST"])
+@login.login_required
+@login.admin_required
+def admin_recompress_revisions_content():
+  """Store revisions content with the current compression codec"""
+  bg_task = background_task.create_task(
+      name="recompress_revisions_content",
+      url=flask.url_for(recompress_revisions_content.__name__),
+      queued_callback=recompress_revisions_content,
+  )
+  db.session.commit()
+  return bg_task.make_response(
+      app.make_response(("scheduled %s" % bg_task.name, 200,
+                         [('Content-Type', 'text/html')])))
+
+
 @app.route("/admin")
 @login.login_required
 @login.admin_required
@@ -777,6 +882,55 @@ def admin():
   return flask.render_template("admin/index.haml")
 
 
+@app.route("/admin/sql_profiles")
+@login.login_required
+@login.admin_required
+def admin_sql_profiles():
+  """Recent SQL profiles of requests handled by this instance."""
+  from ggrc.utils import sql_profiler
+  return app.make_response((
+      services_common.as_json(sql_profiler.get_profiles()),
+      200,
+      [("Content-Type", "application/json")],
+  ))
+
+
+@app.route("/admin/profiler/stacks")
+@login.login_required
+@login.admin_required
+def admin_profiler_stacks():
+  """Aggregated profiler stacks of this instance in collapsed format."""
+  from ggrc.utils import sampling_profiler
+  return app.make_response((
+      sampling_profiler.get_collapsed_stacks(),
+      200,
+      [("Content-Type", "text/plain"),
+       ("Content-Disposition", "attachment; filename=ggrc.collapsed")],
+  ))
+
+
+@app.route("/admin/profiler/reset", methods=["POST"])
+@login.login_required
+@login.admin_required
+def admin_profiler_reset():
+  """Remove aggregated profiler stacks of this instance."""
+  from ggrc.utils import sampling_profiler
+  sampling_profiler.reset()
+  return app.make_response(("success", 200, [("Content-Type", "text/html")]))
+
+
+@app.route("/metrics")
+@login.login_required
+@login.admin_required
+def admin_metrics():
+  """Runtime metrics of all processes in Prometheus text format."""
+  return app.make_response((
+      metrics.render(),
+      200,
+      [("Content-Type", metrics.CONTENT_TYPE)],
+  ))
+
+
 @app.route("/assessments_view")
 @login.login_required
 def assessments_view():
@@ -809,6 +963,11 @@ def get_background_task_status(object_type, object_id):
         "operation": task.bg_operation.bg_operation_type.name,
         "errors": task.get_content().get("errors", []),
     }
+    if task.bg_operation.total_count is not None:
+      body["progress"] = {
+          "processed": task.bg_operation.processed_count,
+          "total": task.bg_operation.total_count,
+      }
     response = app.make_response(
         (json.dumps(body), 200, [("Content-Type", "application/json")])
     )
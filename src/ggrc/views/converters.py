@@ -82,8 +82,14 @@ def parse_export_request():
   return request.json
 
 
-def export_file(export_to, filename, csv_string=None):
-  """Export file to csv file or gdrive file"""
+def export_file(export_to, filename, csv_string=None, csv_chunks=None):
+  """Export file to csv file or gdrive file
+
+  The content is either csv_string or an iterable of encoded csv_chunks.
+  Chunks are streamed to the client for csv downloads.
+  """
+  if csv_chunks is not None and export_to != "csv":
+    csv_string = "".join(csv_chunks)
   if export_to == "gdrive":
     gfile = fa.create_gdrive_file(csv_string, filename)
     headers = [('Content-Type', 'application/json'), ]
@@ -93,6 +99,12 @@ def export_file(export_to, filename, csv_string=None):
         ("Content-Type", "text/csv"),
         ("Content-Disposition", "attachment"),
     ]
+    if csv_chunks is not None:
+      return current_app.response_class(
+          flask.stream_with_context(csv_chunks),
+          status=200,
+          headers=headers,
+      )
     return current_app.make_response((csv_string, 200, headers))
   raise BadRequest(app_errors.BAD_PARAMS)
 
@@ -163,19 +175,33 @@ def handle_export_csv_template_request():
   return export_file(export_to, filename, csv_string)
 
 
-def make_export(objects, exportable_objects=None):
-  """Make export"""
+def make_export(objects, exportable_objects=None, output=None):
+  """Make export
+
+  If output is set, the CSV is written into it and None is returned instead
+  of the CSV string.
+  """
   query_helper = QueryHelper(objects)
   ids_by_type = query_helper.get_ids()
   converter = ExportConverter(
       ids_by_type=ids_by_type,
       exportable_queries=exportable_objects,
   )
-  csv_data = converter.export_csv_data()
+  csv_data = converter.export_csv_data(output)
   object_names = "_".join(converter.get_object_names())
   return csv_data, object_names
 
 
+def make_export_parts(objects, exportable_objects, parts_count):
+  """Split export into about parts_count parts exported separately."""
+  query_helper = QueryHelper(objects)
+  converter = ExportConverter(
+      ids_by_type=query_helper.get_ids(),
+      exportable_queries=exportable_objects,
+  )
+  return converter.get_export_parts(parts_count)
+
+
 def check_import_file():
   """Check if imported file format and type is valid"""
   if "file" not in request.files or not request.files["file"]:
@@ -245,18 +271,28 @@ def run_export(task):
   ie_id = task.parameters.get("ie_id")
   objects = task.parameters.get("objects")
   exportable_objects = task.parameters.get("exportable_objects")
+  parallelism = task.parameters.get("parallelism") or 1
 
   try:
     ie = import_export.get(ie_id)
     check_for_previous_run()
 
-    content, _ = make_export(objects, exportable_objects)
+    if parallelism > 1:
+      parts = make_export_parts(objects, exportable_objects, parallelism)
+      if len(parts) > 1:
+        run_background_export_parts(task, ie.id, parts)
+        return utils.make_simple_response()
+
+    content_writer = import_export.ContentWriter(ie.id)
+    make_export(objects, exportable_objects, output=content_writer)
+    content_writer.close()
     db.session.refresh(ie)
     if ie.status == "Stopped":
+      import_export.delete_content_chunks(ie.id)
+      db.session.commit()
       return utils.make_simple_response()
     ie.status = "Finished"
     ie.end_at = datetime.utcnow()
-    ie.content = content
     db.session.commit()
 
     job_emails.send_email(job_emails.EXPORT_COMPLETED, user.email,
@@ -266,6 +302,7 @@ def run_export(task):
     logger.exception("Export failed: %s", e.message)
     ie = import_export.get(ie_id)
     try:
+      import_export.delete_content_chunks(ie_id)
       ie.status = "Failed"
       ie.end_at = datetime.utcnow()
       db.session.commit()
@@ -278,6 +315,76 @@ def run_export(task):
   return utils.make_simple_response()
 
 
+@app.route("/_background_tasks/run_export_part", methods=["POST"])
+@background_task.queued_task
+def run_export_part(task):
+  """Export a part of an export job and finish the job after its last part.
+
+  Every part is stored in its own transaction together with a marker of
+  the finished part, so a retried part task does not export it again. The
+  part finishing last, as seen under a lock of the job, finishes the job.
+  """
+  user = get_current_user()
+  ie_id = task.parameters.get("ie_id")
+  part_index = task.parameters.get("part_index")
+  parts_count = task.parameters.get("parts_count")
+
+  try:
+    ie = import_export.get(ie_id)
+    if ie.status != "In Progress":
+      return utils.make_simple_response()
+
+    if not import_export.is_part_finished(ie_id, part_index):
+      content_writer = import_export.ContentWriter(ie_id,
+                                                   part_index=part_index)
+      converter = ExportConverter(**task.parameters.get("part"))
+      converter.export_csv_data(output=content_writer)
+      content_writer.close()
+      import_export.finish_part(ie_id, part_index)
+      db.session.commit()
+
+    ie = import_export.get_locked(ie_id)
+    if ie.status == "Finished":
+      # another part has seen all markers first and finished the job
+      db.session.commit()
+      return utils.make_simple_response()
+    if ie.status != "In Progress":
+      import_export.delete_content_chunks(ie_id)
+      db.session.commit()
+      return utils.make_simple_response()
+    if import_export.count_finished_parts(ie_id) < parts_count:
+      db.session.commit()
+      return utils.make_simple_response()
+    ie.status = "Finished"
+    ie.end_at = datetime.utcnow()
+    db.session.commit()
+
+    job_emails.send_email(job_emails.EXPORT_COMPLETED, user.email,
+                          ie.title, ie_id)
+
+  except Exception as e:  # pylint: disable=broad-except
+    logger.exception("Export part failed: %s", e.message)
+    try:
+      db.session.rollback()
+      ie = import_export.get_locked(ie_id)
+      if ie.status != "Finished":
+        import_export.delete_content_chunks(ie_id)
+      # only the first failed part reports the failure
+      failed = ie.status == "In Progress"
+      if failed:
+        ie.status = "Failed"
+        ie.end_at = datetime.utcnow()
+      db.session.commit()
+      if failed:
+        job_emails.send_email(job_emails.EXPORT_FAILED, user.email)
+      return utils.make_simple_response(e.message)
+    except Exception as e:  # pylint: disable=broad-except
+      logger.exception("%s: %s", app_errors.STATUS_SET_FAILED, e.message)
+      return utils.make_simple_response(e.message)
+
+  return utils.make_simple_response()
+
+
 @app.route("/_background_tasks/run_import_phases", methods=["POST"])  # noqa: ignore=C901
 @background_task.queued_task
 def run_import_phases(task):
@@ -357,7 +464,7 @@ def init_converter_views():
   @login_required
   def handle_export_csv():
     """Calls export handler"""
-    with benchmark("handle export request"):
+    with benchmark("handle export request", metric_name="export_request"):
       return handle_export_request()
 
   @app.route("/_service/export_csv_template", methods=["POST"])
@@ -371,7 +478,7 @@ def init_converter_views():
   @login_required
   def handle_import_csv():
     """Calls import handler"""
-    with benchmark("handle import request"):
+    with benchmark("handle import request", metric_name="import_request"):
       return handle_import_request()
 
   @app.route("/import")
@@ -534,7 +641,8 @@ def handle_file_download(id2):
   try:
     export_to = request.args.get("export_to")
     ie = import_export.get(id2)
-    return export_file(export_to, ie.title, ie.content.encode("utf-8"))
+    return export_file(export_to, ie.title,
+                       csv_chunks=import_export.iter_content(ie))
   except (Forbidden, NotFound, Unauthorized):
     raise
   except Exception as e:
@@ -572,6 +680,7 @@ def handle_export_post(**kwargs):
     raise BadRequest(
         app_errors.INCORRECT_REQUEST_DATA.format(job_type="Export"))
   try:
+    parallelism = get_export_parallelism(request_json)
     filename = get_export_filename(objects, current_time, exportable_objects)
     ie = import_export.create_import_export_entry(
         job_type="Export",
@@ -579,7 +688,7 @@ def handle_export_post(**kwargs):
         title=filename,
         start_at=datetime.utcnow(),
     )
-    run_background_export(ie.id, objects, exportable_objects)
+    run_background_export(ie.id, objects, exportable_objects, parallelism)
     return make_import_export_response(ie.log_json())
   except Exception as e:
     logger.exception(e.message)
@@ -587,7 +696,15 @@ def handle_export_post(**kwargs):
         app_errors.INCORRECT_REQUEST_DATA.format(job_type="Export"))
 
 
-def run_background_export(ie_job_id, objects, exportable_objects):
+def get_export_parallelism(request_json):
+  """Get number of parts exported in parallel requested for an export."""
+  parallelism = int(request_json.get("parallelism") or
+                    settings.EXPORT_PARALLELISM)
+  return min(max(parallelism, 1), settings.EXPORT_MAX_PARALLELISM)
+
+
+def run_background_export(ie_job_id, objects, exportable_objects,
+                          parallelism=1):
   """Run export job in background task."""
   background_task.create_task(
       name="export",
@@ -596,6 +713,7 @@ def run_background_export(ie_job_id, objects, exportable_objects):
           "ie_id": ie_job_id,
           "objects": objects,
           "exportable_objects": exportable_objects,
+          "parallelism": parallelism,
           "parent": {
               "type": "ImportExport",
               "id": ie_job_id,
@@ -609,6 +727,29 @@ def run_background_export(ie_job_id, objects, exportable_objects):
   db.session.commit()
 
 
+def run_background_export_parts(task, ie_job_id, parts):
+  """Run parts of an export job in separate background tasks.
+
+  Part tasks belong to the background operation of the export task, so
+  stopping the export stops them as well.
+  """
+  for part_index, part in enumerate(parts):
+    part_task = background_task.create_task(
+        name="export_part",
+        url=flask.url_for(run_export_part.__name__),
+        parameters={
+            "ie_id": ie_job_id,
+            "part_index": part_index,
+            "parts_count": len(parts),
+            "part": part,
+        },
+        queue="ggrcImport",
+        queued_callback=run_export_part,
+    )
+    part_task.bg_operation = task.bg_operation
+  db.session.commit()
+
+
 def handle_delete(**kwargs):
   """ Delete import_export entry """
   check_import_export_headers()
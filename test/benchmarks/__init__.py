@@ -0,0 +1,13 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Performance benchmarks for ggrc.
+
+Benchmarks use the integration test database and are not part of the regular
+test runs. Use ``bin/run_benchmarks`` to run them.
+
+API benchmarks run against a synthetic dataset created by ``generator``. The
+size of the dataset is selected with ``GGRC_BENCHMARK_SCALE`` ("small" or
+"large"). Timings are written to ``GGRC_BENCHMARK_RESULTS`` and compared with
+``GGRC_BENCHMARK_BASELINE`` if it is set, see ``results`` for details.
+"""
@@ -0,0 +1,177 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Deterministic synthetic dataset for API benchmarks.
+
+The dataset is built with the integration test factories. Random choices and
+random titles generated by factories depend only on the seed, so two runs
+with the same scale produce the same objects (database ids may differ).
+"""
+
+import collections
+import os
+import random
+
+from ggrc import db
+from ggrc.models import all_models
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+SEED = 4242
+
+# Number of generated objects for each scale. Every audit snapshots
+# ``snapshots_per_audit`` controls.
+SCALES = {
+    "small": {
+        "people": 10,
+        "controls": 200,
+        "control_cas": 3,
+        "programs": 2,
+        "audits_per_program": 1,
+        "snapshots_per_audit": 100,
+        "assessments_per_audit": 20,
+    },
+    "large": {
+        "people": 100,
+        "controls": 3000,
+        "control_cas": 10,
+        "programs": 5,
+        "audits_per_program": 2,
+        "snapshots_per_audit": 2500,
+        "assessments_per_audit": 200,
+    },
+}
+
+Dataset = collections.namedtuple("Dataset", [
+    "scale",
+    "people_ids",
+    "control_ids",
+    "program_ids",
+    "audit_ids",
+    "assessment_ids",
+])
+
+
+def get_scale():
+  """Get scale name from GGRC_BENCHMARK_SCALE env var."""
+  scale = os.environ.get("GGRC_BENCHMARK_SCALE", "small")
+  if scale not in SCALES:
+    raise ValueError("Unknown benchmark scale '{}', use one of {}".format(
+        scale, ", ".join(sorted(SCALES))))
+  return scale
+
+
+def _create_controls(rng, sizes, people):
+  """Create controls with custom attribute values and admins."""
+  with factories.single_commit():
+    cads = [
+        factories.CustomAttributeDefinitionFactory(
+            definition_type="control",
+            title="Benchmark CA {}".format(idx),
+            attribute_type="Text",
+        )
+        for idx in range(sizes["control_cas"])
+    ]
+    controls = []
+    for idx in range(sizes["controls"]):
+      control = factories.ControlFactory(
+          title="Benchmark control {:05d}".format(idx))
+      for cad in cads:
+        factories.CustomAttributeValueFactory(
+            custom_attribute=cad,
+            attributable=control,
+            attribute_value="value {}".format(rng.randint(0, 100)),
+        )
+      factories.AccessControlPersonFactory(
+          ac_list=control.acr_name_acl_map["Admin"],
+          person=rng.choice(people),
+      )
+      controls.append(control)
+  return controls
+
+
+def _create_audits(rng, sizes, people, controls):
+  """Create programs and audits with snapshots and assessments."""
+  audits = []
+  assessments = []
+  for program_idx in range(sizes["programs"]):
+    with factories.single_commit():
+      program = factories.ProgramFactory(
+          title="Benchmark program {}".format(program_idx))
+      program_audits = [
+          factories.AuditFactory(
+              program=program,
+              title="Benchmark audit {}-{}".format(program_idx, audit_idx),
+          )
+          for audit_idx in range(sizes["audits_per_program"])
+      ]
+    for audit in program_audits:
+      snapshotted = rng.sample(controls, sizes["snapshots_per_audit"])
+      snapshots = TestCase._create_snapshots(  # noqa pylint: disable=protected-access
+          audit, snapshotted)
+      with factories.single_commit():
+        for idx in range(sizes["assessments_per_audit"]):
+          assessment = factories.AssessmentFactory(
+              audit=audit,
+              title="Benchmark assessment {} {:04d}".format(audit.title, idx),
+          )
+          factories.RelationshipFactory(source=audit, destination=assessment)
+          factories.RelationshipFactory(source=assessment,
+                                        destination=rng.choice(snapshots))
+          factories.AccessControlPersonFactory(
+              ac_list=assessment.acr_name_acl_map["Assignees"],
+              person=rng.choice(people),
+          )
+          assessments.append(assessment)
+    audits.extend(program_audits)
+  return audits, assessments
+
+
+def generate(scale, seed=SEED):
+  """Create the benchmark dataset of the given scale.
+
+  Args:
+    scale: name of the scale from SCALES.
+    seed: seed for all random choices.
+  Returns:
+    Dataset with ids of the created objects.
+  """
+  sizes = SCALES[scale]
+  # factories use the random module directly for generated values
+  random.seed(seed)
+  rng = random.Random(seed)
+
+  with factories.single_commit():
+    people = [
+        factories.PersonFactory(
+            email="benchmark-{:03d}@example.com".format(idx),
+            name="Benchmark person {}".format(idx),
+        )
+        for idx in range(sizes["people"])
+    ]
+  controls = _create_controls(rng, sizes, people)
+  audits, assessments = _create_audits(rng, sizes, people, controls)
+  dataset = Dataset(
+      scale=scale,
+      people_ids=[person.id for person in people],
+      control_ids=[control.id for control in controls],
+      program_ids=sorted({audit.program_id for audit in audits}),
+      audit_ids=[audit.id for audit in audits],
+      assessment_ids=[assessment.id for assessment in assessments],
+  )
+  db.session.expunge_all()
+  return dataset
+
+
+def get_import_rows(prefix, count):
+  """Get rows for import of new markets."""
+  return [
+      collections.OrderedDict([
+          ("object_type", all_models.Market.__name__),
+          ("code", "{}-{:05d}".format(prefix, idx)),
+          ("title", "{} market {:05d}".format(prefix, idx)),
+          ("Admin", "user@example.com"),
+      ])
+      for idx in range(count)
+  ]
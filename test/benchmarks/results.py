@@ -0,0 +1,114 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Recording of benchmark timings and comparison with a baseline.
+
+Results are written as JSON to the file given by ``GGRC_BENCHMARK_RESULTS``.
+A results file of a previous run can be passed in ``GGRC_BENCHMARK_BASELINE``,
+then every timing whose median is slower than the baseline by more than
+``GGRC_BENCHMARK_TOLERANCE`` (a fraction, 0.2 by default) is reported as a
+regression.
+"""
+
+import datetime
+import json
+import os
+import platform
+import time
+
+
+DEFAULT_RESULTS_PATH = "benchmark_results.json"
+DEFAULT_TOLERANCE = 0.2
+# Slowdowns smaller than this number of seconds are treated as noise.
+MIN_DELTA = 0.005
+
+
+def _median(values):
+  values = sorted(values)
+  middle = len(values) // 2
+  if len(values) % 2:
+    return values[middle]
+  return (values[middle - 1] + values[middle]) / 2.0
+
+
+class BenchmarkResults(object):
+  """Timings of one benchmark run."""
+
+  def __init__(self, scale, rounds=3):
+    self.scale = scale
+    self.rounds = rounds
+    self.timings = {}
+
+  def measure(self, name, func, rounds=None):
+    """Call func several times and record its durations under the name.
+
+    Returns:
+      Value returned by the last call of func.
+    """
+    durations = []
+    result = None
+    for _ in range(rounds or self.rounds):
+      start = time.time()
+      result = func()
+      durations.append(time.time() - start)
+    self.timings[name] = {
+        "min": min(durations),
+        "median": _median(durations),
+        "max": max(durations),
+        "rounds": len(durations),
+    }
+    print "{:<45} median {:.4f}s min {:.4f}s".format(
+        name, self.timings[name]["median"], self.timings[name]["min"])
+    return result
+
+  def as_dict(self):
+    return {
+        "scale": self.scale,
+        "created_at": datetime.datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "timings": self.timings,
+    }
+
+  def save(self, path=None):
+    """Write results to a JSON file and return its path."""
+    path = path or os.environ.get("GGRC_BENCHMARK_RESULTS",
+                                  DEFAULT_RESULTS_PATH)
+    with open(path, "w") as results_file:
+      json.dump(self.as_dict(), results_file, indent=2, sort_keys=True)
+    return path
+
+
+def load_baseline(path=None):
+  """Load baseline results or return None if no baseline is given."""
+  path = path or os.environ.get("GGRC_BENCHMARK_BASELINE")
+  if not path:
+    return None
+  with open(path) as baseline_file:
+    return json.load(baseline_file)
+
+
+def compare(results, baseline, tolerance=None):
+  """Get timings that are slower than in the baseline.
+
+  Args:
+    results: dict from BenchmarkResults.as_dict.
+    baseline: dict with results of a previous run.
+    tolerance: allowed relative slowdown of median durations.
+  Returns:
+    List of (name, baseline median, current median) tuples of regressions.
+  """
+  if tolerance is None:
+    tolerance = float(os.environ.get("GGRC_BENCHMARK_TOLERANCE",
+                                     DEFAULT_TOLERANCE))
+  if results["scale"] != baseline["scale"]:
+    raise ValueError("Baseline scale '{}' does not match '{}'".format(
+        baseline["scale"], results["scale"]))
+  regressions = []
+  for name, timing in sorted(results["timings"].iteritems()):
+    base_timing = baseline["timings"].get(name)
+    if base_timing is None:
+      continue
+    base, current = base_timing["median"], timing["median"]
+    if current - base > MIN_DELTA and current > base * (1 + tolerance):
+      regressions.append((name, base, current))
+  return regressions
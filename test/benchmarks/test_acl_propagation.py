@@ -0,0 +1,104 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Benchmark of ACL propagation through deep object trees."""
+
+# pylint: disable=protected-access
+
+import time
+
+import mock
+import sqlalchemy as sa
+from sqlalchemy.orm.session import Session
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.models.hooks import acl
+from ggrc.models.hooks.acl import propagation
+from ggrc.models.hooks.acl import recursive_propagation
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestAclPropagationBenchmark(TestCase):
+  """Compare loop and recursive CTE propagation.
+
+  The dataset is a Program > Audit > Assessment > Evidence tree, every level
+  mapped with relationships, so Program roles propagate three objects deep.
+  """
+
+  AUDITS = 3
+  ASSESSMENTS_PER_AUDIT = 20
+  EVIDENCE_PER_ASSESSMENT = 3
+  ROUNDS = 3
+
+  def setUp(self):
+    super(TestAclPropagationBenchmark, self).setUp()
+    # build the tree without propagation, it is done by the measured code
+    sa.event.remove(Session, "after_flush", acl.after_flush)
+    self.user_id = factories.PersonFactory().id
+    with factories.single_commit():
+      program = factories.ProgramFactory()
+      for _ in range(self.AUDITS):
+        audit = factories.AuditFactory(program=program)
+        factories.RelationshipFactory(source=program, destination=audit)
+        for _ in range(self.ASSESSMENTS_PER_AUDIT):
+          assessment = factories.AssessmentFactory(audit=audit)
+          factories.RelationshipFactory(source=audit, destination=assessment)
+          for _ in range(self.EVIDENCE_PER_ASSESSMENT):
+            evidence = factories.EvidenceFactory()
+            factories.RelationshipFactory(source=assessment,
+                                          destination=evidence)
+    propagation._set_empty_base_ids()
+
+  def tearDown(self):
+    sa.event.listen(Session, "after_flush", acl.after_flush)
+    super(TestAclPropagationBenchmark, self).tearDown()
+
+  @staticmethod
+  def _propagated_acls():
+    """Get propagated ACL entries identified by role, object and base."""
+    acl_table = all_models.AccessControlList.__table__
+    query = sa.select([
+        acl_table.c.ac_role_id,
+        acl_table.c.object_type,
+        acl_table.c.object_id,
+        acl_table.c.base_id,
+    ]).where(
+        acl_table.c.parent_id.isnot(None)
+    )
+    return sorted(tuple(row) for row in db.session.execute(query))
+
+  def _measure(self, recursive):
+    """Return best propagation duration and the propagated entries."""
+    acl_table = all_models.AccessControlList.__table__
+    best = None
+    for _ in range(self.ROUNDS):
+      db.session.execute(acl_table.delete().where(
+          acl_table.c.parent_id.isnot(None)))
+      db.session.commit()
+      acl_ids = [row.id for row in db.session.execute(
+          sa.select([acl_table.c.id]).where(acl_table.c.parent_id.is_(None))
+      )]
+      with mock.patch.object(recursive_propagation, "is_supported",
+                             return_value=recursive):
+        start = time.time()
+        propagation._propagate(acl_ids, self.user_id)
+        duration = time.time() - start
+      best = duration if best is None else min(best, duration)
+    return best, self._propagated_acls()
+
+  def test_propagation(self):
+    """Time both propagations and check that they create the same ACLs."""
+    loop_time, loop_acls = self._measure(recursive=False)
+    print "loop propagation: {:.4f}s, {} entries".format(
+        loop_time, len(loop_acls))
+    self.assertTrue(loop_acls)
+
+    if not recursive_propagation._server_supports_cte(db.engine.dialect):
+      print "recursive propagation is not supported by the database server"
+      return
+    cte_time, cte_acls = self._measure(recursive=True)
+    print "recursive propagation: {:.4f}s ({:.2f}x)".format(
+        cte_time, loop_time / cte_time)
+    self.assertEqual(cte_acls, loop_acls)
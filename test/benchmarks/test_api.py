@@ -0,0 +1,145 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Timings of key API endpoints on the synthetic dataset."""
+
+import json
+
+from ggrc.models import all_models
+from integration.ggrc import TestCase
+from integration.ggrc.api_helper import Api
+from integration.ggrc.query_helper import WithQueryApi
+
+from benchmarks import generator
+from benchmarks import results as benchmark_results
+
+
+class TestApiBenchmark(WithQueryApi, TestCase):
+  """Time API endpoints and compare timings with a baseline.
+
+  All endpoints are measured in a single test so that the dataset is
+  generated only once.
+  """
+
+  IMPORT_ROWS = 50
+
+  def setUp(self):
+    super(TestApiBenchmark, self).setUp()
+    self.api = Api()
+    self.dataset = generator.generate(generator.get_scale())
+    self.client.post("/admin/full_reindex")
+    self.results = benchmark_results.BenchmarkResults(self.dataset.scale)
+
+  def _get(self, url):
+    response = self.api.client.get(url)
+    self.assert200(response)
+    return response
+
+  def _query(self, query):
+    response = self._post(query)
+    self.assert200(response)
+    return response
+
+  def _snapshot_query(self, query_type):
+    return [{
+        "object_name": all_models.Snapshot.__name__,
+        "type": query_type,
+        "limit": [0, 50],
+        "filters": {"expression": {
+            "object_name": all_models.Audit.__name__,
+            "op": {"name": "relevant"},
+            "ids": self.dataset.audit_ids[:1],
+        }},
+        "fields": ["child_id", "child_type", "revision"],
+    }]
+
+  def _time_collections(self):
+    """Time collection GET requests."""
+    ids = ",".join(str(id_) for id_ in self.dataset.assessment_ids[:250])
+    self.results.measure(
+        "collection GET assessments",
+        lambda: self._get("/api/assessments?id__in={}".format(ids)))
+    self.results.measure(
+        "collection GET audit snapshots",
+        lambda: self._get("/api/snapshots?parent_id={}&parent_type=Audit"
+                          .format(self.dataset.audit_ids[0])))
+
+  def _time_query(self):
+    """Time /query values and counts requests."""
+    self.results.measure(
+        "query snapshot values",
+        lambda: self._query(self._snapshot_query("values")))
+    self.results.measure(
+        "query snapshot count",
+        lambda: self._query(self._snapshot_query("count")))
+    self.results.measure(
+        "query assessment ids",
+        lambda: self._query([{
+            "object_name": all_models.Assessment.__name__,
+            "type": "ids",
+            "filters": {"expression": {
+                "left": "title",
+                "op": {"name": "~"},
+                "right": "Benchmark",
+            }},
+        }]))
+
+  def _time_search(self):
+    """Time /search requests."""
+    self.results.measure(
+        "search controls",
+        lambda: self.assert200(self.api.search("Control", "Benchmark")[0]))
+    self.results.measure(
+        "search counts",
+        lambda: self.assert200(self.api.search(
+            "Control,Assessment,Audit", "Benchmark", counts=True)[0]))
+
+  def _time_export(self):
+    """Time CSV export."""
+    def export():
+      response = self.export_csv([{
+          "object_name": all_models.Control.__name__,
+          "filters": {"expression": {}},
+          "fields": "all",
+      }])
+      self.assert200(response)
+    self.results.measure("export controls", export)
+
+  def _time_import(self):
+    """Time CSV import, every round imports new objects."""
+    prefixes = iter("benchmark-import-{}".format(idx) for idx in range(100))
+
+    def import_rows():
+      response = self.import_data(
+          *generator.get_import_rows(next(prefixes), self.IMPORT_ROWS))
+      self.check_import_errors(response)
+    self.results.measure(
+        "import {} markets".format(self.IMPORT_ROWS), import_rows)
+
+  def _time_reindex(self):
+    """Time full reindex."""
+    self.results.measure(
+        "full reindex",
+        lambda: self.assert200(self.client.post("/admin/full_reindex")),
+        rounds=1)
+
+  def test_endpoints(self):
+    """Time endpoints and compare them with the baseline."""
+    self._time_collections()
+    self._time_query()
+    self._time_search()
+    self._time_export()
+    self._time_import()
+    self._time_reindex()
+
+    results = self.results.as_dict()
+    path = self.results.save()
+    print "Benchmark results written to {}".format(path)
+
+    baseline = benchmark_results.load_baseline()
+    if baseline is None:
+      return
+    regressions = benchmark_results.compare(results, baseline)
+    for name, base, current in regressions:
+      print "REGRESSION {}: {:.4f}s -> {:.4f}s".format(name, base, current)
+    self.assertEqual(regressions, [], json.dumps(regressions))
@@ -0,0 +1,149 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Microbenchmark for JSON publishing of model objects."""
+
+import time
+
+from sqlalchemy.ext.associationproxy import AssociationProxy
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.orm.properties import RelationshipProperty
+
+import ggrc.builder
+from ggrc import db
+from ggrc.builder import json as builder_json
+from ggrc.models import all_models
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class LegacyBuilder(builder_json.Builder):
+  """Builder publishing attributes as it was done before publish plans.
+
+  Custom publish handlers and attribute types are looked up for every
+  published attribute of every object.
+  """
+
+  @staticmethod
+  def _process_custom_publish(obj, attr_name):
+    """Processes _custom_publish logic and returns value if any or None."""
+    if attr_name in getattr(obj.__class__, '_custom_publish', {}):
+      return True, obj.__class__._custom_publish[attr_name](obj)
+
+    for base in obj.__class__.__bases__:
+      if attr_name in getattr(base, '_custom_publish', {}):
+        return True, base._custom_publish[attr_name](obj)
+
+    return False, None
+
+  def publish_attr(
+          self, obj, attr_name, inclusions, include, inclusion_filter):
+    """Publish obj attr."""
+    value_exists, value = self._process_custom_publish(obj, attr_name)
+    if value_exists:
+      return value
+
+    class_attr = getattr(obj.__class__, attr_name)
+    result = None
+
+    if isinstance(class_attr, AssociationProxy):
+      if getattr(class_attr, 'publish_raw', False):
+        published_attr = getattr(obj, attr_name)
+        if hasattr(published_attr, "copy"):
+          result = published_attr.copy()
+        else:
+          result = published_attr
+      else:
+        result = self.publish_association_proxy(
+            obj, class_attr, inclusions, include, inclusion_filter)
+    elif (isinstance(class_attr, InstrumentedAttribute) and
+          isinstance(class_attr.property, RelationshipProperty)):
+      result = self.publish_relationship(
+          obj, attr_name, class_attr, inclusions, include, inclusion_filter)
+    elif class_attr.__class__.__name__ == 'property':
+      if not inclusions or include:
+        if getattr(obj, '{0}_id'.format(attr_name)):
+          result = builder_json.LazyStubRepresentation(
+              getattr(obj, '{0}_type'.format(attr_name)),
+              getattr(obj, '{0}_id'.format(attr_name)))
+      else:
+        result = self.publish_link(
+            obj, attr_name, inclusions, include, inclusion_filter)
+    else:
+      result = getattr(obj, attr_name)
+
+    return result
+
+  def publish_attrs(self, obj, json_obj, extra_inclusions, inclusion_filter,
+                    attribute_whitelist):
+    """Publish attributes resolving inclusions for every attribute."""
+    inclusions = tuple((attr,) for attr in self._include_links)
+    inclusions = tuple(set(inclusions).union(set(extra_inclusions)))
+    for attr in self._publish_attrs:
+      if hasattr(attr, '__call__'):
+        attr_name = attr.attr_name
+      else:
+        attr_name = attr
+      local_inclusion = ()
+      for inclusion in inclusions:
+        if inclusion[0] == attr_name:
+          local_inclusion = inclusion
+          break
+      if attribute_whitelist and attr_name not in attribute_whitelist:
+        continue
+      json_obj[attr_name] = self.publish_attr(
+          obj, attr_name, local_inclusion[1:], len(local_inclusion) > 0,
+          inclusion_filter)
+
+
+class TestPublishBenchmark(TestCase):
+  """Measure objects/sec for publishing with legacy and compiled builders.
+
+  Both builders are created and warmed up before they are measured, so only
+  the attribute dispatch done for every published object is compared.
+  """
+
+  OBJECT_COUNT = 200
+  ROUNDS = 3
+
+  def setUp(self):
+    super(TestPublishBenchmark, self).setUp()
+    with factories.single_commit():
+      audit = factories.AuditFactory()
+      for _ in range(self.OBJECT_COUNT):
+        factories.AssessmentFactory(audit=audit)
+        factories.ControlFactory()
+
+  def _publish_rate(self, objects, builder):
+    """Return number of objects per second published with the builder."""
+    model = objects[0].__class__
+    original = builder_json.get_json_builder(model)
+    setattr(ggrc.builder, model.__name__, builder)
+    try:
+      # warm up the builder before measuring it
+      for obj in objects:
+        builder_json.publish(obj)
+      best = None
+      for _ in range(self.ROUNDS):
+        start = time.time()
+        for obj in objects:
+          builder_json.publish(obj)
+        duration = time.time() - start
+        best = duration if best is None else min(best, duration)
+    finally:
+      setattr(ggrc.builder, model.__name__, original)
+    return len(objects) / best if best else float("inf")
+
+  def test_publish_rate(self):
+    """Compare publish rates for Assessment, Control and Audit."""
+    for model in (all_models.Assessment, all_models.Control,
+                  all_models.Audit):
+      objects = model.eager_query().all()
+      compiled_builder = builder_json.get_json_builder(model)
+      compiled_builder.compile_publish_plan()
+      legacy = self._publish_rate(objects, LegacyBuilder(model))
+      compiled = self._publish_rate(objects, compiled_builder)
+      print "{}: {:.1f} obj/s legacy, {:.1f} obj/s compiled ({:.2f}x)".format(
+          model.__name__, legacy, compiled, compiled / legacy)
+      self.assertGreater(compiled, 0)
+      db.session.expunge_all()
@@ -0,0 +1,86 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Benchmark of compressed revision content storage."""
+
+import time
+
+import mock
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.models import types
+from ggrc.utils import revisions
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestRevisionCompressionBenchmark(TestCase):
+  """Compare storage size and latency of revision content codecs."""
+
+  CONTROLS = 50
+  ROUNDS = 3
+
+  def setUp(self):
+    super(TestRevisionCompressionBenchmark, self).setUp()
+    with factories.single_commit():
+      for _ in range(self.CONTROLS):
+        control = factories.ControlFactory()
+        factories.AccessControlPersonFactory(
+            ac_list=control.acr_name_acl_map["Admin"],
+            person=factories.PersonFactory(),
+        )
+    revision_table = all_models.Revision.__table__
+    self.contents = [row.content for row in db.session.execute(
+        sa.select([revision_table.c.content])
+    )]
+
+  def _measure(self, codec):
+    """Return stored size and best write and read durations of contents."""
+    column_type = types.LongJsonType(compressed=True)
+    best_write = best_read = None
+    with mock.patch("ggrc.settings.JSON_COMPRESSION_CODEC", codec):
+      for _ in range(self.ROUNDS):
+        values = [column_type.process_result_value(content, None)
+                  for content in self.contents]
+        start = time.time()
+        stored = [column_type.process_bind_param(value, None)
+                  for value in values]
+        write = time.time() - start
+        start = time.time()
+        for content in stored:
+          column_type.process_result_value(content, None)
+        read = time.time() - start
+        best_write = write if best_write is None else min(best_write, write)
+        best_read = read if best_read is None else min(best_read, read)
+    return sum(len(content) for content in stored), best_write, best_read
+
+  def test_codecs(self):
+    """Print size ratio and latency of every codec against plain JSON."""
+    plain_size, plain_write, plain_read = self._measure("")
+    print "plain: {} bytes, write {:.4f}s, read {:.4f}s".format(
+        plain_size, plain_write, plain_read)
+    codecs = [types.ZLIB_CODEC]
+    if types.zstandard is not None:
+      codecs.append(types.ZSTD_CODEC)
+    for codec in codecs:
+      size, write, read = self._measure(codec)
+      print "{}: {} bytes ({:.2f}x), write {:.4f}s, read {:.4f}s".format(
+          codec, size, float(plain_size) / size, write, read)
+      self.assertLess(size, plain_size)
+
+  def test_recompress(self):
+    """Recompression keeps contents readable and reports saved bytes."""
+    expected = {rev.id: rev.content for rev in all_models.Revision.query}
+    with mock.patch("ggrc.settings.JSON_COMPRESSION_CODEC",
+                    types.ZLIB_CODEC):
+      stats = revisions.recompress_revisions_content()
+    print "recompressed {rewritten} revisions: {bytes_before} -> " \
+          "{bytes_after} bytes".format(**stats)
+    self.assertLess(stats["bytes_after"], stats["bytes_before"])
+    db.session.expire_all()
+    self.assertEqual(
+        {rev.id: rev.content for rev in all_models.Revision.query},
+        expected,
+    )
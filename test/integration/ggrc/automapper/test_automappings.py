@@ -4,7 +4,7 @@
 """Test automappings"""
 
 import itertools
-from contextlib import contextmanager
+import mock
 from sqlalchemy.orm import load_only
 
 import ggrc
@@ -23,15 +23,6 @@ def make_name(msg):
   return random_str(prefix=msg)
 
 
-@contextmanager
-def automapping_count_limit(new_limit):
-  """Automapping count limit"""
-  original_limit = ggrc.automapper.AutomapperGenerator.COUNT_LIMIT
-  ggrc.automapper.AutomapperGenerator.COUNT_LIMIT = new_limit
-  yield
-  ggrc.automapper.AutomapperGenerator.COUNT_LIMIT = original_limit
-
-
 class TestAutomappings(TestCase):
   """Test automappings"""
 
@@ -171,22 +162,48 @@ class TestAutomappings(TestCase):
         relevant=[regulation, requirement, objective]
     )
 
-  def test_automapping_limit(self):
-    """Test mapping limit"""
-    with automapping_count_limit(-1):
-      regulation = self.create_object(models.Regulation, {
-          'title': make_name('Test Regulation')
-      })
-      requirement = self.create_object(models.Requirement, {
-          'title': make_name('Test requirement'),
-      })
-      objective = self.create_object(models.Objective, {
-          'title': make_name('Objective')
-      })
-      self.assert_mapping_implication(
-          to_create=[(regulation, requirement), (objective, requirement)],
-          implied=[],
-      )
+  def test_automapping_many_objects(self):
+    """Test automapping of a directive with many requirements"""
+    program = self.create_object(models.Program, {
+        'title': make_name('Program')
+    })
+    with factories.single_commit():
+      regulation = factories.RegulationFactory()
+      requirements = [factories.RequirementFactory() for _ in range(30)]
+      for requirement in requirements:
+        factories.RelationshipFactory(source=regulation,
+                                      destination=requirement)
+    regulation = self.refresh_object(regulation)
+    requirements = [self.refresh_object(requirement)
+                    for requirement in requirements]
+    self.assert_mapping_implication(
+        to_create=[(program, regulation)],
+        implied=[(regulation, requirement) for requirement in requirements] +
+        [(program, requirement) for requirement in requirements],
+    )
+
+  @mock.patch("ggrc.settings.AUTOMAPPING_BACKGROUND_THRESHOLD", 2)
+  def test_deferred_automapping(self):
+    """Test automappings above the threshold are generated in background"""
+    with factories.single_commit():
+      program = factories.ProgramFactory()
+      regulation = factories.RegulationFactory()
+      requirements = [factories.RequirementFactory() for _ in range(3)]
+      for requirement in requirements:
+        factories.RelationshipFactory(source=regulation,
+                                      destination=requirement)
+    program_id = program.id
+    response, _ = self.gen.generate_relationship(program, regulation)
+    self.assertIn("X-GGRC-Automapping-Task-Id", response.headers)
+
+    task = all_models.BackgroundTask.query.get(
+        response.headers["X-GGRC-Automapping-Task-Id"])
+    self.assertEqual(task.status, "Success")
+    self.assertEqual(task.bg_operation.processed_count, 1)
+    self.assertEqual(task.bg_operation.total_count, 1)
+    for requirement in requirements:
+      self.assert_mapping(all_models.Program.query.get(program_id),
+                          self.refresh_object(requirement))
 
   def test_mapping_to_objective(self):
     """Test mapping to objective"""
@@ -113,3 +113,20 @@ class TestBuilder(TestCase):
     self.assertDictContainsSubset(
         {'prop_b': 'prop_b', 'mixin': 'mixin_b'},
         json_obj)
+
+  def test_custom_publish_in_plan(self):
+    """Test custom publish handlers of mixins are used by publish plans."""
+    self.mock_service('ModelCustom')
+    mixin = self.mock_class('CustomMixin', _publish_attrs=['custom'])
+    mixin._custom_publish = {'custom': lambda obj: obj.foo.upper()}
+    model = self.mock_model('ModelCustom',
+                            bases=(mixin,),
+                            parents=(mixin,),
+                            foo='bar',
+                            _publish_attrs=['foo'])
+    builder = ggrc.builder.json.get_json_builder(model)
+    builder.compile_publish_plan()
+    # pylint: disable=protected-access
+    self.assertEqual({'foo', 'custom'}, set(builder._attr_publishers))
+    json_obj = publish(model)
+    self.assertDictContainsSubset({'foo': 'bar', 'custom': 'BAR'}, json_obj)
@@ -4,6 +4,7 @@
 """Tests for basic Block Converter."""
 
 from collections import defaultdict
+from collections import OrderedDict
 
 import mock
 from ddt import data, ddt
@@ -107,3 +108,122 @@ class TestBaseBlock(TestCase):
     )
     id_map = block._get_identifier_mappings(relationships)
     self.assertEqual(expected_id_map, id_map)
+
+  def test_export_query_plan(self):
+    """Test export does not load relationships of fields not exported."""
+    with factories.single_commit():
+      regulations = [factories.RegulationFactory() for _ in range(3)]
+      factories.CustomAttributeDefinitionFactory(
+          definition_type="regulation",
+          title="CA",
+      )
+
+    def export_rows(fields):
+      block = base_block.ExportBlockConverter(
+          mock.MagicMock(),
+          object_class=models.Regulation,
+          fields=fields,
+          object_ids=[r.id for r in regulations],
+          class_name=models.Regulation.__name__,
+      )
+      with QueryCounter() as counter:
+        rows = list(block.generate_row_data())
+      return block, rows, counter.get
+
+    block, rows, count = export_rows(["slug", "title"])
+    self.assertItemsEqual(block._get_unused_relationships(),
+                          ["_access_control_list", "_custom_attribute_values",
+                           "custom_attribute_definitions", "comments"])
+    self.assertEqual(sorted(sorted(row) for row in rows),
+                     sorted(sorted([r.slug, r.title]) for r in regulations))
+
+    block, _, all_fields_count = export_rows("all")
+    self.assertEqual(block._get_unused_relationships(), ["comments"])
+    self.assertLess(count, all_fields_count)
+
+  @mock.patch("ggrc.settings.INTEGRATION_SERVICE_URL", "")
+  def test_import_objects_cache(self):
+    """Test import block looks up referenced objects with bulk queries."""
+    with factories.single_commit():
+      program = factories.ProgramFactory()
+      person = factories.PersonFactory()
+      markets = [factories.MarketFactory() for _ in range(3)]
+    rows = [[market.slug.upper(), market.title, person.email, program.slug]
+            for market in markets]
+    rows.append([u"MARKET-NEW", u"new", u"unknown@example.com", u""])
+    block = base_block.ImportBlockConverter(
+        mock.MagicMock(),
+        object_class=models.Market,
+        rows=rows,
+        raw_headers=[u"Code", u"Title", u"Admin", u"map:Program"],
+        offset=0,
+        class_name=models.Market.__name__,
+        csv_lines=range(3, 3 + len(rows)),
+    )
+
+    with QueryCounter() as counter:
+      block.get_objects_cache()
+      self.assertLessEqual(counter.get, 3)
+
+    with QueryCounter() as counter:
+      for market in markets:
+        self.assertEqual(
+            block.find_object(models.Market, "slug", market.slug),
+            market,
+        )
+      self.assertIsNone(
+          block.find_object(models.Market, "slug", u"MARKET-NEW"))
+      self.assertEqual(
+          block.find_object(models.Person, "email", person.email.upper()),
+          person,
+      )
+      self.assertIsNone(
+          block.find_object(models.Person, "email", u"unknown@example.com"))
+      self.assertEqual(
+          block.find_object(models.Program, "slug", program.slug),
+          program,
+      )
+      self.assertEqual(counter.get, 0)
+
+  @staticmethod
+  def _market_rows(*slugs):
+    return [OrderedDict([
+        ("object_type", "Market"),
+        ("Code*", slug),
+        ("Title*", "title {}".format(slug)),
+        ("Admin*", "user@example.com"),
+    ]) for slug in slugs]
+
+  def test_import_batches(self):
+    """Test rows imported in batches get objects and revisions."""
+    slugs = ["MARKET-{}".format(i) for i in range(5)]
+    with mock.patch("ggrc.settings.IMPORT_BATCH_SIZE", 2):
+      response = self.import_data(*self._market_rows(*slugs))
+    self._check_csv_response(response, {})
+    self.assertEqual(response[0]["created"], 5)
+
+    markets = models.Market.query.filter(models.Market.slug.in_(slugs))
+    market_ids = {market.id for market in markets}
+    self.assertEqual(len(market_ids), 5)
+    revision_ids = {
+        revision.resource_id for revision in models.Revision.query.filter_by(
+            resource_type="Market",
+        )
+    }
+    self.assertEqual(market_ids - revision_ids, set())
+
+  def test_import_failed_batch(self):
+    """Test batch with a failed row is imported again row by row."""
+    with mock.patch("ggrc.settings.IMPORT_BATCH_SIZE", 2):
+      response = self.import_data(
+          *self._market_rows("MARKET-1", "MARKET-1", "MARKET-2")
+      )
+    self.assertEqual(len(response[0]["row_errors"]), 1)
+    self.assertEqual(response[0]["created"], 2)
+    self.assertEqual(response[0]["ignored"], 1)
+    self.assertEqual(
+        models.Market.query.filter(
+            models.Market.slug.in_(["MARKET-1", "MARKET-2"]),
+        ).count(),
+        2,
+    )
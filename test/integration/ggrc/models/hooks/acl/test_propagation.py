@@ -14,6 +14,7 @@ from collections import OrderedDict
 
 import ddt
 import flask
+import mock
 import sqlalchemy as sa
 from sqlalchemy.orm.session import Session
 
@@ -22,6 +23,7 @@ from ggrc import db
 from ggrc.models import all_models
 from ggrc.models.hooks import acl
 from ggrc.models.hooks.acl import propagation
+from ggrc.models.hooks.acl import propagation_job
 from integration.ggrc import TestCase
 from integration.ggrc.models import factories
 from integration.ggrc_workflows.models import factories as wf_factories
@@ -413,6 +415,40 @@ class TestPropagation(BaseTestPropagation):
         # 6 for normal object documents
     )
 
+  def test_propagate_all_resume(self):
+    """Interrupted propagate_all continues with unfinished partitions."""
+    with factories.single_commit():
+      wf_factories.TaskGroupTaskFactory()
+      audit = factories.AuditFactory()
+      factories.RelationshipFactory(
+          source=audit,
+          destination=audit.program,
+      )
+
+    job_id = propagation_job.create_job()
+    with mock.patch.object(propagation, "propagate",
+                           side_effect=[None, ValueError()]):
+      with self.assertRaises(ValueError):
+        propagation_job.run_partitions(job_id)
+
+    status = propagation_job.get_status()
+    self.assertEqual(status["job_id"], job_id)
+    self.assertEqual(status["partitions"]["Done"], 1)
+    self.assertEqual(status["partitions"]["Failure"], 1)
+    self.assertGreater(status["remaining_count"], 0)
+
+    propagation.propagate_all()
+
+    status = propagation_job.get_status()
+    self.assertEqual(status["job_id"], job_id)
+    self.assertEqual(status["partitions"].keys(), ["Done"])
+    self.assertEqual(status["remaining_count"], 0)
+    self.assertEqual(all_models.AccessControlList.query.count(), 25)
+
+    propagation.propagate_all()
+    self.assertNotEqual(propagation_job.get_status()["job_id"], job_id)
+    self.assertEqual(all_models.AccessControlList.query.count(), 25)
+
 
 class TestPropagationViaImport(BaseTestPropagation):
   """Test case for import propagation scenarios."""
@@ -18,6 +18,7 @@ from ggrc import db
 from ggrc import models
 from ggrc.fulltext import get_indexer
 from ggrc.fulltext import mixin
+from ggrc.utils import latest_revisions
 from ggrc.login import noop
 
 
@@ -50,6 +51,7 @@ class ModelFactory(factory.Factory, object):
     )
     db.session.add(revision)
     db.session.add(event)
+    latest_revisions.track(db.session, [revision])
 
     indexer = get_indexer()
     if cls._is_reindex_needed(instance):
@@ -0,0 +1,70 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for /api/change_log endpoint."""
+
+import mock
+
+from ggrc.utils.revisions_diff import builder
+from integration.ggrc.api_helper import Api
+from integration.ggrc.models import factories
+from integration.ggrc.services import TestCase
+
+from appengine import base
+
+
+@base.with_memcache
+class TestChangeLog(TestCase):
+  """Tests for change log of objects."""
+
+  URL_BASE = "/api/change_log"
+
+  def setUp(self):
+    super(TestChangeLog, self).setUp()
+    self.client.get("/login")
+    self.api = Api()
+    with factories.single_commit():
+      self.control = factories.ControlFactory(title="title 0")
+    for index in range(1, 4):
+      self.api.put(self.control, {"title": "title {}".format(index)})
+
+  def _get_change_log(self, **kwargs):
+    kwargs["object_type"] = self.control.type
+    kwargs["object_id"] = self.control.id
+    response = self.client.get(self.URL_BASE, query_string=kwargs)
+    self.assert200(response)
+    return response.json
+
+  def test_diffs(self):
+    """Every revision is diffed with the previous one."""
+    result = self._get_change_log()
+    self.assertEqual(result["total"], 4)
+    titles = [entry["diff"]["fields"].get("title")
+              for entry in result["data"]]
+    self.assertEqual(titles, ["title 3", "title 2", "title 1", "title 0"])
+    self.assertEqual(result["data"][-1]["action"], "created")
+
+  def test_pagination(self):
+    """The oldest revision of a page is diffed with the next page."""
+    result = self._get_change_log(limit="1,3")
+    self.assertEqual(result["total"], 4)
+    self.assertEqual(
+        [entry["diff"]["fields"].get("title") for entry in result["data"]],
+        ["title 2", "title 1"],
+    )
+
+  def test_cached_diffs(self):
+    """Diffs are built once and then read from memcache."""
+    expected = self._get_change_log()
+    with mock.patch.object(builder, "prepare_content_diff") as prepare_mock:
+      self.assertEqual(self._get_change_log(), expected)
+    prepare_mock.assert_not_called()
+
+  def test_bad_request(self):
+    """Invalid limits are rejected."""
+    response = self.client.get(self.URL_BASE, query_string={
+        "object_type": self.control.type,
+        "object_id": self.control.id,
+        "limit": "3,1",
+    })
+    self.assert400(response)
@@ -20,6 +20,7 @@ import mock
 
 from ggrc import db
 from ggrc.models import all_models
+from ggrc.models.import_export import ImportExportChunk
 from ggrc.notifications import import_export
 
 from integration.ggrc import api_helper
@@ -324,6 +325,111 @@ class TestImportExports(TestImportExportBase):
     self.assert200(response)
     self.assertEqual(response.data, "test content")
 
+  def test_export_download_chunks(self):
+    """Test exports are stored in chunks and downloaded as a whole"""
+    user = all_models.Person.query.first()
+    with factories.single_commit():
+      titles = [u"Assessment фыв {}".format(i) for i in range(10)]
+      ids = [factories.AssessmentFactory(title=title).id for title in titles]
+    with mock.patch("ggrc.settings.EXPORT_CHUNK_SIZE", 100):
+      response = self.client.post(
+          "/api/people/{}/exports".format(user.id),
+          data=json.dumps({
+              "objects": [{"object_name": "Assessment", "ids": ids}],
+              "current_time": str(datetime.now())}),
+          headers=self.headers)
+    self.assert200(response)
+    ie_id = response.json["id"]
+    self.assertIsNone(all_models.ImportExport.query.get(ie_id).content)
+    chunks = ImportExportChunk.query.filter_by(import_export_id=ie_id)
+    self.assertGreater(chunks.count(), 1)
+
+    response = self.client.get(
+        "/api/people/{}/exports/{}/download?export_to=csv".format(
+            user.id, ie_id),
+        headers=self.headers)
+    self.assert200(response)
+    content = response.data.decode("utf-8")
+    for title in titles:
+      self.assertIn(title, content)
+
+  def _run_export(self, user, objects, parallelism):
+    """Run an export job with given parallelism and return its id."""
+    response = self.client.post(
+        "/api/people/{}/exports".format(user.id),
+        data=json.dumps({
+            "objects": objects,
+            "parallelism": parallelism,
+            "current_time": str(datetime.now())}),
+        headers=self.headers)
+    self.assert200(response)
+    ie_id = response.json["id"]
+    self.assertEqual(all_models.ImportExport.query.get(ie_id).status,
+                     "Finished")
+    return ie_id
+
+  def _download_export(self, user, ie_id):
+    """Download content of a finished export job."""
+    response = self.client.get(
+        "/api/people/{}/exports/{}/download?export_to=csv".format(
+            user.id, ie_id),
+        headers=self.headers)
+    self.assert200(response)
+    return response.data
+
+  def _export_content(self, user, objects, parallelism):
+    """Run an export job with given parallelism and download its content."""
+    ie_id = self._run_export(user, objects, parallelism)
+    return self._download_export(user, ie_id)
+
+  def test_export_parts(self):
+    """Test export split into parts matches export in one task"""
+    user = all_models.Person.query.first()
+    with factories.single_commit():
+      assessment_ids = [factories.AssessmentFactory().id for _ in range(5)]
+      control_ids = [factories.ControlFactory().id for _ in range(3)]
+    objects = [
+        {"object_name": "Assessment", "ids": assessment_ids},
+        {"object_name": "Control", "ids": control_ids},
+    ]
+    with mock.patch("ggrc.settings.EXPORT_CHUNK_SIZE", 100):
+      content = self._export_content(user, objects, 3)
+    self.assertEqual(content, self._export_content(user, objects, 1))
+
+  def test_export_part_after_finish(self):
+    """Test part finding its job finished by another part keeps content.
+
+    Both parts commit their markers before either of them checks the job
+    under its lock. The part checking it first finishes the job and the
+    other one finds it finished.
+    """
+    user = all_models.Person.query.first()
+    with factories.single_commit():
+      control_ids = [factories.ControlFactory().id for _ in range(4)]
+    objects = [{"object_name": "Control", "ids": control_ids}]
+    ie_id = self._run_export(user, objects, 2)
+    content = self._download_export(user, ie_id)
+    part_task = next(
+        task for task in all_models.BackgroundTask.query
+        if task.name.endswith("export_part") and
+        task.parameters["ie_id"] == ie_id and
+        task.parameters["part_index"] == 0
+    )
+
+    # the part has read the job before the other part finished it
+    in_progress_job = mock.Mock(status="In Progress")
+    with mock.patch("ggrc.models.import_export.get",
+                    return_value=in_progress_job):
+      headers = dict(self.headers)
+      headers["X-Task-Name"] = part_task.name
+      response = self.client.post("/_background_tasks/run_export_part",
+                                  headers=headers)
+    self.assert200(response)
+
+    self.assertEqual(all_models.ImportExport.query.get(ie_id).status,
+                     "Finished")
+    self.assertEqual(self._download_export(user, ie_id), content)
+
   @ddt.data(u'漢字.csv', u'фыв.csv', u'asd.csv')
   def test_download_unicode_filename(self, filename):
     """Test import history download unicode filename"""
@@ -5,6 +5,7 @@
 
 import collections
 
+import mock
 import sqlalchemy as sa
 
 from ggrc import db
@@ -396,6 +397,44 @@ class TestSnapshoting(SnapshotterBaseTestCase):
   def test_creation_of_snapshots_for_multiple_parent_objects(self):
     pass
 
+  @mock.patch("ggrc.settings.SNAPSHOT_CHUNK_SIZE", 2)
+  def test_snapshot_create_in_chunks(self):
+    """Test snapshots and their relationships are created chunk by chunk."""
+    program = self.create_object(models.Program, {
+        "title": "Test Program Snapshot 1"
+    })
+    controls = [
+        self.create_object(models.Control, {
+            "title": "Test Control Snapshot {}".format(i)
+        })
+        for i in range(5)
+    ]
+    for control in controls:
+      self.create_mapping(program, control)
+    self.create_mapping(controls[0], controls[4])
+
+    self.create_audit(program)
+    audit = db.session.query(models.Audit).one()
+
+    snapshots = models.Snapshot.query.filter(
+        models.Snapshot.parent_id == audit.id,
+    ).all()
+    self.assertEqual(len(snapshots), 5)
+    snapshot_ids = {snapshot.id for snapshot in snapshots}
+    self.assertEqual(models.Revision.query.filter(
+        models.Revision.resource_type == "Snapshot",
+        models.Revision.resource_id.in_(snapshot_ids),
+    ).count(), 5)
+    self.assertEqual(models.Relationship.query.filter(
+        models.Relationship.source_type == "Audit",
+        models.Relationship.source_id == audit.id,
+        models.Relationship.destination_type == "Snapshot",
+        models.Relationship.destination_id.in_(snapshot_ids),
+    ).count(), 5)
+    self.assertEqual(self.collect_snapshot_mappings([
+        ("Control", controls[0].id),
+    ]).count(), 1)
+
   def test_individual_update(self):
     """Test update of individual snapshot
 
@@ -0,0 +1,128 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+"""Tests for latest revision pointers."""
+
+import mock
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc.migrations import utils as migration_utils
+from ggrc.migrations.utils import snapshot_revisions
+from ggrc.models import all_models
+from ggrc.models.revision import LatestRevision
+from ggrc.utils import latest_revisions
+
+from integration.ggrc import api_helper
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestLatestRevisions(TestCase):
+  """Tests for latest revision pointers."""
+
+  def setUp(self):
+    super(TestLatestRevisions, self).setUp()
+    self.api = api_helper.Api()
+
+  @staticmethod
+  def _get_max_revision_ids():
+    query = db.session.query(
+        sa.func.max(all_models.Revision.id),
+        all_models.Revision.resource_type,
+        all_models.Revision.resource_id,
+    ).group_by(
+        all_models.Revision.resource_type,
+        all_models.Revision.resource_id,
+    )
+    return {(type_, id_): rev_id for rev_id, type_, id_ in query}
+
+  @staticmethod
+  def _get_pointers():
+    query = db.session.query(
+        LatestRevision.revision_id,
+        LatestRevision.resource_type,
+        LatestRevision.resource_id,
+    )
+    return {(type_, id_): rev_id for rev_id, type_, id_ in query}
+
+  def test_pointer_follows_revisions(self):
+    """Latest revision pointer moves with every logged revision."""
+    with factories.single_commit():
+      control = factories.ControlFactory()
+    control_id = control.id
+    self.api.put(control, {"title": "new title"})
+
+    latest_id = db.session.query(
+        sa.func.max(all_models.Revision.id),
+    ).filter(
+        all_models.Revision.resource_type == "Control",
+        all_models.Revision.resource_id == control_id,
+    ).scalar()
+    self.assertEqual(self._get_pointers()[("Control", control_id)],
+                     latest_id)
+    self.assertEqual(
+        latest_revisions.get_latest_revision_id("Control", control_id),
+        latest_id,
+    )
+
+  def test_backfill(self):
+    """Backfill points all resources to their latest revisions."""
+    with factories.single_commit():
+      for _ in range(3):
+        factories.ControlFactory()
+    db.session.query(LatestRevision).delete()
+    db.session.commit()
+
+    latest_revisions.backfill()
+    self.assertEqual(self._get_pointers(), self._get_max_revision_ids())
+
+  def test_lookup_without_pointer(self):
+    """Resources without a pointer are looked up in revisions."""
+    with factories.single_commit():
+      control = factories.ControlFactory()
+    key = ("Control", control.id)
+    db.session.query(LatestRevision).delete()
+    db.session.commit()
+
+    self.assertEqual(latest_revisions.get_latest_revision_ids([key]),
+                     {key: self._get_max_revision_ids()[key]})
+
+  def test_migration_revision(self):
+    """Revision created by a migration becomes the latest one."""
+    with factories.single_commit():
+      control = factories.ControlFactory()
+    key = ("Control", control.id)
+    old_id = self._get_pointers()[key]
+
+    connection = db.session.connection()
+    event_id = migration_utils.create_event(connection, None, "Control")
+    migration_utils.create_revision(connection, control.slug, control.id,
+                                    "{}", event_id, "Control", "modified",
+                                    None)
+    db.session.commit()
+
+    new_id = self._get_max_revision_ids()[key]
+    self.assertGreater(new_id, old_id)
+    self.assertEqual(self._get_pointers()[key], new_id)
+    self.assertEqual(latest_revisions.get_latest_revision_ids([key]),
+                     {key: new_id})
+
+  def test_migration_missing_revisions(self):
+    """Missing revisions created by a migration get pointers."""
+    with factories.single_commit():
+      control = factories.ControlFactory()
+    key = ("Control", control.id)
+    db.session.query(all_models.Revision).filter_by(
+        resource_type="Control",
+        resource_id=control.id,
+    ).delete()
+    db.session.query(LatestRevision).delete()
+    db.session.commit()
+
+    with mock.patch.object(snapshot_revisions, "op") as op:
+      op.get_bind.return_value = db.session.connection()
+      snapshot_revisions.handle_objects(["Control"])
+    db.session.commit()
+
+    self.assertEqual(self._get_pointers()[key],
+                     self._get_max_revision_ids()[key])
@@ -0,0 +1,59 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+"""Tests for event logging."""
+
+import mock
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.utils import latest_revisions
+from ggrc.utils import log_event
+
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestLogEvent(TestCase):
+  """Tests for event logging."""
+
+  # columns that do not depend on the logged object
+  COLUMNS = ("resource_type", "action", "content_version", "source_type",
+             "source_id", "destination_type", "destination_id")
+
+  def _log_changes(self, bulk):
+    """Modify controls, log the changes and return the event."""
+    with factories.single_commit():
+      controls = [factories.ControlFactory() for _ in range(3)]
+    for control in controls:
+      control.title = "new {}".format(control.title)
+    with mock.patch.object(log_event, "BULK_INSERT_CHUNK_SIZE", 2):
+      event = log_event.log_event(db.session, bulk=bulk)
+    db.session.commit()
+    return event
+
+  def _get_revisions(self, revision_ids):
+    revisions = all_models.Revision.query.filter(
+        all_models.Revision.id.in_(revision_ids),
+    ).order_by(all_models.Revision.id)
+    return [tuple(getattr(rev, column) for column in self.COLUMNS) +
+            (rev.content["title"].startswith("new "),) for rev in revisions]
+
+  def test_bulk_revisions(self):
+    """Bulk mode writes the same revisions as ORM mode."""
+    event = self._log_changes(bulk=False)
+    orm_revisions = self._get_revisions(event.revision_ids)
+
+    bulk_event = self._log_changes(bulk=True)
+    self.assertFalse(bulk_event.revisions)
+    self.assertEqual(len(bulk_event.revision_ids), 3)
+    bulk_revisions = self._get_revisions(bulk_event.revision_ids)
+
+    self.assertEqual(bulk_revisions, orm_revisions)
+    for revision_id in bulk_event.revision_ids:
+      revision = all_models.Revision.query.get(revision_id)
+      self.assertEqual(revision.event_id, bulk_event.id)
+      self.assertEqual(
+          latest_revisions.get_latest_revision_id(revision.resource_type,
+                                                  revision.resource_id),
+          revision_id,
+      )
@@ -0,0 +1,54 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for automapping generator."""
+
+# pylint: disable=protected-access
+
+from unittest import TestCase
+
+import mock
+
+from ggrc import automapper
+from ggrc.models import exceptions
+from ggrc.models.relationship import Stub
+
+
+@mock.patch("ggrc.automapper.db.session.execute", return_value=[])
+class TestSingleAuditRestriction(TestCase):
+  """Unit tests for the single audit restriction of Issues."""
+
+  def setUp(self):
+    self.generator = automapper.AutomapperGenerator()
+
+  def test_single_audit(self, _):
+    """Issue may be mapped to one Audit."""
+    self.generator.auto_mappings = {(Stub("Audit", 1), Stub("Issue", 2))}
+    self.generator._check_single_audit_restriction({
+        (Stub("Audit", 1), Stub("Issue", 1)),
+        (Stub("Audit", 1), Stub("Issue", 2)),
+    })
+
+  def test_multiple_audits(self, _):
+    """Issue may not be mapped to Audits of the same level."""
+    with self.assertRaises(exceptions.ValidationError):
+      self.generator._check_single_audit_restriction({
+          (Stub("Audit", 1), Stub("Issue", 1)),
+          (Stub("Audit", 2), Stub("Issue", 1)),
+      })
+
+  def test_previous_level(self, _):
+    """Issue may not be mapped to an Audit of a previous level."""
+    self.generator.auto_mappings = {(Stub("Audit", 1), Stub("Issue", 1))}
+    with self.assertRaises(exceptions.ValidationError):
+      self.generator._check_single_audit_restriction({
+          (Stub("Audit", 2), Stub("Issue", 1)),
+      })
+
+  def test_mapped_issue(self, execute):
+    """Issue may not be mapped to an Audit if it is mapped in the database."""
+    execute.return_value = [(1,)]
+    with self.assertRaises(exceptions.ValidationError):
+      self.generator._check_single_audit_restriction({
+          (Stub("Audit", 2), Stub("Issue", 1)),
+      })
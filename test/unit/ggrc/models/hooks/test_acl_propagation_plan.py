@@ -0,0 +1,78 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for compiled ACL propagation plan."""
+
+import unittest
+
+import mock
+from sqlalchemy.dialects import mysql
+
+from ggrc.models.hooks.acl import propagation
+from ggrc.models.hooks.acl import propagation_plan
+
+
+class TestPropagationPlan(unittest.TestCase):
+  """Tests for propagation plan compilation and use."""
+
+  ROLES = [
+      # id, parent_id, object_type
+      (1, None, "Program"),
+      (2, 1, "Relationship"),
+      (3, 2, "Audit"),
+      (4, 2, "Control"),
+      (5, 3, "Relationship"),
+      (6, 5, "Assessment"),
+      # relationship role without child roles does not propagate
+      (7, 1, "Relationship"),
+      # non relationship children are not part of the plan
+      (8, 1, "Audit"),
+  ]
+
+  def setUp(self):
+    self.plan = propagation_plan.PropagationPlan(self.ROLES)
+
+  def test_relationship_roles(self):
+    """Object roles propagate to relationships leading to child roles."""
+    self.assertEqual(dict(self.plan.relationship_roles), {
+        (1, "Audit"): {2},
+        (1, "Control"): {2},
+        (3, "Assessment"): {5},
+    })
+
+  def test_object_roles(self):
+    """Relationship roles propagate to objects by object type."""
+    self.assertEqual(dict(self.plan.object_roles), {
+        (2, "Audit"): {3},
+        (2, "Control"): {4},
+        (5, "Assessment"): {6},
+    })
+
+  @mock.patch("ggrc.models.hooks.acl.propagation_plan._get_signature")
+  @mock.patch("ggrc.models.hooks.acl.propagation_plan.db")
+  def test_plan_cache(self, db_mock, signature_mock):
+    """Plan is compiled again only after a role change."""
+    propagation_plan.invalidate()
+    db_mock.session.query.return_value = self.ROLES
+    signature_mock.return_value = (8, 8, None, 14)
+
+    plan = propagation_plan.get_plan()
+    self.assertIs(propagation_plan.get_plan(), plan)
+
+    signature_mock.return_value = (9, 9, None, 14)
+    self.assertIsNot(propagation_plan.get_plan(), plan)
+    propagation_plan.invalidate()
+
+  def test_propagation_sql(self):
+    """Propagation statements do not join access control roles."""
+    # pylint: disable=protected-access
+    statements = [
+        propagation._rel_parent(self.plan, [1, 2], source=True),
+        propagation._rel_parent(self.plan, [1], relationship_ids=[3],
+                                source=False),
+        propagation._rel_child(self.plan, [1, 2], source=True),
+    ]
+    for statement in statements:
+      sql = str(statement.compile(dialect=mysql.dialect()))
+      self.assertNotIn("access_control_roles", sql)
+      self.assertIn("access_control_list.ac_role_id", sql)
@@ -0,0 +1,86 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for recursive ACL propagation."""
+
+import collections
+import unittest
+
+import ddt
+import mock
+
+from ggrc.models.hooks.acl import recursive_propagation
+
+
+ClosureRow = collections.namedtuple("ClosureRow", [
+    "ac_role_id", "object_id", "object_type", "created_at", "base_id",
+    "depth", "path", "parent_path",
+])
+AclRow = collections.namedtuple("AclRow", [
+    "id", "parent_id", "ac_role_id", "object_type", "object_id",
+])
+
+
+@ddt.ddt
+class TestRecursivePropagation(unittest.TestCase):
+  """Tests for recursive ACL propagation helpers."""
+
+  @ddt.data(
+      ("mysql", (5, 7, 25), False),
+      ("mysql", (8, 0, 15), True),
+      ("mysql", (10, 1, 38, "MariaDB"), False),
+      ("mysql", (10, 3, 12, "MariaDB"), True),
+      ("mysql", None, False),
+      ("sqlite", (3, 25, 0), False),
+  )
+  @ddt.unpack
+  def test_server_support(self, name, version, expected):
+    """Recursive CTE support of {0} {1} is {2}."""
+    dialect = mock.Mock(server_version_info=version)
+    dialect.name = name
+    self.assertEqual(
+        recursive_propagation._server_supports_cte(dialect),  # noqa pylint: disable=protected-access
+        expected,
+    )
+
+  def test_closure_sql(self):
+    """Closure statement has a bind parameter for every parent id."""
+    sql = recursive_propagation._get_closure_sql([1, 2, 3])  # noqa pylint: disable=protected-access
+    self.assertIn("WITH RECURSIVE closure", sql)
+    self.assertIn("acl.id IN (:acl_id_0, :acl_id_1, :acl_id_2)", sql)
+    self.assertEqual(sql.count("UNION ALL"), 4)
+
+  @mock.patch("ggrc.models.hooks.acl.recursive_propagation.acl_utils")
+  @mock.patch("ggrc.models.hooks.acl.recursive_propagation.db")
+  def test_propagate_levels(self, db_mock, acl_utils_mock):
+    """Closure rows are inserted level by level with resolved parent ids."""
+    closure = [
+        ClosureRow(11, 100, "Relationship", "now", 1, 1, u"1/11:100", u"1"),
+        ClosureRow(12, 200, "Audit", "now", 1, 2, u"1/11:100/12:200",
+                   u"1/11:100"),
+    ]
+    db_mock.session.execute.side_effect = [
+        mock.Mock(fetchall=mock.Mock(return_value=closure)),
+        [AclRow(50, 1, 11, "Relationship", 100)],
+        [AclRow(60, 50, 12, "Audit", 200)],
+    ]
+
+    recursive_propagation.propagate([1], 7, depth_limit=5)
+
+    inserted = [call[0][0] for call in
+                acl_utils_mock.insert_acl_records.call_args_list]
+    self.assertEqual(inserted, [
+        [(11, 100, "Relationship", "now", 7, "now", 1, 1, 1)],
+        [(12, 200, "Audit", "now", 7, "now", 50, 50, 1)],
+    ])
+
+  @mock.patch("ggrc.models.hooks.acl.recursive_propagation.acl_utils")
+  @mock.patch("ggrc.models.hooks.acl.recursive_propagation.db")
+  def test_depth_limit(self, db_mock, acl_utils_mock):
+    """Too deep propagation trees raise an exception."""
+    closure = [ClosureRow(11, 100, "Relationship", "now", 1, 2, u"x", u"1")]
+    db_mock.session.execute.return_value.fetchall.return_value = closure
+
+    with self.assertRaises(Exception):
+      recursive_propagation.propagate([1], 7, depth_limit=1)
+    self.assertFalse(acl_utils_mock.insert_acl_records.called)
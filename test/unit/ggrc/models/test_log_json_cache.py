@@ -0,0 +1,157 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for memoization of log_json output."""
+
+import unittest
+
+import mock
+import sqlalchemy as sa
+from sqlalchemy.ext import declarative
+
+from ggrc.models import log_json_cache
+
+
+Base = declarative.declarative_base()  # pylint: disable=invalid-name
+
+
+class Parent(Base):
+  """Model serializing its children."""
+  __tablename__ = "log_json_cache_parents"
+  id = sa.Column(sa.Integer, primary_key=True)
+  title = sa.Column(sa.String)
+  children = sa.orm.relationship("Child")
+
+  def log_json(self):
+    return {
+        "title": self.title,
+        "children": [child.log_json() for child in self.children],
+    }
+
+
+class Child(Base):
+  """Model serialized by its parent."""
+  __tablename__ = "log_json_cache_children"
+  id = sa.Column(sa.Integer, primary_key=True)
+  parent_id = sa.Column(sa.Integer, sa.ForeignKey(Parent.id))
+  title = sa.Column(sa.String)
+
+  def log_json(self):
+    return {"title": self.title}
+
+
+class SpecialParent(Parent):
+  """Model extending log_json of its parent model."""
+  __tablename__ = "log_json_cache_special_parents"
+  id = sa.Column(sa.Integer, sa.ForeignKey(Parent.id), primary_key=True)
+
+  def log_json(self):
+    res = super(SpecialParent, self).log_json()
+    res["special"] = True
+    return res
+
+
+class InheritingParent(Parent):
+  """Model inheriting log_json of its parent model."""
+  __tablename__ = "log_json_cache_inheriting_parents"
+  id = sa.Column(sa.Integer, sa.ForeignKey(Parent.id), primary_key=True)
+
+
+log_json_cache.init([Parent, Child, SpecialParent, InheritingParent])
+
+
+@mock.patch("ggrc.utils.metrics.count_log_json")
+class TestLogJsonCache(unittest.TestCase):
+  """Tests for memoized log_json."""
+  # pylint: disable=protected-access
+
+  def setUp(self):
+    self.child = Child(title="child")
+    self.parent = Parent(title="parent", children=[self.child])
+
+  @staticmethod
+  def _results(count_mock):
+    return [call[0][1] for call in count_mock.call_args_list]
+
+  def test_memo(self, count_mock):
+    """Unchanged objects are serialized once."""
+    expected = {"title": "parent", "children": [{"title": "child"}]}
+    self.assertEqual(self.parent.log_json(), expected)
+    self.assertEqual(self.parent.log_json(), expected)
+    self.assertEqual(self._results(count_mock), [False, False, True])
+
+  def test_memo_copy(self, _):
+    """Changes of the returned output do not leak into the memo."""
+    self.parent.log_json()["children"].append("changed")
+    self.assertEqual(len(self.parent.log_json()["children"]), 1)
+
+  def test_attribute_change(self, count_mock):
+    """Attribute change of a related object invalidates the memo."""
+    self.parent.log_json()
+    self.child.title = "new child"
+    self.assertEqual(self.parent.log_json()["children"],
+                     [{"title": "new child"}])
+    self.assertNotIn(True, self._results(count_mock))
+
+  def test_collection_change(self, _):
+    """Collection change invalidates the memo."""
+    self.parent.log_json()
+    self.parent.children.append(Child(title="second"))
+    self.assertEqual(len(self.parent.log_json()["children"]), 2)
+
+  def test_subclass(self, count_mock):
+    """Subclasses are memoized with their own output."""
+    special = SpecialParent(title="special")
+    self.assertTrue(special.log_json()["special"])
+    self.assertTrue(special.log_json()["special"])
+    # super call to the parent model is not memoized
+    self.assertEqual(self._results(count_mock), [False, True])
+
+  def test_inherited_log_json(self, count_mock):
+    """Subclasses inheriting log_json are memoized."""
+    inheriting = InheritingParent(title="inheriting")
+    self.assertEqual(inheriting.log_json()["title"], "inheriting")
+    self.assertEqual(inheriting.log_json()["title"], "inheriting")
+    self.assertEqual(self._results(count_mock), [False, True])
+    self.assertEqual(count_mock.call_args[0][0], "InheritingParent")
+
+  def test_unrelated_change(self, count_mock):
+    """Change of an unrelated object keeps the memo."""
+    self.parent.log_json()
+    other = Child(title="other")
+    other.title = "changed"
+    self.parent.log_json()
+    self.assertEqual(self._results(count_mock), [False, False, True])
+
+  def test_flush(self, count_mock):
+    """Unchanged objects are served from memo across flushes."""
+    other = Parent(title="other")
+    session = mock.Mock(new=[other], dirty=[], deleted=[])
+    self.parent.log_json()
+    log_json_cache._after_flush(session, None)
+    other.title = "changed"
+    log_json_cache._after_flush(session, None)
+    self.assertEqual(self.parent.log_json()["title"], "parent")
+    self.assertEqual(self._results(count_mock), [False, False, True])
+
+  def test_flushed_related_object(self, count_mock):
+    """Flush of a related object invalidates the memo."""
+    self.parent.log_json()
+    session = mock.Mock(new=[], dirty=[self.child], deleted=[])
+    log_json_cache._after_flush(session, None)
+    self.parent.log_json()
+    self.assertNotIn(True, self._results(count_mock))
+
+  def test_depend_on(self, _):
+    """Objects read without log_json are declared as dependencies."""
+    other = Child(title="other")
+
+    def log_json(parent):
+      log_json_cache.depend_on(other)
+      return {"title": parent.title, "other": other.title}
+
+    with mock.patch.object(Parent, "log_json",
+                           log_json_cache._memoize(Parent, log_json)):
+      self.parent.log_json()
+      other.title = "changed"
+      self.assertEqual(self.parent.log_json()["other"], "changed")
@@ -304,3 +304,88 @@ class TestCheckPopulatedContent(unittest.TestCase):
 
         for acl in revision.content["access_control_list"]:
           self.assertIsNone(acl.get("parent_id"))
+
+  @mock.patch("ggrc.models.custom_attribute_definition."
+              "get_custom_attributes_for", return_value=[])
+  @mock.patch("ggrc.access_control.role.get_custom_roles_for",
+              return_value={})
+  def test_content_version(self, *_):
+    """Content of older revisions is upgraded once and memoized."""
+    # pylint: disable=protected-access
+    obj = mock.Mock()
+    obj.id = self.object_id
+    obj.__class__.__name__ = "Control"
+    revision = all_models.Revision(obj, mock.Mock(), mock.Mock(),
+                                   {"label": "label"})
+    revision.id = 1
+    revision.created_at = datetime.datetime(2019, 3, 5)
+    self.assertNotIn("labels", revision.content)
+
+    revision.content_version = 0
+    with mock.patch.object(revision, "_upgrade_content",
+                           wraps=revision._upgrade_content) as upgrade:
+      self.assertEqual(revision.content["labels"],
+                       [{"id": None, "name": "label"}])
+      self.assertEqual(revision.content["labels"],
+                       [{"id": None, "name": "label"}])
+      upgrade.assert_called_once_with()
+
+  @mock.patch("ggrc.models.custom_attribute_definition."
+              "get_custom_attributes_for", return_value=[])
+  @mock.patch("ggrc.access_control.role.get_custom_roles_for",
+              return_value={})
+  def test_status_of_all_versions(self, *_):
+    """Status is mapped the same way for all content versions."""
+    obj = mock.Mock()
+    obj.id = self.object_id
+    obj.__class__.__name__ = "Issue"
+    revision = all_models.Revision(obj, mock.Mock(), mock.Mock(),
+                                   {"status": "Fixed"})
+    revision.id = 3
+    revision.created_at = datetime.datetime(2019, 3, 5)
+    current_status = revision.content["status"]
+
+    revision.content_version = 0
+    self.assertEqual(revision.content["status"], current_status)
+
+  @mock.patch("ggrc.models.custom_attribute_definition."
+              "get_custom_attributes_for", return_value=[])
+  @mock.patch("ggrc.access_control.role.get_custom_roles_for",
+              return_value={})
+  def test_content_setter(self, *_):
+    """Setting content drops memoized upgraded content."""
+    obj = mock.Mock()
+    obj.id = self.object_id
+    obj.__class__.__name__ = "Control"
+    revision = all_models.Revision(obj, mock.Mock(), mock.Mock(),
+                                   {"label": "label"})
+    revision.id = 2
+    revision.created_at = datetime.datetime(2019, 3, 5)
+    revision.content_version = 0
+    self.assertEqual(revision.content["labels"],
+                     [{"id": None, "name": "label"}])
+
+    revision.content = {"label": "new label"}
+    self.assertEqual(revision.content["labels"],
+                     [{"id": None, "name": "new label"}])
+
+  @mock.patch("ggrc.models.custom_attribute_definition."
+              "get_custom_attributes_for", return_value=[])
+  def test_renamed_role(self, _):
+    """Memoized upgraded content follows renamed roles."""
+    obj = mock.Mock()
+    obj.id = self.object_id
+    obj.__class__.__name__ = "Risk"
+    revision = all_models.Revision(obj, mock.Mock(), mock.Mock(),
+                                   {"owners": [{"id": self.user_id}]})
+    revision.id = 4
+    revision.created_at = datetime.datetime(2019, 3, 5)
+    revision.content_version = 0
+    with mock.patch("ggrc.access_control.role.get_custom_roles_for",
+                    return_value={1: "Admin"}):
+      acl = revision.content["access_control_list"]
+      self.assertEqual([(entry["ac_role_id"], entry["display_name"])
+                        for entry in acl], [(1, "Admin")])
+    with mock.patch("ggrc.access_control.role.get_custom_roles_for",
+                    return_value={1: "Owner"}):
+      self.assertEqual(revision.content["access_control_list"], [])
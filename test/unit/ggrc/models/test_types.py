@@ -0,0 +1,70 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for custom column types."""
+
+import unittest
+
+import ddt
+import mock
+
+from ggrc.models import types
+
+
+@ddt.ddt
+class TestLongJsonType(unittest.TestCase):
+  """Tests for compressed storage of JSON columns."""
+
+  CONTENT = {
+      "title": u"Control \u2713",
+      "access_control_list": [{"person_id": i, "ac_role_id": 1}
+                              for i in range(100)],
+  }
+
+  @ddt.data(types.ZLIB_CODEC, types.ZSTD_CODEC)
+  def test_compressed_round_trip(self, codec):
+    """Compressed values are read back transparently."""
+    column_type = types.LongJsonType(compressed=True)
+    with mock.patch("ggrc.settings.JSON_COMPRESSION_CODEC", codec):
+      stored = column_type.process_bind_param(self.CONTENT, None)
+    self.assertTrue(stored.startswith(types.COMPRESSION_MARKER))
+    self.assertIsNotNone(types.get_json_codec(stored))
+    self.assertEqual(column_type.process_result_value(stored, None),
+                     self.CONTENT)
+
+  @mock.patch("ggrc.models.types.zstandard", None)
+  @mock.patch.dict("ggrc.models.types._WRITE_CODECS", clear=True)
+  @mock.patch("ggrc.models.types.logger")
+  def test_missing_zstd(self, logger):
+    """Missing zstandard falls back to zlib with a single warning."""
+    column_type = types.LongJsonType(compressed=True)
+    with mock.patch("ggrc.settings.JSON_COMPRESSION_CODEC", types.ZSTD_CODEC):
+      for _ in range(3):
+        stored = column_type.process_bind_param(self.CONTENT, None)
+        self.assertEqual(types.get_json_codec(stored), types.ZLIB_CODEC)
+    self.assertEqual(logger.warning.call_count, 1)
+
+  def test_plain_values(self):
+    """Plain JSON is stored for disabled compression and small values."""
+    column_type = types.LongJsonType(compressed=True)
+    with mock.patch("ggrc.settings.JSON_COMPRESSION_CODEC", ""):
+      stored = column_type.process_bind_param(self.CONTENT, None)
+    self.assertIsNone(types.get_json_codec(stored))
+    with mock.patch("ggrc.settings.JSON_COMPRESSION_CODEC",
+                    types.ZLIB_CODEC):
+      small = column_type.process_bind_param({"id": 1}, None)
+    self.assertEqual(small, '{"id": 1}')
+    self.assertEqual(column_type.process_result_value(stored, None),
+                     self.CONTENT)
+
+  def test_uncompressed_column(self):
+    """Columns without compression never compress values."""
+    with mock.patch("ggrc.settings.JSON_COMPRESSION_CODEC",
+                    types.ZLIB_CODEC):
+      stored = types.LongJsonType().process_bind_param(self.CONTENT, None)
+    self.assertIsNone(types.get_json_codec(stored))
+
+  def test_unknown_header(self):
+    """Values with an unknown codec version are not guessed."""
+    with self.assertRaises(ValueError):
+      types.decompress_json(types.COMPRESSION_MARKER + "z9abc")
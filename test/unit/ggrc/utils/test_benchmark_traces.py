@@ -0,0 +1,99 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for benchmark traces."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from ggrc.utils import benchmarks
+
+
+class TestTraceBenchmark(unittest.TestCase):
+  """Tests for TraceBenchmark."""
+
+  def setUp(self):
+    self.trace_dir = tempfile.mkdtemp()
+    self.settings_patch = mock.patch.multiple(
+        "ggrc.utils.benchmarks.settings",
+        DEBUG_BENCHMARK=None,
+        BENCHMARK_TRACE_DIR=self.trace_dir,
+    )
+    self.settings_patch.start()
+
+  def tearDown(self):
+    self.settings_patch.stop()
+    benchmarks.finish_trace()
+    shutil.rmtree(self.trace_dir)
+
+  def _read_traces(self):
+    traces = []
+    for name in sorted(os.listdir(self.trace_dir)):
+      with open(os.path.join(self.trace_dir, name)) as trace_file:
+        traces.append(json.load(trace_file))
+    return traces
+
+  def test_get_benchmark(self):
+    """Trace benchmark is used when trace dir is set."""
+    self.assertIs(benchmarks.get_benchmark(), benchmarks.TraceBenchmark)
+
+  def test_nested_spans(self):
+    """Nested benchmarks are recorded as child spans."""
+    benchmarks.start_trace("GET /api/controls", path="/api/controls")
+    with benchmarks.TraceBenchmark("outer", model="Control") as outer:
+      with benchmarks.TraceBenchmark("inner") as inner:
+        inner.set_attribute("row_count", 3)
+        self.assertEqual(benchmarks.get_current_label(), "inner")
+    trace = benchmarks.finish_trace()
+
+    self.assertEqual(outer.parent_span_id, None)
+    self.assertEqual(inner.parent_span_id, outer.span_id)
+    traces = self._read_traces()
+    self.assertEqual(len(traces), 1)
+    events = {event["name"]: event for event in traces[0]["traceEvents"]}
+    self.assertEqual(set(events), {"outer", "inner"})
+    self.assertEqual(events["outer"]["args"]["model"], "Control")
+    self.assertEqual(events["inner"]["args"]["row_count"], 3)
+    self.assertEqual(events["inner"]["args"]["parent_span_id"],
+                     events["outer"]["args"]["span_id"])
+    self.assertEqual(events["inner"]["args"]["trace_id"], trace.trace_id)
+    self.assertEqual(events["outer"]["ph"], "X")
+    self.assertGreaterEqual(events["outer"]["dur"], events["inner"]["dur"])
+    self.assertEqual(traces[0]["otherData"]["path"], "/api/controls")
+
+  def test_implicit_trace(self):
+    """Benchmark outside of a trace writes a trace of its own."""
+    with benchmarks.TraceBenchmark("script"):
+      with benchmarks.TraceBenchmark("step"):
+        pass
+    self.assertIsNone(benchmarks.get_current_trace())
+    traces = self._read_traces()
+    self.assertEqual(len(traces), 1)
+    self.assertEqual(len(traces[0]["traceEvents"]), 2)
+
+  def test_error_attribute(self):
+    """Span of a failed block gets error attribute."""
+    benchmarks.start_trace("trace")
+    with self.assertRaises(ValueError):
+      with benchmarks.TraceBenchmark("failing"):
+        raise ValueError()
+    trace = benchmarks.finish_trace()
+    self.assertEqual(trace.spans[0]["attributes"]["error"], "ValueError")
+
+  def test_empty_trace_not_written(self):
+    """Traces without spans are not written."""
+    benchmarks.start_trace("trace")
+    benchmarks.finish_trace()
+    self.assertEqual(self._read_traces(), [])
+
+  def test_other_benchmarks_accept_attributes(self):
+    """Attributes are accepted by benchmarks that do not record them."""
+    for benchmark_class in (benchmarks.BenchmarkContextManager,
+                            benchmarks.DebugBenchmark):
+      with benchmark_class("message", model="Control") as span:
+        span.set_attribute("row_count", 1)
@@ -0,0 +1,72 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for response compression."""
+
+import unittest
+import zlib
+
+import ddt
+import flask
+import mock
+
+from ggrc.utils import compression
+
+
+def _gunzip(data):
+  return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+
+
+@ddt.ddt
+class TestCompression(unittest.TestCase):
+  """Tests for response compression."""
+
+  BODY = '{"controls": [' + ", ".join(['{"id": 1}'] * 500) + ']}'
+
+  def setUp(self):
+    self.request = mock.MagicMock(endpoint="test_endpoint")
+    self.request.headers = {"Accept-Encoding": "gzip, deflate"}
+
+  @ddt.data(
+      ("gzip", "gzip"),
+      ("gzip;q=0", None),
+      ("deflate, gzip;q=0.5", "gzip"),
+      ("*", "gzip"),
+      ("", None),
+      (None, None),
+  )
+  @ddt.unpack
+  @mock.patch("ggrc.utils.compression.brotli", None)
+  def test_choose_encoding(self, accept_encoding, expected):
+    """Test encoding for Accept-Encoding '{0}'."""
+    self.assertEqual(compression.choose_encoding(accept_encoding), expected)
+
+  def test_compress_response(self):
+    """Test large responses are compressed."""
+    response = flask.Response(self.BODY, mimetype="application/json")
+    compression.compress_response(self.request, response)
+    self.assertEqual(response.headers["Content-Encoding"], "gzip")
+    self.assertIn("Accept-Encoding", response.headers["Vary"])
+    self.assertEqual(_gunzip(response.get_data()), self.BODY)
+    stats = compression.get_stats()["test_endpoint"]
+    self.assertGreater(stats["raw_bytes"], stats["compressed_bytes"])
+
+  @ddt.data(
+      flask.Response("{}", mimetype="application/json"),
+      flask.Response(BODY, mimetype="image/png"),
+      flask.Response(BODY, status=304, mimetype="application/json"),
+  )
+  def test_skip_compression(self, response):
+    """Test small, binary and empty responses are not compressed."""
+    compression.compress_response(self.request, response)
+    self.assertNotIn("Content-Encoding", response.headers)
+
+  def test_compress_stream(self):
+    """Test streamed responses are compressed chunk by chunk."""
+    chunks = [self.BODY[i:i + 100] for i in range(0, len(self.BODY), 100)]
+    response = flask.Response(iter(chunks), mimetype="application/json")
+    compression.compress_response(self.request, response)
+    self.assertEqual(response.headers["Content-Encoding"], "gzip")
+    compressed = list(response.response)
+    self.assertGreater(len(compressed), 1)
+    self.assertEqual(_gunzip("".join(compressed)), self.BODY)
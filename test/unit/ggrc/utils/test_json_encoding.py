@@ -0,0 +1,67 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for JSON encoding backends."""
+
+import datetime
+import json
+import unittest
+
+import ddt
+import mock
+
+from ggrc import utils
+from ggrc.utils import json_encoding
+
+
+@ddt.ddt
+class TestJsonEncoding(unittest.TestCase):
+  """Tests for JSON encoding backends."""
+
+  DATA = {
+      "collection": {
+          "selfLink": "/api/controls",
+          "controls": [
+              {"id": 1, "title": u"\xe9 title",
+               "updated_at": datetime.datetime(2019, 1, 2, 3, 4, 5)},
+              {"id": 2, "due_on": datetime.date(2019, 1, 2),
+               "tags": {"a"}, "none": None},
+          ],
+      },
+      "count": 2,
+  }
+
+  def setUp(self):
+    json_encoding._BACKEND = None  # pylint: disable=protected-access
+
+  def tearDown(self):
+    json_encoding._BACKEND = None  # pylint: disable=protected-access
+
+  @ddt.data("auto", "json", "simplejson")
+  def test_dumps(self, backend):
+    """Test {} backend produces the same JSON as as_json."""
+    with mock.patch.object(json_encoding.settings, "JSON_ENCODER", backend):
+      self.assertEqual(json.loads(json_encoding.dumps(self.DATA)),
+                       json.loads(utils.as_json(self.DATA)))
+
+  def test_unknown_backend(self):
+    """Test unknown backend falls back to stdlib json."""
+    with mock.patch.object(json_encoding.settings, "JSON_ENCODER", "foo"):
+      self.assertEqual(json_encoding.get_backend()[0], "json")
+
+  @ddt.data(1, 10, json_encoding.STREAM_CHUNK_SIZE)
+  def test_iterencode(self, chunk_size):
+    """Test iterencode with chunk size {}."""
+    chunks = list(json_encoding.iterencode(self.DATA, chunk_size))
+    self.assertEqual(json.loads("".join(chunks)),
+                     json.loads(utils.as_json(self.DATA)))
+    if chunk_size == 1:
+      self.assertGreater(len(chunks), 1)
+
+  def test_iterencode_int_keys(self):
+    """Test iterencode with non string dict keys."""
+    data = {1: [1, 2], "2": {3: "a"}}
+    self.assertEqual(
+        json.loads("".join(json_encoding.iterencode(data, 1))),
+        json.loads(utils.as_json(data)),
+    )
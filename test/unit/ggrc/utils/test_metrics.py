@@ -0,0 +1,147 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for runtime metrics."""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+import mock
+
+from ggrc.utils import benchmarks
+from ggrc.utils import metrics
+
+
+class TestMetrics(unittest.TestCase):
+  """Tests for metrics registry and exposition."""
+
+  def setUp(self):
+    self.metrics_dir = tempfile.mkdtemp()
+    self.settings_patch = mock.patch.multiple(
+        "ggrc.utils.metrics.settings",
+        METRICS_ENABLED=True,
+        METRICS_DIR=None,
+        METRICS_FLUSH_INTERVAL=10,
+    )
+    self.settings_patch.start()
+    self.counter = metrics.counter(
+        "test_events_total", "Test events.", ("kind",))
+    self.histogram = metrics.histogram(
+        "test_duration_seconds", "Test durations.", buckets=(0.1, 1))
+    metrics.reset()
+
+  def tearDown(self):
+    self.settings_patch.stop()
+    metrics.reset()
+    shutil.rmtree(self.metrics_dir)
+
+  def test_register_once(self):
+    """Registering metric with the same name returns the existing one."""
+    self.assertIs(metrics.counter("test_events_total", "Other."),
+                  self.counter)
+
+  def test_wrong_labels(self):
+    """Metric updates with wrong labels fail."""
+    with self.assertRaises(ValueError):
+      self.counter.inc(other="value")
+
+  def test_disabled(self):
+    """Updates are ignored when metrics are disabled."""
+    with mock.patch("ggrc.utils.metrics.settings.METRICS_ENABLED", False):
+      self.counter.inc(kind="a")
+    self.assertEqual(self.counter.values, {})
+
+  def test_render(self):
+    """Counters and histograms are rendered in Prometheus format."""
+    self.counter.inc(kind="a")
+    self.counter.inc(2, kind='quote"d')
+    self.histogram.observe(0.05)
+    self.histogram.observe(0.5)
+    self.histogram.observe(5)
+
+    lines = metrics.render().splitlines()
+
+    self.assertIn("# TYPE test_events_total counter", lines)
+    self.assertIn('test_events_total{kind="a"} 1', lines)
+    self.assertIn('test_events_total{kind="quote\\"d"} 2', lines)
+    self.assertIn("# TYPE test_duration_seconds histogram", lines)
+    self.assertIn('test_duration_seconds_bucket{le="0.1"} 1', lines)
+    self.assertIn('test_duration_seconds_bucket{le="1.0"} 2', lines)
+    self.assertIn('test_duration_seconds_bucket{le="+Inf"} 3', lines)
+    self.assertIn("test_duration_seconds_count 3", lines)
+    self.assertIn("test_duration_seconds_sum 5.55", lines)
+
+  def _write_process_file(self, pid, metrics_dump, token="other"):
+    """Write metrics file of another process."""
+    name = "metrics-{}-{}.json".format(pid, token)
+    with open(os.path.join(self.metrics_dir, name), "w") as file_:
+      json.dump(metrics_dump, file_)
+    return name
+
+  def test_merge_processes(self):
+    """Metrics written by other processes are summed."""
+    self.counter.inc(kind="a")
+    self.histogram.observe(0.5)
+    other_process = metrics.dump()
+    self._write_process_file(os.getppid(), other_process)
+    self.counter.inc(kind="b")
+
+    with mock.patch("ggrc.utils.metrics.settings.METRICS_DIR",
+                    self.metrics_dir):
+      lines = metrics.render().splitlines()
+      # pylint: disable=protected-access
+      own_file = os.path.basename(metrics._process_file(self.metrics_dir))
+      self.assertIn(own_file, os.listdir(self.metrics_dir))
+
+    self.assertIn('test_events_total{kind="a"} 2', lines)
+    self.assertIn('test_events_total{kind="b"} 1', lines)
+    self.assertIn('test_duration_seconds_bucket{le="1.0"} 2', lines)
+    self.assertIn("test_duration_seconds_count 2", lines)
+
+  def test_flush_throttled(self):
+    """Metrics are written at most once per flush interval."""
+    with mock.patch("ggrc.utils.metrics.settings.METRICS_DIR",
+                    self.metrics_dir):
+      metrics.flush(force=True)
+      # pylint: disable=protected-access
+      path = metrics._process_file(self.metrics_dir)
+      os.remove(path)
+      metrics.flush()
+      self.assertFalse(os.path.exists(path))
+
+  def test_stale_files(self):
+    """Files of processes that are not running are removed."""
+    self.counter.inc(kind="a")
+    other_process = metrics.dump()
+    finished = subprocess.Popen(["true"])
+    finished.wait()
+    stale_files = [
+        self._write_process_file(finished.pid, other_process),
+        # a finished process with the pid of this one
+        self._write_process_file(os.getpid(), other_process),
+    ]
+    running_file = self._write_process_file(os.getppid(), other_process)
+
+    with mock.patch("ggrc.utils.metrics.settings.METRICS_DIR",
+                    self.metrics_dir):
+      lines = metrics.render().splitlines()
+
+    self.assertIn('test_events_total{kind="a"} 2', lines)
+    files = os.listdir(self.metrics_dir)
+    self.assertIn(running_file, files)
+    for name in stale_files:
+      self.assertNotIn(name, files)
+
+  def test_benchmark_metric_name(self):
+    """Only benchmarks with a metric name record their duration."""
+    with benchmarks.BenchmarkContextManager("Update object 1"):
+      pass
+    with benchmarks.BenchmarkContextManager("Update object 2",
+                                            metric_name="update"):
+      pass
+    values = metrics.BENCHMARK_DURATION.dump()["values"]
+    self.assertEqual([key for key, _ in values], [["update"]])
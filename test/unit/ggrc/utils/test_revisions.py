@@ -0,0 +1,46 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for revision utils."""
+
+import unittest
+
+import mock
+
+from ggrc.utils import revisions
+
+
+class TestGetRevisionsByType(unittest.TestCase):
+  """Unit tests for get_revisions_by_type."""
+
+  @mock.patch("ggrc.utils.revisions.latest_revisions."
+              "get_latest_revision_ids")
+  @mock.patch("ggrc.utils.revisions.db.session.query")
+  def test_missing_pointers(self, query, get_latest_revision_ids):
+    """Objects without pointers fall back to the revisions table."""
+    query.side_effect = [
+        mock.Mock(**{"filter.return_value": [(1, 10), (2, 20)]}),
+        [(1,), (2,), (3,), (4,)],
+    ]
+    get_latest_revision_ids.return_value = {("Control", 3): 30}
+
+    result = revisions.get_revisions_by_type("Control")
+
+    get_latest_revision_ids.assert_called_once_with(
+        [("Control", 3), ("Control", 4)])
+    self.assertEqual(result, {1: 10, 2: 20, 3: 30})
+
+  @mock.patch("ggrc.utils.revisions.latest_revisions."
+              "get_latest_revision_ids")
+  @mock.patch("ggrc.utils.revisions.db.session.query")
+  def test_all_pointers(self, query, get_latest_revision_ids):
+    """Revisions table is not read if all objects have pointers."""
+    query.side_effect = [
+        mock.Mock(**{"filter.return_value": [(1, 10), (2, 20)]}),
+        [(1,), (2,)],
+    ]
+
+    result = revisions.get_revisions_by_type("Control")
+
+    get_latest_revision_ids.assert_not_called()
+    self.assertEqual(result, {1: 10, 2: 20})
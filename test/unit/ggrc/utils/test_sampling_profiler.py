@@ -0,0 +1,64 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for sampling profiler."""
+
+import collections
+import sys
+import threading
+import time
+import unittest
+
+import mock
+
+from ggrc.utils import sampling_profiler
+
+
+def _busy_function(stop_event):
+  while not stop_event.is_set():
+    sum(range(100))
+
+
+class TestSamplingProfiler(unittest.TestCase):
+  """Tests for sampling profiler."""
+
+  def setUp(self):
+    sampling_profiler.reset()
+
+  def tearDown(self):
+    sampling_profiler.reset()
+
+  def test_collapse_stack(self):
+    """Test collapsed stack starts with root and ends with current frame."""
+    stack = sampling_profiler.collapse_stack(sys._getframe(), "GET index")
+    frames = stack.split(";")
+    self.assertEqual(frames[0], "GET index")
+    self.assertEqual(frames[-1], "{}:test_collapse_stack".format(__name__))
+
+  def test_sampler(self):
+    """Test sampler records stacks of another thread."""
+    stop_event = threading.Event()
+    thread = threading.Thread(target=_busy_function, args=(stop_event,))
+    thread.start()
+    sampler = sampling_profiler.Sampler(thread.ident, "GET busy", 0.001)
+    sampler.start()
+    time.sleep(0.05)
+    sampler.stop()
+    stop_event.set()
+    thread.join()
+
+    collapsed = sampling_profiler.get_collapsed_stacks()
+    self.assertIn("_busy_function", collapsed)
+    for line in collapsed.splitlines():
+      stack, count = line.rsplit(" ", 1)
+      self.assertTrue(stack.startswith("GET busy;"))
+      self.assertGreater(int(count), 0)
+
+  @mock.patch("ggrc.utils.sampling_profiler.MAX_STACKS", 2)
+  def test_max_stacks(self):
+    """Test stacks above the limit are counted as dropped."""
+    for stack, count in (("a", 1), ("b", 2), ("c", 3), ("d", 4)):
+      sampling_profiler.add_samples(collections.Counter({stack: count}))
+    lines = sampling_profiler.get_collapsed_stacks().splitlines()
+    self.assertEqual(len(lines), 3)
+    self.assertEqual(["[dropped] 7", "a 1", "b 2"], lines)
@@ -0,0 +1,58 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for SQL profiler."""
+
+import unittest
+
+import ddt
+
+from ggrc.utils import sql_profiler
+
+
+@ddt.ddt
+class TestSqlProfiler(unittest.TestCase):
+  """Tests for SQL query fingerprinting and N+1 detection."""
+
+  @ddt.data(
+      ("SELECT * FROM controls WHERE id = 5",
+       "SELECT * FROM controls WHERE id = 7"),
+      ("SELECT * FROM controls WHERE title = 'a'",
+       "SELECT * FROM controls  WHERE title = 'it''s b'"),
+      ("SELECT * FROM controls WHERE id IN (%s, %s)",
+       "SELECT * FROM controls\nWHERE id IN (%s, %s, %s, %s)"),
+  )
+  @ddt.unpack
+  def test_same_fingerprint(self, first, second):
+    """Test statements differing only in literals have same fingerprint."""
+    self.assertEqual(
+        sql_profiler.fingerprint(sql_profiler.normalize_statement(first)),
+        sql_profiler.fingerprint(sql_profiler.normalize_statement(second)),
+    )
+
+  def test_different_fingerprint(self):
+    """Test statements for different tables have different fingerprints."""
+    self.assertNotEqual(
+        sql_profiler.normalize_statement("SELECT * FROM controls_1"),
+        sql_profiler.normalize_statement("SELECT * FROM controls_2"),
+    )
+
+  def test_n_plus_one(self):
+    """Test repeated selects are reported as N+1 with benchmark labels."""
+    profile = sql_profiler.RequestProfile("GET", "/api/audits")
+    for i in range(11):
+      profile.add_query(
+          "SELECT * FROM snapshots WHERE id = {}".format(i), 0.1, "Publish")
+    profile.add_query("UPDATE audits SET title = 'a'", 0.1, None)
+    for i in range(11):
+      profile.add_query("UPDATE audits SET title = 'a'", 0.1, None)
+
+    self.assertEqual(profile.query_count, 23)
+    result = profile.as_dict(threshold=10)
+    self.assertEqual(len(result["fingerprints"]), 2)
+    self.assertEqual(len(result["n_plus_one"]), 1)
+    snapshot_entry = [entry for entry in result["fingerprints"]
+                      if entry["fingerprint"] == result["n_plus_one"][0]][0]
+    self.assertEqual(snapshot_entry["labels"], {"Publish": 11})
+    self.assertIn("n_plus_one={}x11".format(result["n_plus_one"][0]),
+                  profile.header_value(threshold=10))
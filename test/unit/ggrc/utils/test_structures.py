@@ -93,3 +93,20 @@ class TestCaseInsensitiveDefDict(unittest.TestCase):
         sorted(self.ci_dict.lower_items()),
         sorted([("hello", "World"), ("foo", "BAR")])
     )
+
+
+class TestLRUCache(unittest.TestCase):
+  """Tests for the least recently used cache."""
+
+  def test_drops_least_recently_used(self):
+    """Least recently used entries are dropped first."""
+    cache = structures.LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    self.assertEqual(cache.get("a"), 1)
+    cache.set("c", 3)
+
+    self.assertEqual(len(cache), 2)
+    self.assertIn("a", cache)
+    self.assertNotIn("b", cache)
+    self.assertEqual(cache.get("b", "missing"), "missing")